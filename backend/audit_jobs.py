@@ -0,0 +1,420 @@
+import json
+import multiprocessing
+import os
+import queue
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlmodel import Session, select
+
+from models import AuditJob, AuditShard, Student
+
+UNFINISHED = ("queued", "running")
+
+
+def plan_shards(session: Session, job: AuditJob) -> List[AuditShard]:
+    """
+    Partitions students by id into ranges of `job.shard_size` students, with
+    one index lookup per shard rather than reading every id.
+    """
+    shards = []
+    last_id = 0
+    while True:
+        end_id = session.exec(
+            select(Student.id).where(Student.id > last_id).order_by(Student.id).offset(job.shard_size - 1).limit(1)
+        ).first()
+        if end_id is None:
+            end_id = session.exec(select(func.max(Student.id)).where(Student.id > last_id)).one()
+            if end_id is not None:
+                shards.append(AuditShard(job_id=job.id, start_id=last_id + 1, end_id=end_id))
+            return shards
+        shards.append(AuditShard(job_id=job.id, start_id=last_id + 1, end_id=end_id))
+        last_id = end_id
+
+
+def run_shard(shard_fn: Callable, shard_id: int, context: tuple, attempts: int, backoff_seconds: float):
+    """
+    Runs `shard_fn(shard_id, *context)`, retrying transient database errors
+    (e.g. SQLite's "database is locked") with jittered exponential backoff.
+    Module level so it can be sent to a worker process.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return shard_fn(shard_id, *context)
+        except OperationalError as e:
+            if attempt >= attempts:
+                raise
+            delay = backoff_seconds * 2 ** (attempt - 1) * random.uniform(1, 1.5)
+            print(f"Audit shard {shard_id} attempt {attempt} failed ({e.orig or e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+class AuditJobRunner:
+    """
+    Runs cohort audit jobs in the background, one job at a time.
+
+    A job is split into id-range shards and each shard is handed to
+    `shard_fn(shard_id, *context)` in a pool of worker processes. `shard_fn`
+    commits its own work together with the shard's "done" status, so a job
+    interrupted by a crash or restart resumes from the shards still pending.
+    `context_fn` is evaluated once per run in this process (e.g. to fetch the
+    news once) and its result is passed to every shard.
+
+    With several app workers sharing one database, a job is run under a
+    lease (`lease_owner`/`lease_expires_at`) that the running worker renews
+    every `lease_seconds / 3`. Another worker only picks a job up once its
+    lease has lapsed, i.e. its owner died mid-run.
+
+    A shard that hits a transient database error is retried up to
+    `shard_attempts` times with exponential backoff from
+    `retry_backoff_seconds`. If it still fails, the job is left unfinished
+    with its lease released, and the next orphan check resumes it; only other
+    errors mark the job "failed".
+    """
+
+    def __init__(self, engine, shard_fn: Callable, shard_size: int = 5000, workers: int = 2,
+                 context_fn: Optional[Callable[[], tuple]] = None, on_shard_done: Optional[Callable[[], None]] = None,
+                 lease_seconds: float = 300, shard_attempts: int = 5, retry_backoff_seconds: float = 0.5):
+        self.engine = engine
+        self.shard_fn = shard_fn
+        self.shard_size = shard_size
+        # 0 runs shards in the runner thread, which is handy for debugging
+        self.workers = workers
+        self.context_fn = context_fn or (lambda: ())
+        self.on_shard_done = on_shard_done or (lambda: None)
+        self.lease_seconds = lease_seconds
+        self.shard_attempts = shard_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._queued = set()  # Job ids waiting in or taken from _queue, not yet finished here
+        self._submit_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        # Resume whatever a previous process left unfinished
+        with Session(self.engine) as session:
+            unfinished = session.exec(
+                select(AuditJob.id).where(AuditJob.status.in_(UNFINISHED)).order_by(AuditJob.created_at)
+            ).all()
+        for job_id in unfinished:
+            self._enqueue(job_id)
+        self._thread = threading.Thread(target=self._run_loop, name="audit-job-runner", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        self._stop.set()
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _enqueue(self, job_id: str):
+        with self._submit_lock:
+            if job_id in self._queued:
+                return
+            self._queued.add(job_id)
+        self._queue.put(job_id)
+
+    def submit(self, scheduled_for: Optional[datetime] = None) -> Optional[AuditJob]:
+        """
+        Queues a new audit job, or returns the one already queued or running.
+        With `scheduled_for`, a job is only created for that schedule window if
+        no worker has created one yet and no audit is in flight; otherwise
+        returns None.
+        """
+        with self._submit_lock, Session(self.engine) as session:
+            job = session.exec(
+                select(AuditJob).where(AuditJob.status.in_(UNFINISHED)).order_by(AuditJob.created_at)
+            ).first()
+            if job:
+                return None if scheduled_for else job
+            job = AuditJob(id=uuid.uuid4().hex, shard_size=self.shard_size, scheduled_for=scheduled_for)
+            session.add(job)
+            try:
+                session.commit()
+            except IntegrityError:
+                # Unique scheduled_for: another worker already created this window's job
+                session.rollback()
+                return None
+            session.refresh(job)
+        self._enqueue(job.id)
+        return job
+
+    def requeue_orphans(self) -> List[str]:
+        """Queues unfinished jobs whose owner stopped renewing its lease."""
+        with Session(self.engine) as session:
+            orphans = session.exec(
+                select(AuditJob.id).where(
+                    AuditJob.status.in_(UNFINISHED),
+                    or_(AuditJob.lease_expires_at.is_(None), AuditJob.lease_expires_at < datetime.utcnow()),
+                ).order_by(AuditJob.created_at)
+            ).all()
+        for job_id in orphans:
+            self._enqueue(job_id)
+        return list(orphans)
+
+    def _acquire_lease(self, job_id: str) -> bool:
+        """Claims (or renews) the job for this worker in one conditional UPDATE."""
+        now = datetime.utcnow()
+        with Session(self.engine) as session:
+            result = session.execute(
+                update(AuditJob)
+                .where(
+                    AuditJob.id == job_id,
+                    AuditJob.status.in_(UNFINISHED),
+                    or_(AuditJob.lease_owner.is_(None), AuditJob.lease_owner == self.worker_id,
+                        AuditJob.lease_expires_at < now),
+                )
+                .values(lease_owner=self.worker_id, lease_expires_at=now + timedelta(seconds=self.lease_seconds))
+            )
+            session.commit()
+        return result.rowcount == 1
+
+    def _heartbeat(self, job_id: str, done: threading.Event, lost: threading.Event):
+        while not done.wait(self.lease_seconds / 3):
+            if not self._acquire_lease(job_id):
+                print(f"Audit job {job_id}: lease lost to another worker")
+                lost.set()
+                return
+
+    def progress(self, job_id: str, details: bool = False) -> Optional[dict]:
+        with Session(self.engine) as session:
+            job = session.get(AuditJob, job_id)
+            if job is None:
+                return None
+            done = session.exec(
+                select(
+                    func.count(AuditShard.id),
+                    func.coalesce(func.sum(AuditShard.processed_students), 0),
+                    func.coalesce(func.sum(AuditShard.drift_emails), 0),
+                    func.coalesce(func.sum(AuditShard.inactivity_emails), 0),
+                    func.coalesce(func.sum(AuditShard.news_emails), 0),
+                ).where(AuditShard.job_id == job_id, AuditShard.status == "done")
+            ).one()
+            report = {
+                "job_id": job.id,
+                "status": job.status,
+                "total_shards": job.total_shards,
+                "completed_shards": done[0],
+                "total_students": job.total_students,
+                "processed_students": done[1],
+                "percent": round(100 * done[1] / job.total_students, 1) if job.total_students else
+                           (100.0 if job.status == "completed" else 0.0),
+                "emails": {"drift": done[2], "inactivity": done[3], "news": done[4]},
+                "created_at": job.created_at,
+                "started_at": job.started_at,
+                "finished_at": job.finished_at,
+                "last_error": job.last_error,
+            }
+            if details:
+                shard_details = session.exec(
+                    select(AuditShard.details)
+                    .where(AuditShard.job_id == job_id, AuditShard.status == "done")
+                    .order_by(AuditShard.start_id)
+                ).all()
+                report["details"] = [item for chunk in shard_details for item in json.loads(chunk)]
+            return report
+
+    def _run_loop(self):
+        while not self._stop.is_set():
+            try:
+                job_id = self._queue.get(timeout=self.lease_seconds / 3)
+            except queue.Empty:
+                # Pick up jobs whose worker died mid-run
+                try:
+                    self.requeue_orphans()
+                except Exception as e:
+                    print(f"Audit job runner could not check for orphaned jobs: {e}")
+                continue
+            if job_id is None:
+                return
+            try:
+                self.run_job(job_id)
+            except Exception as e:
+                print(f"Audit job {job_id} crashed: {e}")
+            finally:
+                with self._submit_lock:
+                    self._queued.discard(job_id)
+
+    def _set_status(self, job_id: str, **fields):
+        with Session(self.engine) as session:
+            job = session.get(AuditJob, job_id)
+            for name, value in fields.items():
+                setattr(job, name, value)
+            session.add(job)
+            session.commit()
+
+    def run_job(self, job_id: str):
+        """
+        Runs (or resumes) one job to completion in the calling thread, unless
+        another worker holds its lease.
+        """
+        if not self._acquire_lease(job_id):
+            return
+        with Session(self.engine) as session:
+            job = session.get(AuditJob, job_id)
+            if job is None or job.status not in UNFINISHED:
+                return
+            job.status = "running"
+            job.started_at = job.started_at or datetime.utcnow()
+            if job.total_shards is None:
+                shards = plan_shards(session, job)
+                session.add_all(shards)
+                job.total_shards = len(shards)
+                job.total_students = session.exec(select(func.count(Student.id))).one()
+            session.add(job)
+            session.commit()
+            pending = session.exec(
+                select(AuditShard.id)
+                .where(AuditShard.job_id == job_id, AuditShard.status == "pending")
+                .order_by(AuditShard.start_id)
+            ).all()
+
+        done, lost = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, done, lost),
+                                     name="audit-job-lease", daemon=True)
+        heartbeat.start()
+        try:
+            context = tuple(self.context_fn())
+            retry = (context, self.shard_attempts, self.retry_backoff_seconds)
+            if self.workers <= 0:
+                for shard_id in pending:
+                    if self._stop.is_set() or lost.is_set():
+                        break
+                    run_shard(self.shard_fn, shard_id, *retry)
+                    self.on_shard_done()
+            else:
+                # spawn: workers import the app fresh instead of forking a
+                # process that is already running server and mail threads
+                with ProcessPoolExecutor(max_workers=self.workers,
+                                         mp_context=multiprocessing.get_context("spawn")) as pool:
+                    futures = [pool.submit(run_shard, self.shard_fn, shard_id, *retry) for shard_id in pending]
+                    try:
+                        for future in as_completed(futures):
+                            if self._stop.is_set() or lost.is_set():
+                                break
+                            future.result()
+                            self.on_shard_done()
+                    finally:
+                        for other in futures:
+                            other.cancel()
+        except OperationalError as e:
+            # Out of retries on a transient error: keep the job resumable
+            self._set_status(job_id, last_error=str(e.orig or e), lease_owner=None, lease_expires_at=None)
+            print(f"Audit job {job_id} paused, will resume: {e.orig or e}")
+            return
+        except Exception as e:
+            self._set_status(job_id, status="failed", last_error=str(e), finished_at=datetime.utcnow(),
+                             lease_owner=None, lease_expires_at=None)
+            print(f"Audit job {job_id} failed: {e}")
+            return
+        finally:
+            done.set()
+            heartbeat.join()
+        if lost.is_set():
+            return  # The worker holding the lease finishes the job
+        if self._stop.is_set():
+            # Left "running" with the lease released, so another worker (or
+            # the next start()) resumes the pending shards straight away
+            self._set_status(job_id, lease_owner=None, lease_expires_at=None)
+            return
+        self._set_status(job_id, status="completed", finished_at=datetime.utcnow(), last_error=None,
+                         lease_owner=None, lease_expires_at=None)
+        print(f"Audit job {job_id} completed ({len(pending)} shards)")
+
+
+class AuditScheduler:
+    """
+    Submits an audit job once per schedule window, cron style: windows start
+    every `interval` from `offset` past midnight UTC (e.g. daily at 09:00).
+
+    Every app worker runs a scheduler, and each fires at a random point in
+    the first `jitter_seconds` of a window so they don't hit the database at
+    once. Only the first to create the window's job (unique `scheduled_for`)
+    gets to run it; the rest see the IntegrityError and skip the window.
+    Windows missed while no worker was up are not caught up on.
+    """
+
+    def __init__(self, runner: AuditJobRunner, interval: timedelta = timedelta(days=1),
+                 offset: timedelta = timedelta(0), jitter_seconds: float = 300, poll_seconds: float = 30,
+                 rng: Optional[random.Random] = None):
+        if interval <= timedelta(0):
+            raise ValueError("Audit schedule interval must be positive")
+        self.runner = runner
+        self.interval = interval
+        self.offset = offset % interval
+        self.jitter_seconds = jitter_seconds
+        self.poll_seconds = poll_seconds
+        self._rng = rng or random.Random()
+
+        self._window: Optional[datetime] = None  # Window currently waiting to fire
+        self._fire_at: Optional[datetime] = None
+        self._fired: Optional[datetime] = None  # Last window this worker fired (or skipped)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def window_start(self, now: datetime) -> datetime:
+        """Start of the schedule window containing `now`."""
+        day = datetime(now.year, now.month, now.day)
+        windows = (now - day - self.offset) // self.interval
+        return day + self.offset + windows * self.interval
+
+    def next_run(self) -> Optional[datetime]:
+        return self._fire_at
+
+    def tick(self, now: Optional[datetime] = None) -> Optional[AuditJob]:
+        """
+        Fires the current window once its jittered start time has passed.
+        Returns the job if this worker created it, else None.
+        """
+        now = now or datetime.utcnow()
+        window = self.window_start(now)
+        if window != self._window:
+            self._window = window
+            self._fire_at = window + timedelta(seconds=self._rng.uniform(0, self.jitter_seconds))
+            if self._fired is None and now > self._fire_at:
+                # Started after this window fired: like cron, wait for the next one
+                self._fired = window
+        if self._fired == window or now < self._fire_at:
+            return None
+        self._fired = window
+        job = self.runner.submit(scheduled_for=window)
+        if job:
+            print(f"Scheduled audit job {job.id} for window {window:%Y-%m-%d %H:%M}")
+        return job
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Audit scheduler tick failed: {e}")
+            if self._stop.wait(self.poll_seconds):
+                return
@@ -0,0 +1,15 @@
+import time
+
+import requests
+
+# Shared by the scripts that drive a running server's audit over HTTP:
+# POST /audit_drift answers 202 with a job, which runs in the background.
+
+
+def wait_for_audit(base_url, job, timeout=300):
+    """Polls the background audit job until it finishes and returns its report."""
+    deadline = time.time() + timeout
+    while job["status"] in ("queued", "running") and time.time() < deadline:
+        time.sleep(1)
+        job = requests.get(f"{base_url}/audit_jobs/{job['job_id']}", params={"details": "true"}).json()
+    return job
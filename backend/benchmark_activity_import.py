@@ -0,0 +1,199 @@
+import csv
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# Compares activity ingestion throughput, one row per POST /activities/
+# against POST /activities/bulk (JSON array and NDJSON) and the CSV importer,
+# then checks per-row error reporting and that the bulk paths, alone and
+# racing each other and the single-row path on the same students, leave every
+# student's drift aggregate equal to a rebuild from the full history.
+
+tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'activity_import.db')}"
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+import main
+from database import create_db_and_tables, engine
+from import_activities import import_csv
+from models import Student
+
+NUM_STUDENTS = 1000
+SINGLE_ROWS = 2_000
+BULK_ROWS = 100_000
+CSV_ROWS = 200_000
+# Concurrent writers on a few shared students: bulk posts of BULK_RACE_ROWS
+# rows and single-row posts, RACE_POSTS each per thread
+RACE_THREADS = 4
+RACE_POSTS = 10
+BULK_RACE_ROWS = 20
+RACE_STUDENTS = 5
+ACTIVITY_NAMES = ["FastAPI Basics", "SQL Joins", "Docker Compose", "React Hooks", "Figma UI Kit", "Cooking"]
+
+rng = random.Random(11)
+
+
+def make_row():
+    return {
+        "student_id": rng.randint(1, NUM_STUDENTS),
+        "name": rng.choice(ACTIVITY_NAMES),
+        "category": "LMS",
+        "type": "Learning",
+        "timestamp": "2026-03-01T12:00:00",
+    }
+
+
+def seed():
+    create_db_and_tables()
+    conn = sqlite3.connect(os.environ["DATABASE_URL"][len("sqlite:///"):])
+    conn.executemany(
+        "INSERT INTO student (id, name, email, hashed_password, target_career, current_drift_score, "
+        "relevant_count, conflicting_count, irrelevant_count, drift_suggestions) "
+        "VALUES (?, ?, ?, '', ?, 0.0, 0, 0, 0, '[]')",
+        ((i, f"Student {i}", f"s{i}@example.com", rng.choice(list(main.CAREER_SKILLS)))
+         for i in range(1, NUM_STUDENTS + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed(label, rows, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {rows:>7} rows  {elapsed:6.2f}s  {rows / elapsed:>9.0f} rows/s")
+    return result, rows / elapsed
+
+
+def check_concurrent_imports():
+    """Bulk and single-row imports on the same students must not overwrite each other's aggregate updates."""
+    race_rng = random.Random(5)
+    posts = []
+    for _ in range(RACE_THREADS):
+        posts.append([("/activities/bulk", [{**make_row(), "student_id": race_rng.randint(1, RACE_STUDENTS)}
+                                            for _ in range(BULK_RACE_ROWS)]) for _ in range(RACE_POSTS)])
+        posts.append([("/activities/", {**{k: v for k, v in make_row().items() if k != "timestamp"},
+                                        "student_id": race_rng.randint(1, RACE_STUDENTS)}) for _ in range(RACE_POSTS)])
+    with Session(engine) as session:
+        before = {s.id: main._activity_total(s) for s in session.exec(select(Student).where(Student.id <= RACE_STUDENTS))}
+    failures = []
+
+    def poster(requests):
+        client = TestClient(main.app)
+        for path, body in requests:
+            resp = client.post(path, json=body)
+            if resp.status_code != 200:
+                failures.append((path, resp.status_code, resp.text))
+
+    threads = [threading.Thread(target=poster, args=(requests,)) for requests in posts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not failures, failures[:3]
+
+    added = Counter(body["student_id"] for requests in posts for path, body in requests if path == "/activities/")
+    added.update(row["student_id"] for requests in posts for path, body in requests if path != "/activities/"
+                 for row in body)
+    with Session(engine) as session:
+        after = {s.id: main._activity_total(s) for s in session.exec(select(Student).where(Student.id <= RACE_STUDENTS))}
+    counted = sum(after.values()) - sum(before.values())
+    print(f"  {RACE_THREADS} bulk + {RACE_THREADS} single-row threads on {RACE_STUDENTS} students: "
+          f"{sum(added.values())} rows posted, {counted} counted in the aggregates")
+    assert all(after[sid] - before[sid] == added[sid] for sid in after), (before, after, dict(added))
+
+
+def run():
+    seed()
+    client = TestClient(main.app)
+    print("Throughput:")
+
+    # Table models aren't validated on input, so the single path gets no timestamp string
+    single = [{k: v for k, v in make_row().items() if k != "timestamp"} for _ in range(SINGLE_ROWS)]
+    _, single_rate = timed("POST /activities/ (one per row)", SINGLE_ROWS, lambda: [
+        client.post("/activities/", json=row).raise_for_status() for row in single
+    ])
+
+    rows = [make_row() for _ in range(BULK_ROWS)]
+    report, bulk_rate = timed("POST /activities/bulk (JSON)", BULK_ROWS,
+                              lambda: client.post("/activities/bulk", json=rows).json())
+    assert report["inserted"] == BULK_ROWS and report["failed"] == 0, report
+
+    ndjson = "".join(json.dumps(make_row()) + "\n" for _ in range(BULK_ROWS)).encode()
+    chunks = (ndjson[i:i + 65536] for i in range(0, len(ndjson), 65536))
+    report, _ = timed("POST /activities/bulk (NDJSON)", BULK_ROWS, lambda: client.post(
+        "/activities/bulk", content=chunks, headers={"Content-Type": "application/x-ndjson"}).json())
+    assert report["inserted"] == BULK_ROWS and report["failed"] == 0, report
+
+    csv_path = os.path.join(tmp.name, "learning_log.csv")
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["student_id", "name", "category", "type", "timestamp"])
+        writer.writeheader()
+        writer.writerows(make_row() for _ in range(CSV_ROWS))
+    report, _ = timed("import_activities.py (CSV)", CSV_ROWS, lambda: import_csv(csv_path, progress=False))
+    assert report["inserted"] == CSV_ROWS and report["failed"] == 0, report
+
+    print(f"\nBulk JSON vs single-row path: {bulk_rate / single_rate:.0f}x")
+
+    print("\nPer-row errors:")
+    bad = [
+        make_row(),
+        {"student_id": 1, "category": "LMS", "type": "Learning"},
+        {**make_row(), "student_id": NUM_STUDENTS + 50},
+        {**make_row(), "timestamp": "yesterday"},
+    ]
+    report = client.post("/activities/bulk", json=bad).json()
+    for error in report["errors"]:
+        print(f"  row {error['row']}: {error['error']}")
+    assert report["inserted"] == 1 and [e["row"] for e in report["errors"]] == [2, 3, 4], report
+    report = client.post("/activities/bulk", content=b'{"bad json\n' + json.dumps(make_row()).encode(),
+                         headers={"Content-Type": "application/x-ndjson"}).json()
+    assert report["inserted"] == 1 and report["errors"] == [{"row": 1, "error": "Invalid JSON"}], report
+    assert client.post("/activities/bulk", json={"not": "a list"}).status_code == 400
+
+    print("\nConcurrent imports:")
+    check_concurrent_imports()
+
+    print("\nChecking drift aggregates against a full rebuild...")
+    with Session(engine) as session:
+        students = session.exec(select(Student)).all()
+        stored_sums = {s.id: (s.drift_feature_sums, s.drift_sums_as_of) for s in students}
+        aggregates = lambda: {s.id: (s.relevant_count, s.conflicting_count, s.irrelevant_count, s.drift_suggestions)
+                              for s in students}
+        stored = aggregates()
+        main.rebuild_drift_aggregates(students, main.load_activity_histories(session, [s.id for s in students]))
+        rebuilt = aggregates()
+        # The recency features age between updates: score both sets of sums as of the same instant
+        as_of = datetime.utcnow()
+        main._update_drift_scores(students, as_of)
+        rebuilt_scores = {s.id: s.current_drift_score for s in students}
+        for s in students:
+            s.drift_feature_sums, s.drift_sums_as_of = stored_sums[s.id]
+        main._update_drift_scores(students, as_of)
+        stored_scores = {s.id: s.current_drift_score for s in students}
+        session.rollback()
+    mismatches = [sid for sid in stored
+                  if stored[sid] != rebuilt[sid] or abs(stored_scores[sid] - rebuilt_scores[sid]) > 1e-9]
+    assert not mismatches, f"{len(mismatches)} aggregates differ, e.g. student {mismatches[0]}"
+    total = sum(sum(aggregate[:3]) for aggregate in stored.values())
+    print(f"  {len(stored)} students, {total} activities: all aggregates match")
+
+
+if __name__ == "__main__":
+    try:
+        run()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
+    finally:
+        engine.dispose()
+        tmp.cleanup()
@@ -0,0 +1,157 @@
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Audits a 1M-student cohort in which ~2% of students are owed an email, once
+# by loading and checking every student in Python (the pre-filter-free path)
+# and once through the audit job, which selects drift, inactivity and news
+# candidates in SQL and only loads those. Both must stage the same emails.
+
+tmp = tempfile.TemporaryDirectory()
+DB_PATH = os.path.join(tmp.name, "audit_prefilter.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlmodel import Session, select
+
+import main
+from audit_jobs import AuditJobRunner
+from database import create_db_and_tables, engine
+
+NUM_STUDENTS = int(os.getenv("AUDIT_BENCH_STUDENTS", 1_000_000))
+# "aging": active on the site, but no activity in 40 days. Their stored score
+# was low when last updated; as of now it is over the drift threshold.
+ELIGIBLE_SHARE = {"drift": 0.005, "aging": 0.005, "inactivity": 0.01, "news": 0.005}
+AGING_DAYS = 40
+NEWS = [{"title": "Story", "url": "https://example.com/1", "description": "News"}]
+
+
+def seed():
+    create_db_and_tables()
+    version = main.get_skill_matcher(main.CAREER_SKILLS).version
+    now = datetime.utcnow()
+    recent = (now - timedelta(hours=2)).isoformat(" ")
+    stale = (now - timedelta(days=3)).isoformat(" ")
+    rng = random.Random(17)
+    featurizer = main.get_featurizer(main.CAREER_SKILLS)
+
+    def stored_aggregate(names, as_of):
+        """(score, counts, sums, sums as of, rescore at) as main.fold_new_activities stores them."""
+        student = main.Student(target_career="Backend Developer", last_visited_at=as_of, drift_sums_as_of=as_of,
+                               drift_feature_sums=json.dumps([0.0] * len(main.SUM_NAMES)))
+        main._add_to_aggregate(student, names, featurizer.matcher, set())
+        main._add_activity_sums([student], {None: [(name, "Learning", as_of) for name in names]}, as_of)
+        main._update_drift_scores([student], as_of)
+        counts = (student.relevant_count, student.conflicting_count, student.irrelevant_count)
+        rescore_at = student.drift_rescore_at and student.drift_rescore_at.isoformat(" ")
+        return (student.current_drift_score, counts, student.drift_feature_sums, as_of.isoformat(" "), rescore_at)
+
+    drifting = stored_aggregate(["FastAPI"] + ["Pandas"] * 4 + ["Cooking"] * 5, now)
+    on_track = stored_aggregate(["FastAPI"] * 8 + ["Pandas", "Cooking"], now)
+    aging = stored_aggregate(["FastAPI"] * 3 + ["Pandas"] * 7, now - timedelta(days=AGING_DAYS))
+    assert drifting[0] > main.DRIFT_EMAIL_THRESHOLD >= max(on_track[0], aging[0]), (drifting, on_track, aging)
+    drift_cut = ELIGIBLE_SHARE["drift"]
+    aging_cut = drift_cut + ELIGIBLE_SHARE["aging"]
+    inactive_cut = aging_cut + ELIGIBLE_SHARE["inactivity"]
+    news_cut = inactive_cut + ELIGIBLE_SHARE["news"]
+
+    aging_names = set()
+
+    def rows():
+        for i in range(1, NUM_STUDENTS + 1):
+            roll = rng.random()
+            if drift_cut <= roll < aging_cut:
+                aging_names.add(f"Student {i}")
+            score, counts, sums, sums_as_of, rescore_at = (
+                drifting if roll < drift_cut else aging if roll < aging_cut else on_track
+            )
+            visited = stale if aging_cut <= roll < inactive_cut else recent
+            news_sent = stale if inactive_cut <= roll < news_cut else recent
+            yield (i, f"Student {i}", f"student{i}@example.com", score, visited, news_sent, *counts, version, sums,
+                   sums_as_of, rescore_at)
+
+    conn = sqlite3.connect(DB_PATH)
+    conn.executemany(
+        "INSERT INTO student (id, name, email, hashed_password, target_career, current_drift_score, "
+        "last_visited_at, last_news_sent_at, relevant_count, conflicting_count, irrelevant_count, "
+        "drift_suggestions, drift_skills_version, drift_feature_sums, drift_sums_as_of, drift_rescore_at) "
+        "VALUES (?, ?, ?, '', 'Backend Developer', ?, ?, ?, ?, ?, ?, '[]', ?, ?, ?, ?)",
+        rows(),
+    )
+    conn.commit()
+    conn.close()
+    return aging_names
+
+
+def every_student(session):
+    """All students in keyset-paginated chunks of AUDIT_CHUNK_SIZE, as the audit loaded them before the pre-filter."""
+    last_id = 0
+    while True:
+        students = session.exec(
+            select(main.Student).where(main.Student.id > last_id).order_by(main.Student.id).limit(main.AUDIT_CHUNK_SIZE)
+        ).all()
+        if not students:
+            return
+        last_id = students[-1].id
+        yield students
+
+
+def audit_everyone():
+    """Loads and checks every student, then rolls back so the DB is untouched."""
+    reports = []
+    with Session(engine) as session:
+        for students in every_student(session):
+            reports.extend(main.audit_students(session, students, NEWS))
+            session.flush()
+            session.expunge_all()
+        session.rollback()
+    return reports
+
+
+def verify():
+    print(f"Seeding {NUM_STUDENTS} students...")
+    aging_names = seed()
+
+    start = time.perf_counter()
+    baseline = audit_everyone()
+    full_seconds = time.perf_counter() - start
+    print(f"Load every student:     {full_seconds:7.2f}s  {len(baseline)} emails")
+
+    with Session(engine) as session:
+        start = time.perf_counter()
+        candidates = main.audit_candidate_ids(session, 1, NUM_STUDENTS)
+        select_seconds = time.perf_counter() - start
+
+    runner = AuditJobRunner(engine, main.audit_shard, shard_size=main.AUDIT_SHARD_SIZE, workers=0,
+                            context_fn=lambda: (NEWS,))
+    start = time.perf_counter()
+    job = runner.submit()
+    runner.run_job(job.id)
+    prefilter_seconds = time.perf_counter() - start
+    progress = runner.progress(job.id, details=True)
+    print(f"SQL pre-filter (job):   {prefilter_seconds:7.2f}s  {len(progress['details'])} emails, "
+          f"{len(candidates)} candidates ({100 * len(candidates) / NUM_STUDENTS:.1f}%) "
+          f"selected in {select_seconds * 1000:.0f} ms")
+    print(f"Speedup: {full_seconds / prefilter_seconds:.0f}x")
+
+    assert progress["status"] == "completed" and progress["processed_students"] == NUM_STUDENTS, progress
+    key = lambda report: (report["name"], report["type"])
+    assert sorted(map(key, progress["details"])) == sorted(map(key, baseline)), "pre-filter changed who is emailed"
+    aged = {report["name"] for report in progress["details"] if report["type"] == "Drift"} & aging_names
+    assert len(aged) == len(aging_names), f"{len(aging_names) - len(aged)} students whose score aged past the threshold missed"
+    assert prefilter_seconds < full_seconds / 3, (prefilter_seconds, full_seconds)
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
+    finally:
+        engine.dispose()
+        tmp.cleanup()
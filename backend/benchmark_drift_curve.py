@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+from drift_curve import DriftCurve
+
+# Compares the exported drift curve against the RandomForest it came from:
+# agreement on every reachable relevant_ratio, cold-start cost and per-call latency.
+
+MODEL_PATH = "drift_model.pkl"
+CURVE_PATH = "drift_curve.npz"
+REPEATS = 200
+
+warnings.filterwarnings("ignore")
+
+
+def reachable_ratios(max_activities=200):
+    """Every k/n a student with up to `max_activities` activities can produce."""
+    ratios = {k / n for n in range(1, max_activities + 1) for k in range(n + 1)}
+    return np.array(sorted(ratios))
+
+
+def cold_start(code):
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-W", "ignore", "-c", code], check=True)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+def per_call(fn):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - start) / REPEATS
+
+
+def run():
+    forest = joblib.load(MODEL_PATH)
+    curve = DriftCurve.load(CURVE_PATH)
+
+    ratios = reachable_ratios()
+    uniform = np.random.default_rng(0).random(100_000)
+    for label, xs in [("reachable k/n ratios", ratios), ("uniform random [0,1]", uniform)]:
+        expected = forest.predict_proba(xs.reshape(-1, 1))[:, 1]
+        actual = curve.drift_probability(xs)
+        diff = np.abs(expected - actual)
+        agree = np.mean((expected > 0.5) == (actual > 0.5))
+        print(f"Agreement on {len(xs)} {label}: max |diff| {diff.max():.2e}, "
+              f"mean |diff| {diff.mean():.2e}, is_drifting agreement {agree:.2%}")
+
+    forest_cold = cold_start(f"import joblib; joblib.load({MODEL_PATH!r})")
+    curve_cold = cold_start(f"from drift_curve import DriftCurve; DriftCurve.load({CURVE_PATH!r})")
+    print("\nCold start (fresh interpreter, median of 5):")
+    print(f"  forest (joblib + sklearn unpickle)  {forest_cold * 1000:8.1f} ms")
+    print(f"  curve (numpy only)                  {curve_cold * 1000:8.1f} ms")
+
+    single = np.array([[0.4]])
+    batch = uniform[:1000].reshape(-1, 1)
+    print("\nPer call:")
+    print(f"  forest, 1 student      {per_call(lambda: forest.predict_proba(single)) * 1e6:10.1f} us")
+    print(f"  curve,  1 student      {per_call(lambda: curve.predict_proba(single)) * 1e6:10.1f} us")
+    print(f"  forest, 1000 students  {per_call(lambda: forest.predict_proba(batch)) * 1e6:10.1f} us")
+    print(f"  curve,  1000 students  {per_call(lambda: curve.predict_proba(batch)) * 1e6:10.1f} us")
+
+    print(f"\nArtifact size: forest {os.path.getsize(MODEL_PATH) / 1024:.1f} KB, "
+          f"curve {os.path.getsize(CURVE_PATH) / 1024:.1f} KB ({len(curve.knots)} knots)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+
+import main
+from drift_curve import DriftCurve
+from drift_model import INFERENCE_BUDGET_MS_PER_1K, DriftModel
+from featurizer import CAREER_SKILLS, FEATURE_NAMES, get_featurizer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml"))
+import generate_dataset
+
+# Times the multi-feature drift model against its documented per-1k-student
+# budget (featurization included), both from raw activities (score_drift_batch)
+# and from stored sums (the audit's rescoring), and checks that it separates
+# drifting students better than the one-feature curve on held-out data, with
+# and without the optional inputs (types, timestamps, last visit).
+
+SIZES = [1_000, 10_000, 100_000]
+REPEATS = 20
+HOLDOUT_SEED = 99
+
+
+def cohort(students, seed):
+    """main.DriftInput per student as serving receives them (plain lists), plus labels."""
+    df = generate_dataset.generate(students, seed=seed)
+    # Rows come grouped by student: slice the columns at each student's first row
+    student_ids = df["student_id"].to_numpy()
+    bounds = np.flatnonzero(np.r_[True, student_ids[1:] != student_ids[:-1], True]).tolist()
+    names = df["activity_name"].astype(str).tolist()
+    types = df["type"].astype(str).tolist()
+    timestamps = list(df["timestamp"].dt.to_pydatetime())
+    targets = df["target_career"].astype(str).tolist()
+    last_visited = list(df["last_visited_at"].dt.to_pydatetime())
+    inputs = [
+        main.DriftInput(targets[start], names[start:end], types[start:end], timestamps[start:end], last_visited[start])
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+    return inputs, (df["status"].to_numpy()[bounds[:-1]] == "Drifting")
+
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def check_latency(model):
+    featurizer = get_featurizer(CAREER_SKILLS)
+    print(f"{'students':>9} | {'activities':>10} | {'from activities':>16} | {'from stored sums':>16} | per 1k students")
+    for students in SIZES:
+        inputs, _ = cohort(students, seed=3)
+        as_of = generate_dataset.AS_OF
+        repeats = max(5, REPEATS * SIZES[0] // students)
+
+        def from_activities():
+            features, _ = main.drift_features(inputs, as_of=as_of)
+            return model.drift_probability(features)
+
+        sums = featurizer.activity_sums(*_flat(inputs), as_of)
+        last_visited = [drift_input.last_visited_at for drift_input in inputs]
+        scores, activities_s = best_of(from_activities, repeats)
+        stored, sums_s = best_of(lambda: model.drift_probability(featurizer.features_from_sums(sums, last_visited, as_of)),
+                                 repeats)
+        assert np.allclose(scores, stored), "stored sums score differently from raw activities"
+        per_1k = activities_s * 1000 / students * 1000
+        print(f"{students:>9,} | {sum(len(i.activity_names) for i in inputs):>10,} | {activities_s * 1000:>13.1f} ms"
+              f" | {sums_s * 1000:>13.1f} ms | {per_1k:6.2f} ms (budget {INFERENCE_BUDGET_MS_PER_1K} ms)")
+        assert per_1k <= INFERENCE_BUDGET_MS_PER_1K, f"{per_1k:.2f} ms per 1k students at {students:,}"
+        assert sums_s < activities_s, "rescoring from stored sums is slower than from activities"
+
+
+def _flat(inputs):
+    groups, names, targets, types, timestamps = [], [], [], [], []
+    for group, drift_input in enumerate(inputs):
+        count = len(drift_input.activity_names)
+        groups.extend([group] * count)
+        names.extend(drift_input.activity_names)
+        targets.extend([drift_input.target_career] * count)
+        types.extend(drift_input.activity_types)
+        timestamps.extend(drift_input.timestamps)
+    return groups, names, targets, types, timestamps, len(inputs)
+
+
+def check_quality(model):
+    inputs, labels = cohort(20_000, seed=HOLDOUT_SEED)
+    features, _ = main.drift_features(inputs, as_of=generate_dataset.AS_OF)
+    auc = roc_auc_score(labels, model.drift_probability(features))
+    line = f"Held-out ROC AUC: multi-feature model {auc:.4f}"
+    if os.path.exists(main.CURVE_PATH):
+        curve_auc = roc_auc_score(labels, DriftCurve.load(main.CURVE_PATH).drift_probability(features[:, 0]))
+        line += f", relevant_ratio curve {curve_auc:.4f}"
+        assert auc >= curve_auc, "the multi-feature model separates drift worse than the curve"
+    print(line)
+
+
+def check_missing_inputs(model):
+    """Profiles without types, timestamps or a last visit still score by their activities."""
+    as_of = generate_dataset.AS_OF
+    hobbies = generate_dataset.IRRELEVANT_ACTIVITIES[:7]
+    skills = CAREER_SKILLS["Backend Developer"][:7]
+    dated = [as_of - timedelta(days=3)] * 7
+    cases = [
+        ("all irrelevant, no optional fields", main.DriftInput("Backend Developer", hobbies), True),
+        ("all irrelevant, typed and dated, no visit",
+         main.DriftInput("Backend Developer", hobbies, ["Project"] * 7, dated), True),
+        ("all relevant, no optional fields", main.DriftInput("Backend Developer", skills), False),
+    ]
+    features, _ = main.drift_features([drift_input for _, drift_input, _ in cases], as_of=as_of)
+    for (label, _, drifting), score in zip(cases, model.drift_probability(features)):
+        print(f"  {label}: drift score {score:.3f}")
+        assert (score > 0.5) == drifting, f"{label} scored {score:.3f}"
+
+
+def run():
+    model = DriftModel.load(main.DRIFT_MODEL_PATH, FEATURE_NAMES)
+    print(f"{main.DRIFT_MODEL_PATH}: {len(model.feature_names)} features, {model.metadata}")
+    check_latency(model)
+    check_quality(model)
+    check_missing_inputs(model)
+    print("SUCCESS: the drift model stays within its inference budget")
+
+
+if __name__ == "__main__":
+    try:
+        run()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,148 @@
+import random
+import sys
+import time
+
+# Renders 100k personalized audit emails (drift, inactivity and news) with the
+# Jinja2 templates, HTML and plain-text parts, next to the per-recipient
+# f-string bodies they replaced (HTML only, unescaped) for reference. Also
+# checks that user-controlled values are escaped in the HTML part.
+
+import main
+from email_templates import news_block
+
+NUM_EMAILS = 100_000
+# Staging one email in the outbox costs a few hundred microseconds; rendering
+# must stay well under that
+MAX_RENDER_SECONDS_PER_EMAIL = 100e-6
+NEWS = [
+    {"title": f"Story {i} <AI & Cloud>", "url": f"https://example.com/{i}?a=1&b=2", "description": "Today in tech"}
+    for i in range(3)
+]
+ACTIVITY_NAMES = ["React Hooks", "Cooking & Baking", "Figma UI Kit", "<script>alert(1)</script>"]
+
+
+def legacy_news(student_name, news_items):
+    # The old send_news_email body: the news block is rebuilt for every recipient
+    news_html = ""
+    for item in news_items:
+        news_html += f"""
+        <div style="margin-bottom: 20px; border-bottom: 1px solid #eee; padding-bottom: 10px;">
+            <h3 style="margin-bottom: 5px;"><a href="{item['url']}" style="color: #2980b9; text-decoration: none;">{item['title']}</a></h3>
+            <p style="margin: 0; font-size: 0.9em; color: #555;">{item['description']}</p>
+        </div>
+        """
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <h2 style="color: #2c3e50;">Hello {student_name},</h2>
+        <p>Stay ahead of the curve! Here are the latest updates from the tech world that might interest you on your journey:</p>
+        {news_html}
+        <p>Keep learning and stay curious!</p>
+        <hr style="border: 0; border-top: 1px solid #eee; margin: 20px 0;">
+        <p style="font-size: 0.8em; color: #95a5a6;">Best Regards,<br>The CareerCompass AI Team</p>
+    </body>
+    </html>
+    """
+
+
+def legacy_drift(student_name, career, drift_score, details):
+    quote = random.choice(main.MOTIVATIONAL_QUOTES)
+    details_html = "".join([f"<li>{d}</li>" for d in details])
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <h2 style="color: #2c3e50;">Hello {student_name},</h2>
+        <p>We've noticed you've been exploring a lot of different areas lately! While curiosity is great, we want to make sure you're still making progress toward your goal of becoming a <strong>{career}</strong>.</p>
+        <div style="background-color: #f8f9fa; padding: 15px; border-left: 5px solid #e74c3c; margin: 20px 0;">
+            <p style="margin: 0;"><strong>Drift Alert:</strong> Your current focus seems to be shifting away from {career} core skills.</p>
+            <p style="margin: 0; font-size: 0.9em; color: #7f8c8d;">Drift Probability: {drift_score:.1%}</p>
+        </div>
+        <p>Recently recorded activities that might be taking you off-course:</p>
+        <ul>
+            {details_html}
+        </ul>
+        <p style="font-style: italic; color: #2980b9; margin-top: 20px;">"{quote}"</p>
+        <p>Keep pushing! Small steps in the right direction lead to big results. Why not try a <strong>{career}</strong> related task today?</p>
+        <hr style="border: 0; border-top: 1px solid #eee; margin: 20px 0;">
+        <p style="font-size: 0.8em; color: #95a5a6;">Best Regards,<br>The CareerCompass AI Team</p>
+    </body>
+    </html>
+    """
+
+
+def legacy_inactivity(student_name, target_career):
+    quote = random.choice(main.MOTIVATIONAL_QUOTES)
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <h2 style="color: #2c3e50;">Hello {student_name},</h2>
+        <p>We haven't seen you at CareerCompass AI in a while! Consistency is key to mastering <strong>{target_career}</strong> skills.</p>
+        <div style="background-color: #e8f4fd; padding: 15px; border-left: 5px solid #3498db; margin: 20px 0;">
+            <p style="margin: 0;"><strong>Pro-Tip:</strong> Just 15 minutes of focused learning today can make a big difference.</p>
+        </div>
+        <p style="font-style: italic; color: #2980b9; margin-top: 20px;">"{quote}"</p>
+        <p>Ready to jump back in? We've got fresh news and insights waiting for you.</p>
+        <hr style="border: 0; border-top: 1px solid #eee; margin: 20px 0;">
+        <p style="font-size: 0.8em; color: #95a5a6;">Best Regards,<br>The CareerCompass AI Team</p>
+    </body>
+    </html>
+    """
+
+
+def recipients():
+    rng = random.Random(23)
+    careers = list(main.CAREER_SKILLS)
+    for i in range(NUM_EMAILS):
+        yield (i % 3, f"Student {i}", rng.choice(careers), rng.uniform(0.6, 1.0),
+               rng.sample(ACTIVITY_NAMES, 3))
+
+
+def timed(label, fn):
+    people = list(recipients())
+    start = time.perf_counter()
+    for kind, name, career, score, details in people:
+        fn(kind, name, career, score, details)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<46} {elapsed:6.2f}s  {elapsed / NUM_EMAILS * 1e6:5.1f} us/email")
+    return elapsed
+
+
+def legacy(kind, name, career, score, details):
+    if kind == 0:
+        return legacy_drift(name, career, score, details)
+    if kind == 1:
+        return legacy_inactivity(name, career)
+    return legacy_news(name, NEWS)
+
+
+def templated(kind, name, career, score, details):
+    if kind == 0:
+        return main.render_drift_email(name, career, score, details)
+    if kind == 1:
+        return main.render_inactivity_email(name, career)
+    return main.render_news_email(name, NEWS)
+
+
+def check_escaping():
+    drift = main.render_drift_email("Ann <b>", "Backend Developer", 0.75, ["<script>alert(1)</script>"])
+    assert "<script>" not in drift.html and "&lt;script&gt;alert(1)&lt;/script&gt;" in drift.html
+    assert "Ann &lt;b&gt;" in drift.html and "Ann <b>" in drift.text and "75.0%" in drift.text
+    news = main.render_news_email("Bob", [{"title": "<i>x</i>", "url": "javascript:alert(1)", "description": "d"}])
+    assert 'href="#"' in news.html and "&lt;i&gt;x&lt;/i&gt;" in news.html
+    assert news_block(NEWS) is news_block([dict(item) for item in NEWS]), "news block was re-rendered"
+
+
+def verify():
+    check_escaping()
+    print(f"Rendering {NUM_EMAILS} personalized emails (1/3 drift, 1/3 inactivity, 1/3 news):")
+    timed("f-strings (HTML only, unescaped)", legacy)
+    after = timed("Jinja2 templates (HTML + text, escaped)", templated)
+    assert after / NUM_EMAILS < MAX_RENDER_SECONDS_PER_EMAIL, f"{after / NUM_EMAILS * 1e6:.1f} us per email"
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
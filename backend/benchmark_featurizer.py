@@ -0,0 +1,110 @@
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from featurizer import CAREER_SKILLS, get_featurizer
+from skill_matcher import SkillMatcher
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml"))
+import generate_dataset
+
+# Times relevant_ratio extraction over a cohort three ways: the per-student
+# SkillMatcher loop predict_drift used, ml/train.py's exact-match join against
+# its own 3-career table, and the shared batched featurizer both now use.
+
+SIZES = [10_000, 100_000, 1_000_000]
+REPEATS = 3
+
+# ml/train.py's table before the featurizer; it only knew these three careers
+LEGACY_TRAIN_SKILLS = {
+    "Data Scientist": ["Python", "Pandas", "Scikit-Learn", "SQL", "Statistics", "TensorFlow", "Keras", "Tableau", "PowerBI"],
+    "Frontend Dev": ["React", "CSS", "HTML", "JavaScript", "Figma", "Redux", "Tailwind", "Next.js", "TypeScript"],
+    "Backend Dev": ["FastAPI", "Docker", "PostgreSQL", "System Design", "Go", "Redis", "Kafka", "Microservices", "Flask"]
+}
+NOISE_WORDS = ["Course", "Project", "Intro to", "Advanced", "Tutorial", "Bootcamp"]
+
+
+def legacy_serving_ratios(profiles, matcher):
+    """predict_drift's former per-student loop (relevance part), kept for comparison."""
+    ratios = []
+    for target, activity_names in profiles:
+        relevant_score = 0.0
+        for name in activity_names:
+            is_relevant, conflicting_careers = matcher.classify(name, target)
+            if is_relevant:
+                relevant_score += 1.0
+        ratios.append(relevant_score / len(activity_names))
+    return ratios
+
+
+def legacy_training_ratios(df):
+    """ml/train.py's former exact-match join and groupby, kept for comparison."""
+    keys = ["target_career", "activity_name"]
+    mapping = pd.DataFrame(
+        [(career, skill) for career, skills in LEGACY_TRAIN_SKILLS.items() for skill in skills], columns=keys
+    ).drop_duplicates().assign(relevant=True)
+    df = df[["student_id", "target_career", "activity_name"]].astype({k: "category" for k in keys})
+    known = np.logical_and.reduce([mapping[k].isin(df[k].cat.categories) for k in keys])
+    mapping = mapping[known].astype({k: df[k].dtype for k in keys})
+    df = df.merge(mapping, on=keys, how="left")
+    df["relevant"] = df["relevant"].notna()
+    stats = df.groupby("student_id").agg(relevant_count=("relevant", "sum"), activity_count=("relevant", "size"))
+    return (stats["relevant_count"] / stats["activity_count"]).to_numpy()
+
+
+def cohort(rows, rng):
+    """Activity rows of whole students, a third of them free-text names."""
+    df = generate_dataset.generate(int(rows / 7.5) + 1, seed=3).iloc[:rows]
+    names = df["activity_name"].astype(str).to_numpy(dtype=object)
+    for i in rng.sample(range(len(df)), len(df) // 3):
+        names[i] = f"{rng.choice(NOISE_WORDS)} {names[i]}"
+    return df.assign(activity_name=pd.Categorical(names))
+
+
+def best_of(fn):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def run():
+    rng = random.Random(5)
+    featurizer = get_featurizer(CAREER_SKILLS)
+    print(f"{'rows':>10} | {'serving loop':>14} | {'training join':>14} | {'featurizer':>14} | speedup vs loop / join")
+    for rows in SIZES:
+        df = cohort(rows, rng)
+        student_ids, groups = np.unique(df["student_id"].to_numpy(), return_inverse=True)
+        names = df["activity_name"].astype(str).tolist()
+        targets = df["target_career"].astype(str).tolist()
+        profiles = [(targets[start], names[start:start + count])
+                    for start, count in zip(*np.unique(groups, return_index=True, return_counts=True)[1:])]
+
+        def shared_path():
+            featurizer.matcher.matched_careers.cache_clear()
+            return featurizer.relevant_ratios(groups, df["activity_name"], df["target_career"], len(student_ids))
+
+        # Both matcher paths start with a cold per-name cache on every run
+        legacy_serve, serve_s = best_of(lambda: legacy_serving_ratios(profiles, SkillMatcher(CAREER_SKILLS)))
+        _, join_s = best_of(lambda: legacy_training_ratios(df))
+        shared, shared_s = best_of(shared_path)
+
+        assert np.array_equal(shared, np.array(legacy_serve)), "featurizer disagrees with the serving loop"
+        assert shared_s < serve_s and shared_s < join_s, "featurizer is not the fastest path"
+        print(f"{rows:>10,} | {serve_s * 1000:>11.1f} ms | {join_s * 1000:>11.1f} ms | {shared_s * 1000:>11.1f} ms"
+              f" | {serve_s / shared_s:5.1f}x / {join_s / shared_s:5.1f}x")
+    print("SUCCESS: the shared featurizer matches serving and beats both former paths")
+
+
+if __name__ == "__main__":
+    try:
+        run()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from aiosmtpd.controller import Controller
+
+# Measures /login latency while the SMTP server takes SMTP_DELAY seconds to
+# accept each message, and checks that repeated logins queue a single email.
+# Requires: pip install aiosmtpd uvicorn
+
+SMTP_HOST = "127.0.0.1"
+SMTP_PORT = 8026
+API_PORT = 8765
+BASE_URL = f"http://127.0.0.1:{API_PORT}"
+SMTP_DELAY = 1.0
+NUM_STUDENTS = 50
+
+tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'login_bench.db')}"
+
+import uvicorn  # noqa: E402
+import main  # noqa: E402
+from mailer import MailQueue, SmtpConnection, build_message  # noqa: E402
+from models import OutboxEmail  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+
+class SlowHandler:
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(SMTP_DELAY)
+        return "250 Message accepted for delivery"
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def report(label, timings):
+    print(f"  {label:<34} p50 {percentile(timings, 50) * 1000:7.1f} ms   "
+          f"p99 {percentile(timings, 99) * 1000:7.1f} ms")
+
+
+def blocking_send_time():
+    """What the old in-handler path paid: connect + send on every login."""
+    start = time.perf_counter()
+    connection = SmtpConnection(SMTP_HOST, SMTP_PORT, use_tls=False)
+    connection.send(build_message("noreply@example.com", "x@example.com", "Login", "<p>Hi</p>"))
+    connection.close()
+    return time.perf_counter() - start
+
+
+def run():
+    controller = Controller(SlowHandler(), hostname=SMTP_HOST, port=SMTP_PORT)
+    controller.start()
+    main.mail_queue = MailQueue(
+        main.engine,
+        lambda: SmtpConnection(SMTP_HOST, SMTP_PORT, use_tls=False),
+        from_addr="noreply@example.com",
+        workers=2,
+    )
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=API_PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        print(f"SMTP server delay: {SMTP_DELAY:.1f}s per message")
+        print(f"  {'blocking SMTP send (old path)':<34} {blocking_send_time() * 1000:7.1f} ms per email")
+
+        accounts = []
+        for i in range(NUM_STUDENTS):
+            account = {"email": f"bench{i}@example.com", "password": "password123"}
+            requests.post(f"{BASE_URL}/register", json={**account, "name": f"Bench {i}", "target_career": "Data Scientist"})
+            accounts.append(account)
+
+        timings = []
+        for account in accounts:
+            start = time.perf_counter()
+            resp = requests.post(f"{BASE_URL}/login", json=account)
+            timings.append(time.perf_counter() - start)
+            assert resp.status_code == 200, resp.text
+        report(f"/login, {NUM_STUDENTS} distinct students", timings)
+
+        timings = []
+        for _ in range(NUM_STUDENTS):
+            start = time.perf_counter()
+            requests.post(f"{BASE_URL}/login", json=accounts[0])
+            timings.append(time.perf_counter() - start)
+        report(f"/login, same student x{NUM_STUDENTS}", timings)
+
+        with Session(main.engine) as session:
+            login_emails = session.exec(
+                select(OutboxEmail)
+                .where(OutboxEmail.to_email == accounts[0]["email"])
+                .where(OutboxEmail.subject.startswith("Successful Login"))
+            ).all()
+        print(f"Login emails queued for the repeated student: {len(login_emails)}")
+        assert len(login_emails) == 1, "debounce should collapse repeated logins into one email"
+    finally:
+        server.should_exit = True
+        thread.join()
+        controller.stop()
+
+
+if __name__ == "__main__":
+    try:
+        run()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
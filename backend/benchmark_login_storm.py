@@ -0,0 +1,205 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+# Load test: /news and /students/{id} latency while a storm of concurrent
+# logins hashes passwords, with hashing in the dedicated low-priority worker
+# processes (PASSWORD_HASH_WORKERS, default cores - 1, at PASSWORD_HASH_NICE)
+# and with 40 workers at the app's own priority, the share of the CPU it could
+# take when /login hashed on the request threadpool. The budget holds down to
+# a single core (the reference box has one): the OS runs the event loop ahead
+# of the niced hashing. Also
+# checks that logins transparently rehash passwords stored with outdated
+# parameters, that a hash no installed scheme knows is a 401 rather than an
+# error, and that an overloaded hasher answers 503.
+# Requires: pip install uvicorn
+
+API_PORT = 8767
+BASE_URL = f"http://127.0.0.1:{API_PORT}"
+NUM_ACCOUNTS = 20
+STORM_CLIENTS = 64
+STORM_SECONDS = 6.0
+PROBE_INTERVAL = 0.02
+# The storm's 64 connections all open at once: that burst is the app's own
+# request handling, not hashing, so probes finished by then are reported apart
+RAMP_UP_SECONDS = 1.0
+# The probes may slow down under the storm, but not by more than this
+MAX_PROBE_P99_SECONDS = 0.15
+# An argon2 hash of "password123" with another salt: never matches, and
+# without argon2-cffi no installed scheme recognizes it
+ARGON2_HASH = "$argon2id$v=19$m=65536,t=3,p=4$c29tZXNhbHRzb21lc2FsdA$0TQ1JqLPt0bRQjSEQUlmhC1OE2dYpS3S7DyZUovu2Tg"
+
+tmp_dir = tempfile.mkdtemp()
+DB_PATH = os.path.join(tmp_dir, "login_storm.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def start_server(**env):
+    server_env = {
+        **os.environ,
+        "AUDIT_WORKERS": "0",
+        "AUDIT_SCHEDULE_ENABLED": "0",
+        "NEWS_FETCH_TIMEOUT": "0.5",
+        **env,
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(API_PORT), "--log-level", "warning"],
+        env=server_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"{BASE_URL}/news", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise AssertionError("server did not start")
+
+
+async def probe(client, stop, latencies):
+    """Alternates /news and /students/{id} until `stop` is set; records (latency, seconds in when it finished)."""
+    i = 0
+    began = time.perf_counter()
+    while not stop.is_set():
+        path = "/news" if i % 2 == 0 else f"/students/{i % NUM_ACCOUNTS + 1}"
+        start = time.perf_counter()
+        resp = await client.get(path)
+        end = time.perf_counter()
+        latencies.append((end - start, end - began))
+        assert resp.status_code == 200, (path, resp.status_code)
+        i += 1
+        await asyncio.sleep(PROBE_INTERVAL)
+
+
+async def login_loop(client, stop, index, results):
+    account = {"email": f"storm{index % NUM_ACCOUNTS}@example.com", "password": "password123"}
+    while not stop.is_set():
+        resp = await client.post("/login", json=account)
+        results.append(resp.status_code)
+
+
+async def measure(storm: bool):
+    limits = httpx.Limits(max_connections=STORM_CLIENTS + 4)
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=60, limits=limits) as client:
+        stop = asyncio.Event()
+        latencies, logins = [], []
+        tasks = [asyncio.create_task(probe(client, stop, latencies))]
+        if storm:
+            tasks += [asyncio.create_task(login_loop(client, stop, i, logins)) for i in range(STORM_CLIENTS)]
+        await asyncio.sleep(STORM_SECONDS if storm else 2.0)
+        stop.set()
+        await asyncio.gather(*tasks)
+    return latencies, logins
+
+
+def run_scenario(label, **env):
+    server = start_server(**env)
+    try:
+        idle, _ = asyncio.run(measure(storm=False))
+        probes, logins = asyncio.run(measure(storm=True))
+    finally:
+        server.terminate()
+        server.wait()
+    idle = [latency for latency, _ in idle]
+    ramp_up = [latency for latency, finished in probes if finished < RAMP_UP_SECONDS]
+    busy = [latency for latency, finished in probes if finished >= RAMP_UP_SECONDS]
+    ok = logins.count(200)
+    print(f"  {label}")
+    print(f"    probes idle:        p50 {percentile(idle, 50) * 1000:7.1f} ms   p99 {percentile(idle, 99) * 1000:7.1f} ms")
+    print(f"    probes under storm: p50 {percentile(busy, 50) * 1000:7.1f} ms   p99 {percentile(busy, 99) * 1000:7.1f} ms"
+          f"   ({len(busy)} probes; slowest in the first {RAMP_UP_SECONDS:.0f}s "
+          f"{max(ramp_up, default=0) * 1000:.0f} ms)")
+    print(f"    logins: {ok / STORM_SECONDS:.0f}/s ok, {logins.count(503)} shed with 503")
+    assert set(logins) <= {200, 503}, set(logins)
+    return percentile(busy, 99)
+
+
+def check_rehash_and_shedding():
+    from fastapi.testclient import TestClient
+    from sqlmodel import Session
+
+    import main
+    from models import Student
+    from passwords import PasswordHasher
+
+    account = {"email": "storm0@example.com", "password": "password123"}
+    with TestClient(main.app) as client, Session(main.engine) as session:
+        student_id = session.exec(main.select(Student.id).where(Student.email == account["email"])).one()
+        old_hash = session.get(Student, student_id).hashed_password
+        original = main.password_hasher
+        try:
+            for rounds in (40_000, 20_000):
+                if main.password_hasher is not original:
+                    main.password_hasher.shutdown()
+                main.password_hasher = PasswordHasher(rounds=rounds)
+                assert client.post("/login", json=account).status_code == 200
+                session.expire_all()
+                new_hash = session.get(Student, student_id).hashed_password
+                assert new_hash.startswith(f"$pbkdf2-sha256${rounds}$"), new_hash
+                # Already up to date: the next login leaves it alone
+                assert client.post("/login", json=account).status_code == 200
+                session.expire_all()
+                assert session.get(Student, student_id).hashed_password == new_hash
+            assert client.post("/login", json={**account, "password": "wrong"}).status_code == 401
+
+            # Stored by a scheme this deployment has no backend for (or corrupted): a failed login, not a 500
+            other = {"email": "storm1@example.com", "password": "password123"}
+            for foreign_hash in (ARGON2_HASH, "not-a-password-hash"):
+                session.exec(main.update(Student).where(Student.email == other["email"])
+                             .values(hashed_password=foreign_hash))
+                session.commit()
+                assert client.post("/login", json=other).status_code == 401, foreign_hash
+
+            main.password_hasher.shutdown()
+            main.password_hasher = PasswordHasher(max_pending=0)
+            resp = client.post("/login", json=account)
+            assert resp.status_code == 503 and resp.headers.get("Retry-After") == "1", resp.status_code
+        finally:
+            main.password_hasher.shutdown()
+            main.password_hasher = original
+    print(f"  rehashed on login: {old_hash.split('$')[2]} -> 40000 -> 20000 rounds; "
+          "unrecognized hashes answer 401; overload answers 503")
+
+
+def verify():
+    seed = start_server()
+    try:
+        for i in range(NUM_ACCOUNTS):
+            resp = httpx.post(f"{BASE_URL}/register", json={
+                "name": f"Storm {i}", "email": f"storm{i}@example.com",
+                "password": "password123", "target_career": "Data Scientist",
+            })
+            assert resp.status_code == 200, resp.text
+    finally:
+        seed.terminate()
+        seed.wait()
+
+    print(f"{STORM_CLIENTS} concurrent clients logging in for {STORM_SECONDS:.0f}s "
+          f"({os.cpu_count()} CPU core(s)):")
+    run_scenario("40 hashing workers at app priority (the request threadpool's share)",
+                 PASSWORD_HASH_WORKERS="40", PASSWORD_HASH_NICE="0")
+    p99 = run_scenario("dedicated low-priority hashing processes (default workers)")
+    assert p99 <= MAX_PROBE_P99_SECONDS, f"probe p99 {p99 * 1000:.0f} ms under the login storm"
+
+    print("Rehash and load shedding:")
+    check_rehash_and_shedding()
+    print("SUCCESS: other endpoints stay responsive during a login storm")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
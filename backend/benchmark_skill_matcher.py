@@ -0,0 +1,101 @@
+import random
+import re
+import time
+
+from main import CAREER_SKILLS, StudentProfile, ActivityInput, predict_drift
+from skill_matcher import SkillMatcher
+
+# Compares the precompiled SkillMatcher against the old per-skill regex loop
+# that predict_drift used to run, then times full predict_drift requests.
+
+SIZES = [10, 100, 1000]
+REPEATS = 20
+
+NOISE_WORDS = ["Course", "Project", "Intro to", "Advanced", "Tutorial", "Bootcamp", "Cooking", "Guitar", "Hiking"]
+
+
+def legacy_classify(activity_name, target):
+    """The original predict_drift matching logic, kept verbatim for comparison."""
+    relevant_skills = CAREER_SKILLS[target]
+    other_skills = {c: s for c, s in CAREER_SKILLS.items() if c != target}
+    act_name_lower = activity_name.lower()
+
+    def is_skill_in_text(skill, text):
+        skill = skill.lower()
+        pattern = rf"\b{re.escape(skill)}\b"
+        return bool(re.search(pattern, text))
+
+    for skill in relevant_skills:
+        if is_skill_in_text(skill, act_name_lower):
+            return True, ()
+
+    conflicting_careers = []
+    for career, skills in other_skills.items():
+        for skill in skills:
+            if is_skill_in_text(skill, act_name_lower):
+                conflicting_careers.append(career)
+                break
+    return False, tuple(conflicting_careers)
+
+
+def random_activity(rng):
+    skills = [s for skills in CAREER_SKILLS.values() for s in skills]
+    parts = [rng.choice(NOISE_WORDS)]
+    for _ in range(rng.randint(0, 2)):
+        parts.append(rng.choice(skills))
+    rng.shuffle(parts)
+    return " ".join(parts)
+
+
+def check_equivalence(rng, samples=5000):
+    matcher = SkillMatcher(CAREER_SKILLS)
+    names = [random_activity(rng) for _ in range(samples)]
+    # Edge cases around punctuation-only skills and shared prefixes
+    names += ["C# basics", "C++ templates", ".NET Core", "CI/CD pipelines", "React Native app",
+              "Reactive streams", "Goals", "Go routines", "R programming", "UI/UX", "Node.js API"]
+    mismatches = 0
+    for name in names:
+        for target in CAREER_SKILLS:
+            if legacy_classify(name, target) != matcher.classify(name, target):
+                mismatches += 1
+                print(f"MISMATCH: {name!r} / {target}")
+    print(f"Equivalence: {len(names) * len(CAREER_SKILLS)} checks, {mismatches} mismatches")
+    return mismatches == 0
+
+
+def bench(label, fn):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"  {label:<28} median {timings[len(timings) // 2] * 1000:8.3f} ms")
+
+
+def run():
+    rng = random.Random(42)
+    if not check_equivalence(rng):
+        raise SystemExit(1)
+
+    target = "Backend Developer"
+    for size in SIZES:
+        names = [random_activity(rng) for _ in range(size)]
+        profile = StudentProfile(
+            target_career=target,
+            recent_activities=[ActivityInput(name=n, category="Misc") for n in names]
+        )
+        print(f"\n{size} activities per request:")
+        bench("legacy per-skill regex", lambda: [legacy_classify(n, target) for n in names])
+
+        def fresh_matcher():
+            # Includes compiling the matcher and an empty per-name cache
+            matcher = SkillMatcher(CAREER_SKILLS)
+            return [matcher.classify(n, target) for n in names]
+
+        bench("SkillMatcher (compile+match)", fresh_matcher)
+        bench("predict_drift end-to-end", lambda: predict_drift(profile))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,124 @@
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel, Session
+
+from database import build_engine
+import models  # noqa: F401  (registers the tables on SQLModel.metadata)
+
+# Runs the same mixed read/write workload from many threads against the
+# legacy SQLite settings and the production profile (WAL + tuned pragmas).
+# Writes mirror /visit and /activities; reads mirror the dashboard load.
+
+THREADS = int(os.getenv("BENCH_THREADS", 16))
+OPS_PER_THREAD = int(os.getenv("BENCH_OPS", 300))
+WRITE_RATIO = 0.3
+NUM_STUDENTS = 1000
+SEED_ACTIVITIES = 20_000
+
+
+def seed(engine):
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(1)
+    with Session(engine) as session:
+        session.execute(
+            text("INSERT INTO student (id, name, email, hashed_password, target_career, current_drift_score, "
+                 "relevant_count, conflicting_count, irrelevant_count, drift_suggestions) "
+                 "VALUES (:id, :name, :email, '', 'Backend Developer', 0.0, 0, 0, 0, '[]')"),
+            [{"id": i, "name": f"Student {i}", "email": f"s{i}@example.com"} for i in range(1, NUM_STUDENTS + 1)],
+        )
+        session.execute(
+            text("INSERT INTO activity (student_id, name, category, type, timestamp) "
+                 "VALUES (:sid, 'SQL Joins', 'Data', 'Learning', :ts)"),
+            [{"sid": rng.randint(1, NUM_STUDENTS), "ts": datetime(2026, 1, 1)} for _ in range(SEED_ACTIVITIES)],
+        )
+        session.commit()
+
+
+def visit(session, student_id):
+    session.execute(text("UPDATE student SET last_visited_at = :now WHERE id = :id"),
+                    {"now": datetime.now(), "id": student_id})
+    session.commit()
+
+
+def add_activity(session, student_id):
+    session.execute(
+        text("INSERT INTO activity (student_id, name, category, type, timestamp) "
+             "VALUES (:sid, 'FastAPI Basics', 'Backend', 'Learning', :ts)"),
+        {"sid": student_id, "ts": datetime.now()},
+    )
+    session.commit()
+
+
+def dashboard(session, student_id):
+    session.execute(text("SELECT * FROM student WHERE id = :id"), {"id": student_id}).all()
+    session.execute(text("SELECT * FROM activity WHERE student_id = :id"), {"id": student_id}).all()
+    session.rollback()
+
+
+def worker(engine, seed_value, latencies, errors):
+    rng = random.Random(seed_value)
+    for _ in range(OPS_PER_THREAD):
+        student_id = rng.randint(1, NUM_STUDENTS)
+        if rng.random() < WRITE_RATIO:
+            op = visit if rng.random() < 0.5 else add_activity
+        else:
+            op = dashboard
+        start = time.perf_counter()
+        try:
+            with Session(engine) as session:
+                op(session, student_id)
+        except OperationalError:
+            errors.append(op.__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def run_profile(profile):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile=profile, echo=False)
+        seed(engine)
+        with engine.connect() as conn:
+            journal = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+            synchronous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+
+        latencies, errors = [], []
+        threads = [threading.Thread(target=worker, args=(engine, i, latencies, errors)) for i in range(THREADS)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] if latencies else float("nan")
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else float("nan")
+    print(f"{profile:<11} journal={journal:<7} synchronous={synchronous}  "
+          f"{len(latencies) / elapsed:8.0f} ops/s  p50 {p50 * 1000:6.2f} ms  p99 {p99 * 1000:7.2f} ms  "
+          f"lock errors {len(errors)}")
+    return len(latencies) / elapsed, errors
+
+
+def run():
+    print(f"{THREADS} threads x {OPS_PER_THREAD} ops, {WRITE_RATIO:.0%} writes\n")
+    legacy_rate, _ = run_profile("legacy")
+    production_rate, production_errors = run_profile("production")
+    print(f"\nSpeedup: {production_rate / legacy_rate:.1f}x")
+    assert not production_errors, f"production profile hit {len(production_errors)} lock errors"
+
+
+if __name__ == "__main__":
+    try:
+        run()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
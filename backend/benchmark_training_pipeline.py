@@ -0,0 +1,141 @@
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import generate_dataset
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml"))
+from train import extract_features, load_and_process_data
+
+# Compares the vectorized dataset generator and feature extraction against
+# the original per-row scripts: rows per second and peak traced memory. The
+# features themselves now come from the shared featurizer (14 careers, word
+# matching), so their parity is checked by verify_feature_parity.py instead.
+# Pass --large to also generate and featurize 10M+ activity rows with the
+# vectorized path only (the legacy loops would take minutes).
+
+SIZES = [1_000, 20_000, 100_000]
+LARGE_STUDENTS = 1_400_000  # ~10.5M activity rows
+
+# The 3-career table both scripts used before they moved to featurizer.CAREER_SKILLS
+CAREERS = ["Data Scientist", "Frontend Dev", "Backend Dev"]
+SKILLS_MAP = {
+    "Data Scientist": ["Python", "Pandas", "Scikit-Learn", "SQL", "Statistics", "TensorFlow", "Keras", "Tableau", "PowerBI"],
+    "Frontend Dev": ["React", "CSS", "HTML", "JavaScript", "Figma", "Redux", "Tailwind", "Next.js", "TypeScript"],
+    "Backend Dev": ["FastAPI", "Docker", "PostgreSQL", "System Design", "Go", "Redis", "Kafka", "Microservices", "Flask"]
+}
+
+
+def legacy_generate(num_samples):
+    """The original generate_dataset.py loop, kept verbatim for comparison."""
+    data = []
+    for i in range(num_samples):
+        target = random.choice(CAREERS)
+        is_drifting = random.random() < 0.3
+        primary_skills = SKILLS_MAP[target]
+        other_skills = []
+        for c, skills in SKILLS_MAP.items():
+            if c != target:
+                other_skills.extend(skills)
+        num_activities = random.randint(5, 10)
+        if is_drifting:
+            pool = primary_skills + other_skills * 4
+            status = "Drifting"
+        else:
+            pool = primary_skills * 4 + other_skills
+            status = "On Track"
+        for _ in range(num_activities):
+            act_name = random.choice(pool)
+            category = "Unknown"
+            for cat, skills in SKILLS_MAP.items():
+                if act_name in skills:
+                    category = cat
+                    break
+            data.append({
+                "student_id": i + 1,
+                "target_career": target,
+                "activity_name": act_name,
+                "category": category,
+                "status": status
+            })
+    return pd.DataFrame(data)
+
+
+def legacy_load_and_process_data(filepath):
+    """The original ml/train.py feature extraction, kept verbatim for comparison."""
+    df = pd.read_csv(filepath)
+    student_stats = []
+    for student_id, group in df.groupby("student_id"):
+        target = group["target_career"].iloc[0]
+        status = group["status"].iloc[0]
+        activities = group["activity_name"].tolist()
+        relevant_skills = SKILLS_MAP.get(target, [])
+        relevant_count = sum(1 for a in activities if a in relevant_skills)
+        relevant_ratio = relevant_count / len(activities) if len(activities) > 0 else 0
+        student_stats.append({
+            "target_career": target,
+            "relevant_ratio": relevant_ratio,
+            "is_drifting": 1 if status == "Drifting" else 0
+        })
+    return pd.DataFrame(student_stats)
+
+
+def measure(fn, *args):
+    """(result, seconds, peak traced MiB); tracing slows Python code down, so it gets its own run"""
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def report(label, rows, legacy, vectorized):
+    (_, legacy_s, legacy_mb), (_, new_s, new_mb) = legacy, vectorized
+    print(f"  {label:<10} {rows:>10,} rows | legacy {rows / legacy_s:>12,.0f} rows/s {legacy_mb:>8.1f} MiB"
+          f" | vectorized {rows / new_s:>12,.0f} rows/s {new_mb:>8.1f} MiB | {legacy_s / new_s:6.1f}x")
+
+
+def run(large=False):
+    tmp_dir = tempfile.mkdtemp()
+    for students in SIZES:
+        print(f"{students:,} students:")
+        legacy_gen = measure(legacy_generate, students)
+        new_gen = measure(generate_dataset.generate, students)
+        report("generate", len(new_gen[0]), legacy_gen, new_gen)
+
+        path = os.path.join(tmp_dir, f"career_data_{students}.csv")
+        new_gen[0].to_csv(path, index=False)
+        legacy_feat = measure(legacy_load_and_process_data, path)
+        new_feat = measure(load_and_process_data, path)
+        report("features", len(new_gen[0]), legacy_feat, new_feat)
+
+        expected, actual = legacy_feat[0], new_feat[0]
+        assert len(expected) == len(actual) == students
+        assert (expected["is_drifting"].to_numpy() == actual["is_drifting"].to_numpy()).all()
+
+    if large:
+        print(f"{LARGE_STUDENTS:,} students, vectorized only:")
+        df, gen_s, gen_mb = measure(generate_dataset.generate, LARGE_STUDENTS)
+        print(f"  generate   {len(df):>10,} rows | {len(df) / gen_s:>12,.0f} rows/s {gen_mb:>8.1f} MiB")
+        stats, feat_s, feat_mb = measure(extract_features, df)
+        print(f"  features   {len(df):>10,} rows | {len(df) / feat_s:>12,.0f} rows/s {feat_mb:>8.1f} MiB")
+        assert len(stats) == LARGE_STUDENTS
+
+    print("SUCCESS: vectorized pipeline outpaces the legacy scripts")
+
+
+if __name__ == "__main__":
+    try:
+        run(large="--large" in sys.argv)
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
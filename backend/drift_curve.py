@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+
+
+class DriftCurve:
+    """
+    Drift probability as a piecewise function of `relevant_ratio`, evaluated
+    with `np.interp`. It is exported from the trained forest by ml/train.py
+    and loading it needs only NumPy, not joblib or scikit-learn.
+
+    Exposes `predict_proba` with the same shape as the sklearn classifier so
+    it can be dropped in wherever the model is used.
+    """
+
+    def __init__(self, knots, drift_probs, metadata=None):
+        self.knots = np.asarray(knots, dtype=np.float64)
+        self.drift_probs = np.asarray(drift_probs, dtype=np.float64)
+        self.metadata = metadata or {}
+        if self.knots.ndim != 1 or self.knots.shape != self.drift_probs.shape:
+            raise ValueError("knots and drift_probs must be 1-D arrays of the same length")
+        if np.any(np.diff(self.knots) <= 0):
+            raise ValueError("knots must be strictly increasing")
+
+    @classmethod
+    def load(cls, path: str) -> "DriftCurve":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["knots"], data["drift_probs"], json.loads(str(data["metadata"])))
+
+    def save(self, path: str):
+        # np.savez appends .npz unless it is already there
+        np.savez(path, knots=self.knots, drift_probs=self.drift_probs, metadata=np.array(json.dumps(self.metadata)))
+
+    def drift_probability(self, ratios) -> np.ndarray:
+        # sklearn compares features as float32, so round the same way to land
+        # on the same side of every split
+        x = np.asarray(ratios, dtype=np.float32).astype(np.float64).ravel()
+        return np.interp(x, self.knots, self.drift_probs)
+
+    def predict_proba(self, X) -> np.ndarray:
+        drift = self.drift_probability(np.asarray(X)[:, 0])
+        return np.column_stack([1.0 - drift, drift])
+
+
+def curve_from_forest(forest) -> DriftCurve:
+    """
+    Exports a one-feature tree ensemble as an exact DriftCurve.
+
+    The ensemble is constant between split thresholds, and every split sends
+    `x <= t` left. So each threshold gets two knots: the largest float32
+    value <= t and the smallest float32 value > t. No float32 input falls
+    strictly between them, so interpolation reproduces the forest exactly.
+    """
+    thresholds = np.unique(np.concatenate([
+        estimator.tree_.threshold[estimator.tree_.feature == 0]
+        for estimator in forest.estimators_
+    ]))
+
+    knots = []
+    for t in thresholds:
+        below = np.float32(t)
+        if below > t:
+            below = np.nextafter(below, np.float32(-np.inf))
+        above = np.nextafter(below, np.float32(np.inf))
+        knots.extend([float(below), float(above)])
+    if not knots:
+        knots = [0.0, 1.0]
+
+    knots = np.array(knots, dtype=np.float64)
+    drift_probs = forest.predict_proba(knots.reshape(-1, 1).astype(np.float32))[:, 1]
+    metadata = {"source": type(forest).__name__, "thresholds": int(len(thresholds))}
+    return DriftCurve(knots, drift_probs, metadata)
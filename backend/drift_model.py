@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+
+# Inference budget for the multi-feature model, featurization included: scoring
+# 1,000 students (~7.5 activities each) from their raw activities must take at
+# most this long on one core. Most of it is turning request objects into
+# arrays; rescoring from stored sums (the audit) is ~1 ms per 1k.
+# benchmark_drift_model.py measures both.
+INFERENCE_BUDGET_MS_PER_1K = 20.0
+
+
+class DriftModel:
+    """
+    Standardized logistic regression over featurizer.FEATURE_NAMES, exported
+    by ml/train.py and evaluated as one matrix product, so scoring a whole
+    cohort is a single NumPy call and loading it needs neither joblib nor
+    scikit-learn.
+
+    Missing features (NaN, see Featurizer.features_from_sums) are imputed
+    with their training mean, so they add nothing to the logit and the other
+    features decide.
+
+    Exposes `predict_proba` with the same shape as the sklearn classifier.
+    """
+
+    def __init__(self, feature_names, mean, scale, coef, intercept, metadata=None):
+        self.feature_names = list(feature_names)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.metadata = metadata or {}
+        width = len(self.feature_names)
+        if not (self.mean.shape == self.scale.shape == self.coef.shape == (width,)):
+            raise ValueError("mean, scale and coef must have one entry per feature")
+        # Fold the standardization into the weights: one dot product per student
+        self._weights = self.coef / np.where(self.scale > 0, self.scale, 1.0)
+        self._bias = self.intercept - float(self.mean @ self._weights)
+
+    @property
+    def n_features_in_(self) -> int:
+        return len(self.feature_names)
+
+    @classmethod
+    def load(cls, path: str, feature_names=None) -> "DriftModel":
+        """Loads a saved model; with `feature_names`, refuses one trained on a different feature schema."""
+        with np.load(path, allow_pickle=False) as data:
+            model = cls(json.loads(str(data["feature_names"])), data["mean"], data["scale"], data["coef"],
+                        float(data["intercept"]), json.loads(str(data["metadata"])))
+        if feature_names is not None and model.feature_names != list(feature_names):
+            raise ValueError(f"{path} was trained on a different feature schema; retrain with ml/train.py")
+        return model
+
+    def save(self, path: str):
+        # np.savez appends .npz unless it is already there
+        np.savez(path, feature_names=np.array(json.dumps(self.feature_names)), mean=self.mean, scale=self.scale,
+                 coef=self.coef, intercept=np.array(self.intercept), metadata=np.array(json.dumps(self.metadata)))
+
+    def drift_probability(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.mean, X)
+        logits = X @ self._weights + self._bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def predict_proba(self, X) -> np.ndarray:
+        drift = self.drift_probability(X)
+        return np.column_stack([1.0 - drift, drift])
+
+
+def model_from_sklearn(scaler, classifier, feature_names, metadata=None) -> DriftModel:
+    """Exports a fitted StandardScaler + binary LogisticRegression pair as a DriftModel."""
+    return DriftModel(feature_names, scaler.mean_, scaler.scale_, classifier.coef_[0], classifier.intercept_[0],
+                      metadata)
@@ -0,0 +1,112 @@
+import os
+import threading
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+# Email bodies live in templates/email/<name>.html and <name>.txt as Jinja2
+# templates, e.g. "Hello {{ student_name }}," or "{{ drift_score|percent }}".
+# One Environment compiles each file once per process. Values are
+# HTML-escaped in .html templates (autoescape) unless wrapped in Safe. A
+# Fragment (e.g. the news block) carries both renderings of a shared section:
+# .html templates insert its html as-is, .txt templates its text.
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "email")
+
+
+class Safe(str):
+    """Markup that is already escaped and is inserted into HTML as-is."""
+
+    def __html__(self):
+        return self
+
+
+class Fragment(NamedTuple):
+    html: Safe
+    text: str
+
+    # Autoescaping .html templates insert __html__(); .txt templates insert str()
+    def __html__(self):
+        return self.html
+
+    def __str__(self):
+        return self.text
+
+
+def _percent(value: float) -> str:
+    return format(value, ".1%")
+
+
+_environment = None
+_environment_lock = threading.Lock()
+
+
+def get_environment():
+    """The shared Jinja2 Environment; jinja2 is only imported once an email is rendered."""
+    global _environment
+    if _environment is None:
+        with _environment_lock:
+            if _environment is None:
+                from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+                environment = Environment(
+                    loader=FileSystemLoader(TEMPLATE_DIR),
+                    autoescape=select_autoescape(["html"]),
+                    undefined=StrictUndefined,
+                    keep_trailing_newline=True,
+                    # Templates ship with the code: never stat them again once compiled
+                    auto_reload=False,
+                )
+                environment.filters["percent"] = _percent
+                _environment = environment
+    return _environment
+
+
+@lru_cache(maxsize=None)
+def get_template(filename: str):
+    """Compiled template for templates/email/<filename>, read from disk once per process."""
+    return get_environment().get_template(filename)
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    html: str
+    text: str
+    category: Optional[str] = None  # template name; the mail queue routes on it
+
+
+def render_email(name: str, subject: str, **context) -> RenderedEmail:
+    """Renders the HTML and plain-text parts of one email from <name>.html and <name>.txt."""
+    return RenderedEmail(
+        subject=subject,
+        html=get_template(f"{name}.html").render(context),
+        text=get_template(f"{name}.txt").render(context),
+        category=name,
+    )
+
+
+def render_items(name: str, items: Iterable[dict]) -> Fragment:
+    """Renders <name>.html/.txt once per item and joins the results into one Fragment."""
+    items = list(items)
+    html_part = get_template(f"{name}.html")
+    text_part = get_template(f"{name}.txt")
+    return Fragment(Safe("".join(html_part.render(item) for item in items)),
+                    "".join(text_part.render(item) for item in items))
+
+
+def safe_url(url: str) -> str:
+    """Only http(s) links make it into an href; anything else (javascript:, data:) becomes "#"."""
+    return url if url.lower().startswith(("http://", "https://")) else "#"
+
+
+@lru_cache(maxsize=16)
+def _news_block(items: Tuple[Tuple[str, str, str], ...]) -> Fragment:
+    return render_items("news_item", (
+        {"url": safe_url(url), "title": title, "description": description} for title, url, description in items
+    ))
+
+
+def news_block(news_items: List[dict]) -> Fragment:
+    """
+    The news section shared by every news email in a run: rendered once per
+    distinct set of stories and reused for each recipient.
+    """
+    return _news_block(tuple((item["title"], item["url"], item.get("description") or "") for item in news_items))
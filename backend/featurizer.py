@@ -0,0 +1,299 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+from skill_matcher import get_skill_matcher, skill_table_fingerprint
+
+# Drift features shared by serving (main.py) and training (ml/train.py), so the
+# model is trained on exactly the features it is served. NumPy is imported on
+# first use: `import main` stays cheap (see verify_startup_budget.py).
+
+CAREER_SKILLS = {
+    "Data Scientist": ["Python", "Pandas", "Scikit-Learn", "SQL", "Statistics", "TensorFlow", "Keras", "Tableau", "PowerBI", "Matplotlib", "Seaborn", "NumPy", "R", "Machine Learning", "Deep Learning", "Data Analysis", "Data Science", "Analytics", "Model", "Dataset", "Database", "PyTorch", "NLP"],
+    "Frontend Developer": ["React", "CSS", "HTML", "JavaScript", "Figma", "Redux", "Tailwind", "Next.js", "TypeScript", "Vue", "Angular", "Sass", "Web Design", "UI", "UX", "Frontend", "App", "Website", "Webpack"],
+    "Backend Developer": ["Python", "FastAPI", "SQL", "Docker", "PostgreSQL", "System Design", "Go", "Redis", "Kafka", "Microservices", "Flask", "Node.js", "Express", "MongoDB", "Django", "Kubernetes", "API", "Database", "Server", "Backend", "Java", "Spring", "Springboot", "C#", ".NET", "Ruby", "PHP", "AWS", "Rust", "C++"],
+    "DevOps Engineer": ["Docker", "Kubernetes", "Jenkins", "Ansible", "Terraform", "Cloud", "AWS", "Azure", "GCP", "CI/CD", "Linux", "Bash", "Monitoring", "Prometheus", "Grafana", "Nginx"],
+    "Full Stack Developer": ["React", "Node.js", "Express", "MongoDB", "SQL", "HTML", "CSS", "JavaScript", "API", "Database", "Frontend", "Backend", "Full Stack"],
+    "AI/ML Engineer": ["Python", "PyTorch", "TensorFlow", "Deep Learning", "Neural Networks", "NLP", "Computer Vision", "Pytorch", "Scikit-Learn", "Keras", "AI", "ML"],
+    "Data Analyst": ["SQL", "Excel", "Tableau", "PowerBI", "Python", "Pandas", "Statistics", "Data Visualization", "Cleaning", "Reporting", "Analysis"],
+    "Business Analyst": ["Requirements", "Agile", "Scrum", "User Stories", "Process Mapping", "SQL", "Stakeholder", "Business", "UML", "BPMN"],
+    "Cybersecurity Engineer": ["Security", "Networking", "Pentesting", "Encryption", "Firewall", "Vulnerability", "Ethical Hacking", "CEH", "CISSP", "SOC", "Compliance"],
+    "Cloud Engineer": ["AWS", "Azure", "Google Cloud", "Serverless", "S3", "EC2", "Cloud Computing", "Infrastructure", "PaaS", "IaaS", "SaaS"],
+    "Mobile Developer": ["React Native", "Flutter", "Swift", "Kotlin", "Java", "Android", "iOS", "Mobile App", "Expo", "Dart"],
+    "UI/UX Designer": ["Figma", "Adobe XD", "Sketch", "Prototyping", "User Experience", "User Interface", "Typography", "Color Theory", "Wireframing", "UI", "UX"],
+    "Database Administrator": ["PostgreSQL", "MySQL", "MongoDB", "Oracle", "Database Design", "SQL Tuning", "Backup", "Indexing", "DBA", "Query Optimization"],
+    "Game Developer": ["Unity", "Unreal Engine", "C#", "C++", "Shaders", "Game Design", "3D Modeling", "Physics Engine", "Blender", "OpenGL"]
+}
+
+
+# Multi-feature drift model inputs (see Featurizer.cohort_features)
+ACTIVITY_TYPES = ("Learning", "Project", "Coding")
+# An activity's recency weight halves every this many days. It weighs
+# recency_weighted_relevance, and activities_per_week is the decayed count.
+RECENCY_HALF_LIFE_DAYS = 30.0
+
+FEATURE_NAMES = (
+    ["relevant_ratio", "recency_weighted_relevance", "irrelevant_share"]
+    + [f"conflict:{career}" for career in CAREER_SKILLS]
+    + ["activities_per_week", "undated_share"]
+    + [f"type:{activity_type}" for activity_type in ACTIVITY_TYPES] + ["type:other"]
+    + ["log_days_since_visit", "visit_unknown"]
+)
+# Per-student sums the features are derived from. They add up across chunks of
+# activities, so training can featurize a dataset one chunk at a time, and the
+# two recency sums move to a later as_of with one multiplication (age_sums), so
+# main.py keeps them as a running per-student aggregate. Changing this list
+# needs a migration that resets drift_skills_version (see r0009).
+SUM_NAMES = (
+    ["activity_count", "relevant_count", "recency_weight", "recency_weighted_relevant", "irrelevant_count",
+     "dated_count"]
+    + [f"conflict_count:{career}" for career in CAREER_SKILLS]
+    + [f"type_count:{activity_type}" for activity_type in ACTIVITY_TYPES] + ["type_count:other"]
+)
+# Leading SUM_NAMES columns before the per-career conflict counts
+_BASE_SUMS = 6
+
+
+def _encode(values) -> Tuple[Sequence[int], List]:
+    """
+    (codes, uniques) for a sequence of labels. pandas Categoricals (or Series
+    of them) are used as-is; anything else is factorized with a dict, which
+    beats sorting strings for the heavily repeated names of a cohort.
+    """
+    cat = getattr(values, "cat", values)
+    if hasattr(cat, "codes") and hasattr(cat, "categories"):
+        return cat.codes, list(cat.categories)
+    # dict.fromkeys dedupes at C speed, keeping first-seen order
+    index: Dict[str, int] = dict.fromkeys(values)
+    for code, value in enumerate(index):
+        index[value] = code
+    return list(map(index.__getitem__, values)), list(index)
+
+
+def _days_before(as_of: datetime, timestamps):
+    """Days from each timestamp to `as_of` (NaN where missing)."""
+    import numpy as np
+
+    if isinstance(timestamps, (list, tuple)):
+        # NumPy converts datetime objects one by one, far slower than subtracting them here
+        day = timedelta(days=1)
+        return np.array([(as_of - t) / day if t is not None else np.nan for t in timestamps], dtype=np.float64)
+    return (np.datetime64(as_of, "us") - np.asarray(timestamps, dtype="datetime64[us]")) / np.timedelta64(1, "D")
+
+
+class Featurizer:
+    """
+    Batched drift features over flat arrays of (activity name, target career).
+
+    Activity names are matched with the shared SkillMatcher (one compiled
+    word-boundary regex per career) once per distinct name in the batch; the
+    per-row answer is then a NumPy gather from a names x careers membership
+    matrix. Rows with an unknown target career are never relevant.
+    """
+
+    def __init__(self, career_skills: Dict[str, List[str]]):
+        self.matcher = get_skill_matcher(career_skills)
+        self.fingerprint = self.matcher.fingerprint
+        self.version = self.matcher.version
+        self.careers = self.matcher.careers
+        self._career_index = {career: i for i, career in enumerate(self.careers)}
+
+    def membership(self, names: Sequence[str]):
+        """Boolean matrix: row i, column j is True when names[i] mentions a skill of careers[j]."""
+        import numpy as np
+
+        matrix = np.zeros((len(names), len(self.careers)), dtype=bool)
+        for i, name in enumerate(names):
+            if isinstance(name, str):
+                for career in self.matcher.matched_careers(name):
+                    matrix[i, self._career_index[career]] = True
+        return matrix
+
+    def _encoded_membership(self, names):
+        """
+        (per-row name codes, membership matrix of the distinct names). The
+        matrix has an extra all-False row for missing names (code -1) and an
+        all-False column for unknown careers.
+        """
+        import numpy as np
+
+        name_codes, unique_names = _encode(names)
+        matrix = np.zeros((len(unique_names) + 1, len(self.careers) + 1), dtype=bool)
+        matrix[:-1, :-1] = self.membership(unique_names)
+        return np.asarray(name_codes, dtype=np.int64), matrix
+
+    def _target_columns(self, targets):
+        import numpy as np
+
+        target_codes, unique_targets = _encode(targets)
+        # Unknown careers (and missing values, code -1) map to the always-False column
+        return np.array(
+            [self._career_index.get(t, len(self.careers)) for t in unique_targets] + [len(self.careers)],
+            dtype=np.int64,
+        )[np.asarray(target_codes, dtype=np.int64)]
+
+    def relevance(self, names, targets):
+        """Per row, whether names[i] is relevant to targets[i]."""
+        name_codes, matrix = self._encoded_membership(names)
+        return matrix[name_codes, self._target_columns(targets)]
+
+    def relevant_ratios(self, groups, names, targets, num_groups: int):
+        """relevant_ratio per group id in [0, num_groups), e.g. one group per student."""
+        return ratio_by_group(groups, self.relevance(names, targets), num_groups)
+
+    def activity_sums(self, groups, names, targets, types, timestamps, num_groups: int, as_of: datetime):
+        """
+        SUM_NAMES columns per group id in [0, num_groups), in one vectorized pass
+        over flat per-activity arrays. Activities without a timestamp add no
+        recency weight and are left out of dated_count; missing or unknown
+        types count as "other".
+        """
+        import numpy as np
+
+        groups = np.asarray(groups, dtype=np.int64)
+        name_codes, membership = self._encoded_membership(names)
+        matched = membership[name_codes, :-1]
+        relevant = membership[name_codes, self._target_columns(targets)]
+
+        ages = _days_before(as_of, timestamps)
+        dated = ~np.isnan(ages)
+        weights = np.where(dated, np.exp2(-np.clip(np.nan_to_num(ages), 0.0, None) / RECENCY_HALF_LIFE_DAYS), 0.0)
+
+        type_codes, unique_types = _encode(types)
+        type_columns = np.array(
+            [ACTIVITY_TYPES.index(t) if t in ACTIVITY_TYPES else len(ACTIVITY_TYPES) for t in unique_types]
+            + [len(ACTIVITY_TYPES)],
+            dtype=np.int64,
+        )[np.asarray(type_codes, dtype=np.int64)]
+
+        def per_group(values=None):
+            return np.bincount(groups, weights=values, minlength=num_groups).astype(np.float64)
+
+        conflicting = matched & ~relevant[:, None]
+        columns = [
+            per_group(),
+            per_group(relevant.astype(np.float64)),
+            per_group(weights),
+            per_group(weights * relevant),
+            per_group((~matched.any(axis=1)).astype(np.float64)),
+            per_group(dated.astype(np.float64)),
+        ]
+        columns += [per_group(conflicting[:, j].astype(np.float64)) for j in range(len(self.careers))]
+        type_counts = np.bincount(groups * (len(ACTIVITY_TYPES) + 1) + type_columns,
+                                  minlength=num_groups * (len(ACTIVITY_TYPES) + 1))
+        columns += list(type_counts.reshape(num_groups, len(ACTIVITY_TYPES) + 1).T.astype(np.float64))
+        return np.column_stack(columns)
+
+    def features_from_sums(self, sums, last_visited, as_of: datetime):
+        """
+        FEATURE_NAMES matrix from activity_sums rows and each group's last visit
+        (None if unknown). Features a group has no data for are NaN: the
+        recency features without any timestamp, the type mix without any known
+        type and the days since the last visit without one. The model imputes
+        them (DriftModel.drift_probability); undated_share, type:other and
+        visit_unknown say how much was missing.
+        """
+        import numpy as np
+
+        sums = np.asarray(sums, dtype=np.float64)
+        count = np.maximum(sums[:, 0], 1.0)
+        dated = sums[:, 5]
+        conflicts = sums[:, _BASE_SUMS:_BASE_SUMS + len(self.careers)]
+        types = sums[:, _BASE_SUMS + len(self.careers):]
+        typed = types[:, :-1].sum(axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            recency_weighted_relevance = np.where(dated > 0, sums[:, 3] / sums[:, 2], np.nan)
+            # A steady r activities/day accumulates a weight of r * half-life / ln 2;
+            # undated activities are assumed to come at the dated ones' rate
+            activities_per_week = np.where(
+                dated > 0, sums[:, 2] * (7 * np.log(2) / RECENCY_HALF_LIFE_DAYS) * sums[:, 0] / dated, np.nan
+            )
+            type_shares = np.where(typed[:, None] > 0, types[:, :-1] / typed[:, None], np.nan)
+
+        visit_days = _days_before(as_of, last_visited)
+        visit_unknown = np.isnan(visit_days)
+
+        return np.column_stack([
+            sums[:, 1] / count,
+            recency_weighted_relevance,
+            sums[:, 4] / count,
+            conflicts / count[:, None],
+            activities_per_week,
+            (sums[:, 0] - dated) / count,
+            type_shares,
+            types[:, -1] / count,
+            np.log1p(np.clip(visit_days, 0.0, None)),
+            visit_unknown.astype(np.float64),
+        ])
+
+    def projected_features(self, sums, last_visited, as_of: datetime, days: int):
+        """
+        features_from_sums as of each of the next `days` days, assuming no new
+        activities or visits: k days on, the recency sums have decayed by k
+        days and the last visit is k days older. Rows are day-major (every
+        group on day 1, then every group on day 2, ...).
+        """
+        import numpy as np
+
+        sums = np.asarray(sums, dtype=np.float64)
+        offsets = np.arange(1, days + 1)
+        aged = np.repeat(sums[None], days, axis=0)
+        aged[:, :, 2:4] *= np.exp2(-offsets / RECENCY_HALF_LIFE_DAYS)[:, None, None]
+        visits = np.array(list(last_visited), dtype="datetime64[us]")
+        shifted = visits[None, :] - offsets[:, None] * np.timedelta64(1, "D")
+        return self.features_from_sums(aged.reshape(-1, sums.shape[1]), shifted.ravel(), as_of)
+
+    def cohort_features(self, groups, names, targets, types, timestamps, num_groups: int,
+                        last_visited=None, as_of: datetime = None):
+        """
+        Fixed-width FEATURE_NAMES vector per group (usually one group per
+        student) from flat per-activity arrays. `last_visited` has one entry
+        per group; `as_of` defaults to now (UTC).
+        """
+        as_of = as_of or datetime.utcnow()
+        if last_visited is None:
+            last_visited = [None] * num_groups
+        sums = self.activity_sums(groups, names, targets, types, timestamps, num_groups, as_of)
+        return self.features_from_sums(sums, last_visited, as_of)
+
+
+def age_sums(sums, computed_at, as_of: datetime):
+    """
+    Moves activity_sums rows computed as of `computed_at` (one datetime per
+    row) forward to `as_of`: the recency sums decay, the counts do not.
+    """
+    import numpy as np
+
+    sums = np.array(sums, dtype=np.float64)
+    days = np.clip(np.nan_to_num(_days_before(as_of, computed_at), nan=0.0), 0.0, None)
+    decay = np.exp2(-days / RECENCY_HALF_LIFE_DAYS)
+    sums[:, 2:4] *= decay[:, None]
+    return sums
+
+
+def ratio_by_group(groups, relevant, num_groups: int):
+    """Share of True rows in `relevant` per group id; empty groups get 0."""
+    import numpy as np
+
+    groups = np.asarray(groups, dtype=np.int64)
+    hits = np.bincount(groups, weights=np.asarray(relevant, dtype=np.float64), minlength=num_groups)
+    totals = np.bincount(groups, minlength=num_groups)
+    return np.divide(hits, totals, out=np.zeros(num_groups), where=totals > 0)
+
+
+_featurizer = None
+_featurizer_lock = threading.Lock()
+
+
+def get_featurizer(career_skills: Dict[str, List[str]] = CAREER_SKILLS) -> Featurizer:
+    """Returns the shared featurizer, recompiling only if the skill table changed."""
+    global _featurizer
+    fingerprint = skill_table_fingerprint(career_skills)
+    featurizer = _featurizer
+    if featurizer is not None and featurizer.fingerprint == fingerprint:
+        return featurizer
+    with _featurizer_lock:
+        if _featurizer is None or _featurizer.fingerprint != fingerprint:
+            _featurizer = Featurizer(career_skills)
+        return _featurizer
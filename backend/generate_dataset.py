@@ -1,61 +1,179 @@
-import pandas as pd
-import random
+import argparse
 import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from featurizer import ACTIVITY_TYPES, CAREER_SKILLS
 
 # Configuration
 NUM_SAMPLES = 1000
-CAREERS = ["Data Scientist", "Frontend Dev", "Backend Dev"]
-SKILLS_MAP = {
-    "Data Scientist": ["Python", "Pandas", "Scikit-Learn", "SQL", "Statistics", "TensorFlow", "Keras", "Tableau", "PowerBI"],
-    "Frontend Dev": ["React", "CSS", "HTML", "JavaScript", "Figma", "Redux", "Tailwind", "Next.js", "TypeScript"],
-    "Backend Dev": ["FastAPI", "Docker", "PostgreSQL", "System Design", "Go", "Redis", "Kafka", "Microservices", "Flask"]
-}
-
-data = []
-
-for i in range(NUM_SAMPLES):
-    target = random.choice(CAREERS)
-    
-    # 70% chance of being successful (On Track), 30% Drifting
-    is_drifting = random.random() < 0.3
-    
-    primary_skills = SKILLS_MAP[target]
-    other_skills = []
-    for c, skills in SKILLS_MAP.items():
-        if c != target:
-            other_skills.extend(skills)
-            
-    # Generate 5-10 recent activities per student
-    num_activities = random.randint(5, 10)
-    student_activities = []
-    
-    if is_drifting:
-        # Mix of random skills, low relevance
-        pool = primary_skills + other_skills * 4 # Weighted towards irrelevant
-        status = "Drifting"
+SEED = 42
+OUTPUT_PATH = "ml/data/career_data.csv"
+# Parquet output is a directory of files partitioned by career (URL-encoded):
+# ml/data/career_data/target_career=Data%20Scientist/part-0-0.parquet, ...
+PARQUET_PATH = "ml/data/career_data"
+# Students generated per chunk; bounds memory for very large datasets
+CHUNK_STUDENTS = 250_000
+DRIFT_RATE = 0.3
+MIN_ACTIVITIES, MAX_ACTIVITIES = 5, 10
+# Share of a student's activities drawn from their own career's skills (the
+# rest come from every other skill): the mix the original 3-career dataset had
+PRIMARY_SHARE = {"On Track": 2 / 3, "Drifting": 1 / 9}
+# The careers and skills serving scores against, so training sees the same features
+CAREERS = list(CAREER_SKILLS)
+SKILLS_MAP = CAREER_SKILLS
+STATUSES = ["On Track", "Drifting"]
+# Timestamps are generated relative to this instant; train on the data "as of" it
+AS_OF = datetime(2026, 1, 1)
+# Per status: mean activity age and mean time since the last visit, in days,
+# and the Learning/Project/Coding mix. Drifting students are less active and
+# mostly consume courses, but the distributions overlap.
+MEAN_ACTIVITY_AGE_DAYS = {"On Track": 20.0, "Drifting": 45.0}
+MEAN_DAYS_SINCE_VISIT = {"On Track": 2.0, "Drifting": 6.0}
+TYPE_MIX = {"On Track": [0.4, 0.3, 0.3], "Drifting": [0.6, 0.2, 0.2]}
+# Share of activities that match no career at all, e.g. hobbies
+IRRELEVANT_SHARE = {"On Track": 0.05, "Drifting": 0.3}
+IRRELEVANT_ACTIVITIES = [
+    "Guitar Practice", "Cooking Class", "Gardening", "Yoga Session", "Photography Walk", "Watercolor Painting",
+    "Chess Puzzles", "Marathon Training", "Baking Bread", "Travel Vlog", "Knitting", "Pottery Workshop",
+]
+# Share of students whose activity types, activity timestamps or last visit
+# are unknown (each independently), as in older records and profiles sent
+# without them, so the model learns what their absence implies
+MISSING_RATE = {"type": 0.15, "timestamp": 0.15, "last_visited_at": 0.15}
+
+# Every skill once, and the career it belongs to (first one, if shared)
+SKILLS = list(dict.fromkeys(s for skills in SKILLS_MAP.values() for s in skills))
+CATEGORIES = CAREERS + ["Unknown"]
+SKILL_CATEGORY = np.array([
+    next((i for i, c in enumerate(CAREERS) if s in SKILLS_MAP[c]), len(CAREERS)) for s in SKILLS
+] + [len(CAREERS)] * len(IRRELEVANT_ACTIVITIES))
+ACTIVITY_NAMES = SKILLS + IRRELEVANT_ACTIVITIES
+
+
+def skill_cdf() -> np.ndarray:
+    """
+    Cumulative skill probabilities, one row per (career, status) pair at
+    row career * 2 + status, matching the weighted pools students draw from.
+    """
+    rows = []
+    for career in CAREERS:
+        primary = np.isin(SKILLS, SKILLS_MAP[career])
+        for status in STATUSES:
+            share = PRIMARY_SHARE[status]
+            weights = np.where(primary, share / primary.sum(), (1 - share) / (~primary).sum())
+            rows.append(np.cumsum(weights / weights.sum()))
+    cdf = np.array(rows)
+    cdf[:, -1] = 1.0
+    return cdf
+
+
+def generate_chunk(rng: np.random.Generator, first_id: int, num_students: int, cdf: np.ndarray,
+                   missing_rate: dict = MISSING_RATE) -> pd.DataFrame:
+    target = rng.integers(len(CAREERS), size=num_students)
+    drifting = (rng.random(num_students) < DRIFT_RATE).astype(np.int64)
+    counts = rng.integers(MIN_ACTIVITIES, MAX_ACTIVITIES + 1, size=num_students)
+
+    # One row per activity, then draw every skill with a single searchsorted:
+    # shifting row r's CDF (and its uniforms) by r keeps rows apart
+    row = np.repeat(target * len(STATUSES) + drifting, counts)
+    offsets = np.arange(len(cdf))[:, None]
+    skill = np.searchsorted((cdf + offsets).ravel(), rng.random(len(row)) + row, side="right")
+    skill -= row * cdf.shape[1]
+    np.minimum(skill, len(SKILLS) - 1, out=skill)
+
+    # Ages, types, last visits and irrelevant activities depend on each
+    # activity's (student's) status
+    status = np.repeat(drifting, counts)
+    irrelevant_share = np.array([IRRELEVANT_SHARE[s] for s in STATUSES])
+    irrelevant = rng.random(len(row)) < irrelevant_share[status]
+    skill[irrelevant] = len(SKILLS) + rng.integers(len(IRRELEVANT_ACTIVITIES), size=int(irrelevant.sum()))
+    mean_age = np.array([MEAN_ACTIVITY_AGE_DAYS[s] for s in STATUSES])
+    mean_visit = np.array([MEAN_DAYS_SINCE_VISIT[s] for s in STATUSES])
+    ages = rng.exponential(mean_age[status])
+    visits = rng.exponential(mean_visit[drifting])
+    type_cdf = np.cumsum([TYPE_MIX[s] for s in STATUSES], axis=1)
+    types = (rng.random(len(row))[:, None] > type_cdf[status]).sum(axis=1)
+    as_of = np.datetime64(AS_OF, "s")
+    missing = {column: np.repeat(rng.random(num_students) < missing_rate.get(column, 0.0), counts)
+               for column in MISSING_RATE}
+
+    return pd.DataFrame({
+        "student_id": np.repeat(np.arange(first_id, first_id + num_students), counts),
+        "target_career": pd.Categorical.from_codes(np.repeat(target, counts), CAREERS),
+        "activity_name": pd.Categorical.from_codes(skill, ACTIVITY_NAMES),
+        "category": pd.Categorical.from_codes(SKILL_CATEGORY[skill], CATEGORIES),
+        "type": pd.Categorical.from_codes(
+            np.where(missing["type"], -1, np.minimum(types, len(ACTIVITY_TYPES) - 1)), list(ACTIVITY_TYPES)
+        ),
+        "timestamp": np.where(missing["timestamp"], np.datetime64("NaT", "s"),
+                              as_of - (ages * 86400).astype("timedelta64[s]")),
+        "last_visited_at": np.where(missing["last_visited_at"], np.datetime64("NaT", "s"),
+                                    np.repeat(as_of - (visits * 86400).astype("timedelta64[s]"), counts)),
+        "status": pd.Categorical.from_codes(status, STATUSES),
+    })
+
+
+def generate_chunks(num_students: int = NUM_SAMPLES, seed: int = SEED, chunk_students: int = CHUNK_STUDENTS,
+                    missing_rate: dict = MISSING_RATE):
+    """
+    Yields the dataset as DataFrames of at most `chunk_students` students each.
+    Pass `missing_rate={}` for students with every optional column filled in.
+    """
+    rng = np.random.default_rng(seed)
+    cdf = skill_cdf()
+    for start in range(0, num_students, chunk_students):
+        yield generate_chunk(rng, start + 1, min(chunk_students, num_students - start), cdf, missing_rate)
+
+
+def generate(num_students: int = NUM_SAMPLES, seed: int = SEED, missing_rate: dict = MISSING_RATE) -> pd.DataFrame:
+    return pd.concat(generate_chunks(num_students, seed, missing_rate=missing_rate), ignore_index=True)
+
+
+def write_csv(path: str = OUTPUT_PATH, num_students: int = NUM_SAMPLES, seed: int = SEED) -> int:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    rows = 0
+    for i, chunk in enumerate(generate_chunks(num_students, seed)):
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        rows += len(chunk)
+    return rows
+
+
+def write_parquet(path: str = PARQUET_PATH, num_students: int = NUM_SAMPLES, seed: int = SEED) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow")
+
+    rows = 0
+    for i, chunk in enumerate(generate_chunks(num_students, seed)):
+        pq.write_to_dataset(
+            pa.Table.from_pandas(chunk, preserve_index=False),
+            path,
+            partition_cols=["target_career"],
+            basename_template=f"part-{i}-{{i}}.parquet",
+            # The first chunk replaces a previous run's files; later ones add to them
+            existing_data_behavior="delete_matching" if i == 0 else "overwrite_or_ignore",
+        )
+        rows += len(chunk)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic career activity dataset")
+    parser.add_argument("--students", type=int, default=NUM_SAMPLES)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output", help=f"default: {OUTPUT_PATH} (csv) or {PARQUET_PATH}/ (parquet)")
+    args = parser.parse_args()
+
+    if args.format == "parquet":
+        output = args.output or PARQUET_PATH
+        rows = write_parquet(output, args.students, args.seed)
     else:
-        # High relevance
-        pool = primary_skills * 4 + other_skills
-        status = "On Track"
-        
-    for _ in range(num_activities):
-        act_name = random.choice(pool)
-        # Determine category based on where the skill came from
-        category = "Unknown"
-        for cat, skills in SKILLS_MAP.items():
-            if act_name in skills:
-                category = cat
-                break
-        
-        data.append({
-            "student_id": i + 1,
-            "target_career": target,
-            "activity_name": act_name,
-            "category": category,
-            "status": status
-        })
-
-df = pd.DataFrame(data)
-os.makedirs("ml/data", exist_ok=True)
-df.to_csv("ml/data/career_data.csv", index=False)
-print(f"Generated {len(df)} activity records in ml/data/career_data.csv")
+        output = args.output or OUTPUT_PATH
+        rows = write_csv(output, args.students, args.seed)
+    print(f"Generated {rows} activity records in {output}")
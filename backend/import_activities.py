@@ -0,0 +1,60 @@
+import argparse
+import csv
+import sys
+import time
+
+from database import create_db_and_tables
+from main import ACTIVITY_IMPORT_BATCH_SIZE, import_activity_batch, new_import_report
+
+# Imports activities from an LMS export in CSV form, using the same
+# validation, batching and drift-aggregate updates as POST /activities/bulk.
+# Expected columns: student_id, name, category, type and optionally timestamp
+# (ISO 8601; blank means "now").
+#
+#   python import_activities.py learning_log.csv [--batch-size 5000]
+
+
+def read_rows(path):
+    """Yields (row_number, row) with blank cells dropped so defaults apply."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row_number, row in enumerate(csv.DictReader(f), start=1):
+            yield row_number, {key: value for key, value in row.items() if key and value not in ("", None)}
+
+
+def import_csv(path, batch_size=ACTIVITY_IMPORT_BATCH_SIZE, progress=True):
+    create_db_and_tables()
+    report = new_import_report()
+    start = time.perf_counter()
+    batch = []
+    for item in read_rows(path):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            import_activity_batch(batch, report)
+            batch = []
+            if progress:
+                rate = report["received"] / (time.perf_counter() - start)
+                print(f"  {report['received']} rows read, {report['inserted']} inserted ({rate:.0f} rows/s)")
+    if batch:
+        import_activity_batch(batch, report)
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import activities from a CSV file.")
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=ACTIVITY_IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    report = import_csv(args.path, args.batch_size)
+    print(f"Inserted {report['inserted']} of {report['received']} rows in {report['seconds']:.1f}s "
+          f"({report['received'] / max(report['seconds'], 1e-9):.0f} rows/s), {report['failed']} failed")
+    for error in report["errors"][:20]:
+        print(f"  row {error['row']}: {error['error']}")
+    if report["failed"] > 20:
+        print(f"  ... and {report['failed'] - 20} more")
+    sys.exit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
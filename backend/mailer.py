@@ -0,0 +1,380 @@
+import queue
+import smtplib
+import threading
+import uuid
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import and_, insert, or_, update
+from sqlmodel import Session, func, select
+
+from models import OutboxEmail
+
+
+class OutgoingEmail(NamedTuple):
+    """One outbox row as handed to a transport."""
+    outbox_id: int
+    from_addr: Optional[str]
+    to_email: str
+    subject: str
+    html_content: str
+    text_content: Optional[str] = None
+
+
+def build_message(from_addr: Optional[str], to_email: str, subject: str, html_content: str,
+                  text_content: Optional[str] = None) -> MIMEMultipart:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = from_addr or ""
+    msg["To"] = to_email
+    # Alternatives go in increasing order of preference: plain text, then HTML
+    if text_content:
+        msg.attach(MIMEText(text_content, "plain"))
+    msg.attach(MIMEText(html_content, "html"))
+    return msg
+
+
+class SmtpConnection:
+    """
+    One SMTP session that stays connected (and authenticated) across many
+    messages. It reconnects lazily after the server drops it.
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None,
+                 password: Optional[str] = None, use_tls: bool = True, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._server: Optional[smtplib.SMTP] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+
+    def send(self, msg: MIMEMultipart):
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Idle connections get dropped by the server; retry once on a fresh one
+            self._server = self._connect()
+            self._server.send_message(msg)
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+
+class SimulatedConnection:
+    """Used when SMTP credentials are missing: logs instead of sending."""
+
+    def send(self, msg: MIMEMultipart):
+        print("SMTP Credentials missing. Simulating email instead.")
+        print(f"To: {msg['To']}")
+        print(f"Subject: {msg['Subject']}")
+
+    def close(self):
+        pass
+
+
+class SmtpTransport:
+    """
+    Sends a batch message by message over one persistent SMTP connection (an
+    SmtpConnection or SimulatedConnection). Each mail worker owns one, so the
+    workers form a pool of long-lived SMTP sessions.
+    """
+
+    def __init__(self, connection, max_batch_size: int = 100):
+        self.connection = connection
+        self.max_batch_size = max_batch_size
+
+    def send_batch(self, messages: List[OutgoingEmail]) -> List[Optional[str]]:
+        errors = []
+        for message in messages:
+            try:
+                self.connection.send(build_message(message.from_addr, message.to_email, message.subject,
+                                                   message.html_content, message.text_content))
+                errors.append(None)
+            except Exception as e:
+                # Drop the connection so the next message starts from a clean session
+                self.connection.close()
+                errors.append(str(e))
+        return errors
+
+    def close(self):
+        self.connection.close()
+
+
+def as_transport(transport):
+    """Accepts a transport (with send_batch) or a bare connection (with send)."""
+    return transport if hasattr(transport, "send_batch") else SmtpTransport(transport)
+
+
+class MailQueue:
+    """
+    Background email delivery.
+
+    Messages are written to the `OutboxEmail` table first, so anything not yet
+    delivered survives a restart, and then handed to a pool of worker threads.
+    Workers take up to `batch_size` queued messages at a time and hand them to
+    a transport in batches of its `max_batch_size` (see transports.py): one
+    SMTP session per worker, or one API call per batch for a bulk provider.
+    `routes` maps an outbox category (e.g. "news") to its own transport
+    factory; everything else goes through `transport_factory`. Failed sends
+    are retried with exponential backoff until `max_attempts` is reached.
+
+    Several queues (one per app worker) may share an outbox. A worker claims
+    rows before sending them, in one conditional UPDATE that moves them from
+    "pending" to "sending" under its own lease token, and sends only the rows
+    it claimed. A row left "sending" by a worker that died mid-send can be
+    claimed again once its lease (`lease_seconds`) runs out.
+    """
+
+    def __init__(self, engine, transport_factory: Callable[[], object], from_addr: Optional[str] = None,
+                 workers: int = 2, max_attempts: int = 5, backoff_base: float = 30.0, poll_interval: float = 5.0,
+                 batch_size: int = 100, routes: Optional[Dict[str, Callable[[], object]]] = None,
+                 lease_seconds: float = 300):
+        self.engine = engine
+        self.transport_factory = transport_factory
+        self.routes = routes or {}
+        self.batch_size = batch_size
+        self.from_addr = from_addr
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+
+        self._queue: "queue.Queue[Optional[int]]" = queue.Queue()
+        self._queued = set()  # outbox ids currently sitting in the queue or being sent
+        self._queued_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"mail-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        # The poller also picks up whatever was left pending by a previous run
+        self._threads.append(threading.Thread(target=self._poll, name="mail-retry-poller", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        for _ in range(self.workers):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def enqueue(self, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None,
+                category: Optional[str] = None) -> int:
+        """Persists the message to the outbox and schedules it for delivery. Returns the outbox id."""
+        with Session(self.engine) as session:
+            outbox = OutboxEmail(to_email=to_email, subject=subject, html_content=html_content,
+                                 text_content=text_content, category=category)
+            session.add(outbox)
+            session.commit()
+            outbox_id = outbox.id
+        self._schedule(outbox_id)
+        return outbox_id
+
+    def stage(self, session: Session, to_email: str, subject: str, html_content: str,
+              text_content: Optional[str] = None, category: Optional[str] = None) -> OutboxEmail:
+        """
+        Adds the message to the outbox inside the caller's transaction, so it is
+        only sent if that transaction commits. Committed rows are picked up by
+        the poller, or straight away by `schedule_due()`.
+        """
+        outbox = OutboxEmail(to_email=to_email, subject=subject, html_content=html_content,
+                             text_content=text_content, category=category)
+        session.add(outbox)
+        return outbox
+
+    @staticmethod
+    def _claimable(now: datetime):
+        """Due pending rows, and rows whose sender's lease ran out."""
+        return or_(
+            and_(OutboxEmail.status == "pending", OutboxEmail.next_attempt_at <= now),
+            and_(OutboxEmail.status == "sending", OutboxEmail.lease_until < now),
+        )
+
+    def stage_many(self, session: Session, messages: List[dict]):
+        """
+        Like stage() for many messages (dicts of its keyword arguments), as one
+        multi-row INSERT in the caller's transaction. Unlike ORM rows, which
+        SQLite inserts one statement at a time to learn each new id, the rows
+        are not loaded back.
+        """
+        if not messages:
+            return
+        now = datetime.utcnow()
+        session.execute(insert(OutboxEmail), [
+            {"text_content": None, "category": None, **message,
+             "status": "pending", "attempts": 0, "next_attempt_at": now, "created_at": now}
+            for message in messages
+        ])
+
+    def schedule_due(self):
+        """Queues every message that is due for delivery, or whose delivery lease expired."""
+        with Session(self.engine) as session:
+            due = session.exec(
+                select(OutboxEmail.id).where(self._claimable(datetime.utcnow())).order_by(OutboxEmail.id)
+            ).all()
+        for outbox_id in due:
+            self._schedule(outbox_id)
+
+    def pending_count(self) -> int:
+        """Messages not delivered or given up on yet, including those being sent."""
+        with Session(self.engine) as session:
+            return session.exec(
+                select(func.count()).select_from(OutboxEmail).where(OutboxEmail.status.in_(("pending", "sending")))
+            ).one()
+
+    def _schedule(self, outbox_id: int):
+        with self._queued_lock:
+            if outbox_id in self._queued:
+                return
+            self._queued.add(outbox_id)
+        self._queue.put(outbox_id)
+
+    def _poll(self):
+        while not self._stop.is_set():
+            try:
+                self.schedule_due()
+            except Exception as e:
+                print(f"Mail outbox poll failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def _next_batch(self):
+        """Blocks for one queued id, then takes whatever else is ready, up to batch_size. Returns (ids, stop)."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                outbox_id = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if outbox_id is None:
+                return batch, True
+            batch.append(outbox_id)
+        return batch, False
+
+    def _work(self):
+        transports = {}  # route -> this worker's transport, created on first use
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    try:
+                        self._deliver(transports, batch)
+                    except Exception as e:
+                        print(f"Mail delivery batch failed: {e}")
+                    finally:
+                        with self._queued_lock:
+                            self._queued.difference_update(batch)
+                if stop:
+                    return
+        finally:
+            for transport in transports.values():
+                transport.close()
+
+    def _transport(self, transports: dict, route: Optional[str]):
+        if route not in transports:
+            factory = self.routes[route] if route is not None else self.transport_factory
+            transports[route] = as_transport(factory())
+        return transports[route]
+
+    def _claim(self, session: Session, outbox_ids: List[int]) -> List[OutboxEmail]:
+        """
+        Moves the claimable rows among `outbox_ids` to "sending" under a fresh
+        lease token and returns them. Another queue running the same UPDATE
+        finds them already claimed, so each row is sent by one worker.
+        """
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        claimed = session.execute(
+            update(OutboxEmail)
+            .where(OutboxEmail.id.in_(outbox_ids), self._claimable(now))
+            .values(status="sending", lease_owner=token, lease_until=now + timedelta(seconds=self.lease_seconds))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        session.commit()
+        if not claimed:
+            return []
+        return session.exec(
+            select(OutboxEmail).where(OutboxEmail.lease_owner == token, OutboxEmail.status == "sending")
+            .order_by(OutboxEmail.id)
+        ).all()
+
+    def _deliver(self, transports: dict, outbox_ids: List[int]):
+        with Session(self.engine) as session:
+            pending = self._claim(session, outbox_ids)
+            by_route: Dict[Optional[str], List[OutboxEmail]] = {}
+            for outbox in pending:
+                by_route.setdefault(outbox.category if outbox.category in self.routes else None, []).append(outbox)
+
+            for route, rows in by_route.items():
+                transport = self._transport(transports, route)
+                size = max(1, getattr(transport, "max_batch_size", len(rows)))
+                for start in range(0, len(rows), size):
+                    chunk = rows[start:start + size]
+                    messages = [
+                        OutgoingEmail(outbox.id, self.from_addr, outbox.to_email, outbox.subject,
+                                      outbox.html_content, outbox.text_content)
+                        for outbox in chunk
+                    ]
+                    try:
+                        errors = transport.send_batch(messages)
+                        log = True
+                    except Exception as e:
+                        # The whole call failed (connection refused, HTTP 5xx...): retry every message
+                        transport.close()
+                        error = str(e).splitlines()[0] if str(e) else repr(e)
+                        print(f"Failed to send a batch of {len(chunk)} emails, retrying: {error}")
+                        errors, log = [error] * len(chunk), False
+                    for outbox, error in zip(chunk, errors):
+                        self._record_attempt(outbox, error, log)
+                    session.add_all(chunk)
+                    # Commit per transport call, so a crash re-sends at most one batch
+                    session.commit()
+
+    def _record_attempt(self, outbox: OutboxEmail, error: Optional[str], log: bool = True):
+        outbox.attempts += 1
+        outbox.lease_owner = outbox.lease_until = None
+        if error is None:
+            outbox.status = "sent"
+            outbox.sent_at = datetime.utcnow()
+            print(f"Successfully sent email to {outbox.to_email}")
+            return
+        outbox.last_error = error
+        if outbox.attempts >= self.max_attempts:
+            outbox.status = "failed"
+            print(f"Giving up on email to {outbox.to_email} after {outbox.attempts} attempts: {error}")
+        else:
+            outbox.status = "pending"
+            delay = self.backoff_base * (2 ** (outbox.attempts - 1))
+            outbox.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            if log:
+                print(f"Failed to send email to {outbox.to_email} (attempt {outbox.attempts}), retrying in {delay:.0f}s: {error}")
@@ -1,34 +1,63 @@
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, BackgroundTasks, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
-from passlib.context import CryptContext
-import joblib
-import pandas as pd
+from pydantic import BaseModel, Field, ValidationError
 import os
-import requests
-import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
-from typing import List, Optional
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import json
+import base64
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from contextlib import asynccontextmanager
 
-from database import engine, Session, create_db_and_tables
-from models import Student, Activity
+from database import engine, async_engine, Session, AsyncSession, create_db_and_tables
+from models import Student, Activity, AuditShard
+from skill_matcher import get_skill_matcher
+from featurizer import CAREER_SKILLS, FEATURE_NAMES, SUM_NAMES, age_sums, get_featurizer
+from model_registry import ModelRegistry
+from mailer import MailQueue
+from transports import HttpBulkTransport, MaildirTransport, smtp_transport
+from news import NewsFeedCache, DEFAULT_FEEDS, parse_feeds
+from audit_jobs import AuditJobRunner, AuditScheduler
+from email_templates import RenderedEmail, news_block, render_email
+from passwords import HasherBusy, PasswordHasher, default_workers
 
-from sqlmodel import select
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm.attributes import flag_modified, set_committed_value
+from sqlmodel import select, or_, and_
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Create tables
     create_db_and_tables()
+    # Compile the skill matcher up front so the first request doesn't pay for it
+    get_featurizer(CAREER_SKILLS)
+    if MODEL_WARMUP:
+        get_model()
+    # Boot the password hashing processes before the first login needs them
+    password_hasher.start()
+    # Start background email delivery (also resumes anything left in the outbox)
+    mail_queue.start()
+    # Keep the news feed warm in the background
+    news_cache.start()
+    # Run queued audit jobs (and resume any interrupted by a restart)
+    audit_runner.start()
+    if AUDIT_SCHEDULE_ENABLED:
+        audit_scheduler.start()
     yield
-    # Shutdown logic (if any) could go here
+    # Shutdown: let mail workers finish their current message
+    password_hasher.shutdown()
+    audit_scheduler.stop()
+    audit_runner.stop()
+    news_cache.stop()
+    mail_queue.stop()
+    await async_engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -38,16 +67,97 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Load Model
+# The model is loaded on first use (or at startup with MODEL_WARMUP=1), so
+# importing this module stays cheap and workers that only serve /news or
+# /login never pay for it. The served model is the version promoted in the
+# model registry (see model_registry.py); drift_model.npz, then the legacy
+# one-feature curve and forest, are only used while nothing is promoted.
+DRIFT_MODEL_PATH = "drift_model.npz"
 MODEL_PATH = "drift_model.pkl"
-try:
-    model = joblib.load(MODEL_PATH)
-    print("Model loaded successfully.")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    model = None
+CURVE_PATH = "drift_curve.npz"
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "0") == "1"
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "drift_models")
+# How often each worker checks for a newly promoted (or rolled back) version
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", 10))
+
+model_registry = ModelRegistry(MODEL_REGISTRY_DIR)
+
+_model = None
+_model_version = None
+_model_error = None
+_model_checked_at = None
+_model_lock = threading.Lock()
+
+def load_model(version: Optional[str] = None):
+    """Loads a registry version, or the fallback files when `version` is None. Raises if it can't."""
+    if version is not None:
+        return model_registry.load(version, FEATURE_NAMES)
+    if os.path.exists(DRIFT_MODEL_PATH):
+        from drift_model import DriftModel
+        return DriftModel.load(DRIFT_MODEL_PATH, FEATURE_NAMES)
+    if os.path.exists(CURVE_PATH):
+        from drift_curve import DriftCurve
+        return DriftCurve.load(CURVE_PATH)
+    import joblib
+    return joblib.load(MODEL_PATH)
+
+def _refresh_model():
+    """Swaps in the promoted version if it changed; called with `_model_lock` held."""
+    global _model, _model_version, _model_error, _model_checked_at
+    _model_checked_at = time.monotonic()
+    version = None
+    try:
+        version = model_registry.current()
+        if _model is not None and version == _model_version:
+            return
+        loaded = load_model(version)
+    except Exception as e:
+        # Keep serving the model we have; the next check retries
+        error = f"{version or 'fallback model'}: {e}"
+        if error != _model_error:
+            print(f"Error loading model {error}")
+        _model_error = error
+        return
+    _model, _model_version, _model_error = loaded, version, None
+    print(f"Model {version or 'fallback'} loaded successfully.")
+
+def get_model():
+    """
+    Returns the drift model. Every MODEL_RELOAD_INTERVAL seconds one caller
+    checks the registry and loads a newly promoted version while the others
+    keep using the current model; only the very first load makes callers wait.
+    """
+    checked_at = _model_checked_at
+    if checked_at is None or time.monotonic() - checked_at >= MODEL_RELOAD_INTERVAL:
+        if _model_lock.acquire(blocking=_model is None):
+            try:
+                if _model_checked_at == checked_at:
+                    _refresh_model()
+            finally:
+                _model_lock.release()
+    return _model
+
+def require_model():
+    """get_model() for endpoints: a 500 that says why when no model could be loaded."""
+    model = get_model()
+    if not model:
+        raise HTTPException(status_code=500, detail=f"Model not loaded ({_model_error})")
+    return model
+
+@app.get("/model")
+def model_status():
+    """The model this worker serves and the registry's promoted version."""
+    get_model()
+    return {
+        "version": _model_version,
+        "promoted": model_registry.current(),
+        "metadata": getattr(_model, "metadata", None),
+        "error": _model_error,
+    }
 
 # --- News Integration ---
 NEWS_API_KEY = os.getenv("NEWS_API_KEY", "7b8f9e0a1c2d3e4f5g6h7i8j9k0l1m2n") # Placeholder or env var
@@ -61,95 +171,19 @@ class NewsItem(BaseModel):
     source: str
     category: str # "Tech", "Expert", "Update"
 
+NEWS_CACHE_TTL_SECONDS = float(os.getenv("NEWS_CACHE_TTL_SECONDS", 900))
+NEWS_FETCH_TIMEOUT = float(os.getenv("NEWS_FETCH_TIMEOUT", 5))
+# e.g. "TechCrunch|https://techcrunch.com/feed/;The Verge|https://www.theverge.com/rss/index.xml|3"
+NEWS_FEEDS = parse_feeds(os.getenv("NEWS_FEEDS", ""), NEWS_FETCH_TIMEOUT) or [
+    feed._replace(timeout=NEWS_FETCH_TIMEOUT) for feed in DEFAULT_FEEDS
+]
+
+news_cache = NewsFeedCache(NEWS_FEEDS, ttl=NEWS_CACHE_TTL_SECONDS)
+
 @app.get("/news", response_model=List[NewsItem])
 def get_tech_news():
-    news_list = []
-    
-    # 1. Fetch Live Tech News from TechCrunch RSS
-    try:
-        rss_url = "https://techcrunch.com/feed/"
-        response = requests.get(rss_url, timeout=5)
-        if response.status_code == 200:
-            root = ET.fromstring(response.content)
-            for item in root.findall(".//item")[:4]: # Get top 4 latest
-                title = item.find("title").text
-                link = item.find("link").text
-                pub_date = item.find("pubDate").text
-                description = item.find("description").text if item.find("description") is not None else ""
-                # Simple cleanup of HTML tags in description if needed
-                import re
-                clean_desc = re.sub('<[^<]+?>', '', description)[:150] + "..."
-                
-                news_list.append({
-                    "title": title,
-                    "description": clean_desc,
-                    "url": link,
-                    "urlToImage": "", # Will be assigned below
-                    "publishedAt": pub_date,
-                    "source": "TechCrunch",
-                    "category": "Tech"
-                })
-    except Exception as e:
-        print(f"RSS Fetch Error: {e}")
-
-    # 2. Add Verified Expert & Update Items (March 2026)
-    verified_news = [
-        {
-            "title": "OpenAI Launches GPT-5.4 with Native 'Computer Use'",
-            "description": "Released March 5, 2026, the new model can navigate UIs and execute multi-step workflows autonomously, outperforming human baselines in professional benchmarks.",
-            "url": "https://openai.com/news/gpt-5-4-announcement",
-            "urlToImage": "",
-            "publishedAt": "2026-03-05T09:00:00Z",
-            "source": "OpenAI Blog",
-            "category": "Expert"
-        },
-        {
-            "title": "Nvidia's Vera Rubin Platform Ships First Samples",
-            "description": "The new Rubin architecture, succeeding Blackwell, promises 5x faster AI workload performance with the NVL72 system. Production shipments expected in H2 2026.",
-            "url": "https://nvidianews.nvidia.com/news/rubin-architecture-update",
-            "urlToImage": "",
-            "publishedAt": "2026-03-08T11:00:00Z",
-            "source": "Nvidia News",
-            "category": "Update"
-        },
-        {
-            "title": "Apple MacBook Neo Debuts with A18 Pro for $599",
-            "description": "Apple disrupts the budget laptop market with the MacBook Neo. Powered by the A18 Pro chip, it brings premium AI capabilities to a more affordable price point.",
-            "url": "https://apple.com/macbook-neo",
-            "urlToImage": "",
-            "publishedAt": "2026-03-04T15:00:00Z",
-            "source": "Apple Newsroom",
-            "category": "Update"
-        },
-        {
-            "title": "The Rise of 'Agentic AI' in Enterprise Workflows",
-            "description": "Gartner reports that 40% of enterprise apps will feature task-specific AI agents by the end of 2026, shifting focus from tools to autonomous agents.",
-            "url": "https://gartner.com/news/agentic-ai-2026",
-            "urlToImage": "",
-            "publishedAt": "2026-03-07T10:30:00Z",
-            "source": "Gartner",
-            "category": "Expert"
-        }
-    ]
-    
-    # 3. Final deterministic unique image assignment for 8 items
-    all_news = news_list + verified_news
-    master_ids = [
-        "1518770660439-4636190af475", # Circuits
-        "1550751827-4bd374c3f58b", # Mesh
-        "1485827404703-89b55fcc595e", # Robot
-        "1531297484001-80022131f5a1", # Workspace
-        "1451187580459-43490279c0fa", # Globe
-        "1581091226825-a6a2a5aee158", # Hardware
-        "1677442136019-21780ecad995", # AI Brain
-        "1496181133206-80ce9b88a853"  # MacBook
-    ]
-    
-    for i, item in enumerate(all_news):
-        if i < len(master_ids):
-            item["urlToImage"] = f"https://images.unsplash.com/photo-{master_ids[i]}?w=600&q=80"
-            
-    return all_news[:len(master_ids)]
+    # Served from memory; the feed is refreshed in the background
+    return news_cache.get()
 
 # --- Email & Motivation System ---
 
@@ -168,278 +202,497 @@ SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 SMTP_EMAIL = os.getenv("SMTP_EMAIL")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 
-def send_email_via_smtp(to_email: str, subject: str, html_content: str) -> bool:
-    """Helper to send an actual email via SMTP."""
-    if not SMTP_EMAIL or not SMTP_PASSWORD:
-        print("SMTP Credentials missing. Simulating email instead.")
-        print(f"To: {to_email}")
-        print(f"Subject: {subject}")
+MAIL_WORKERS = int(os.getenv("MAIL_WORKERS", 2))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", 5))
+MAIL_RETRY_BASE_SECONDS = float(os.getenv("MAIL_RETRY_BASE_SECONDS", 30))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", 100))
+
+# Transports: "smtp" (default), "maildir" (local sink under MAIL_MAILDIR) or
+# "http" (bulk provider at MAIL_HTTP_URL). MAIL_NEWS_TRANSPORT sends the
+# high-volume news digests through a different one, e.g. "http".
+MAIL_TRANSPORTS = ("smtp", "maildir", "http")
+MAIL_TRANSPORT = os.getenv("MAIL_TRANSPORT", "smtp")
+MAIL_NEWS_TRANSPORT = os.getenv("MAIL_NEWS_TRANSPORT") or None
+MAIL_MAILDIR = os.getenv("MAIL_MAILDIR", "outbox_maildir")
+MAIL_HTTP_URL = os.getenv("MAIL_HTTP_URL")
+MAIL_HTTP_API_KEY = os.getenv("MAIL_HTTP_API_KEY")
+MAIL_HTTP_BATCH_SIZE = int(os.getenv("MAIL_HTTP_BATCH_SIZE", 500))
+
+for _transport in (MAIL_TRANSPORT, MAIL_NEWS_TRANSPORT):
+    if _transport is not None and _transport not in MAIL_TRANSPORTS:
+        raise ValueError(f"Unknown mail transport {_transport!r}, expected one of {MAIL_TRANSPORTS}")
+    if _transport == "http" and not MAIL_HTTP_URL:
+        raise ValueError("MAIL_HTTP_URL is required for the http mail transport")
+
+def make_mail_transport(kind: str):
+    if kind == "maildir":
+        return MaildirTransport(MAIL_MAILDIR, max_batch_size=MAIL_BATCH_SIZE)
+    if kind == "http":
+        return HttpBulkTransport(MAIL_HTTP_URL, MAIL_HTTP_API_KEY, max_batch_size=MAIL_HTTP_BATCH_SIZE)
+    return smtp_transport(SMTP_SERVER, SMTP_PORT, SMTP_EMAIL, SMTP_PASSWORD, max_batch_size=MAIL_BATCH_SIZE)
+
+mail_queue = MailQueue(
+    engine,
+    lambda: make_mail_transport(MAIL_TRANSPORT),
+    from_addr=SMTP_EMAIL,
+    workers=MAIL_WORKERS,
+    max_attempts=MAIL_MAX_ATTEMPTS,
+    backoff_base=MAIL_RETRY_BASE_SECONDS,
+    batch_size=max(MAIL_BATCH_SIZE, MAIL_HTTP_BATCH_SIZE if "http" in (MAIL_TRANSPORT, MAIL_NEWS_TRANSPORT) else 0),
+    routes={"news": lambda: make_mail_transport(MAIL_NEWS_TRANSPORT)} if MAIL_NEWS_TRANSPORT else None,
+)
+
+def queue_email(to_email: str, subject: str, html_content: str, session: Optional[Session] = None,
+                text_content: Optional[str] = None, category: Optional[str] = None) -> bool:
+    """
+    Hands an email to the background delivery queue.
+    The message is stored in the outbox before this returns, so True means
+    "accepted for delivery"; the SMTP round trip happens on a mail worker.
+    With a `session`, the outbox row joins that transaction and is only sent
+    if it commits. `text_content` becomes the text/plain alternative part;
+    `category` (the template name) picks the transport route.
+    """
+    try:
+        if session is not None:
+            mail_queue.stage(session, to_email, subject, html_content, text_content, category)
+        else:
+            mail_queue.enqueue(to_email, subject, html_content, text_content, category)
         return True
-        
+    except Exception as e:
+        print(f"Failed to queue email to {to_email}: {e}")
+        return False
+
+def queue_rendered_email(email: str, rendered: RenderedEmail, session: Optional[Session] = None) -> bool:
+    return queue_email(email, rendered.subject, rendered.html, session, text_content=rendered.text,
+                       category=rendered.category)
+
+def render_drift_email(student_name: str, career: str, drift_score: float, details: List[str]) -> RenderedEmail:
+    return render_email(
+        "drift",
+        subject=f"Stay on track, {student_name}! Your {career} Journey Needs You",
+        student_name=student_name,
+        career=career,
+        drift_score=drift_score,
+        # Activity names are user input: escaped like every other value
+        details=details,
+        quote=random.choice(MOTIVATIONAL_QUOTES),
+    )
+
+def render_news_email(student_name: str, news_items: List[dict]) -> RenderedEmail:
+    return render_email(
+        "news",
+        subject=f"Stay Updated, {student_name}! New Tech News for you",
+        student_name=student_name,
+        # Same stories for everyone in a run: rendered once, reused per recipient
+        news=news_block(news_items),
+    )
+
+def render_inactivity_email(student_name: str, target_career: str) -> RenderedEmail:
+    return render_email(
+        "inactivity",
+        subject=f"We miss you, {student_name}! Don't lose your leads",
+        student_name=student_name,
+        target_career=target_career,
+        quote=random.choice(MOTIVATIONAL_QUOTES),
+    )
+
+def stage_emails(session: Session, emails: List[tuple]) -> bool:
+    """
+    Stages (address, RenderedEmail) pairs in `session` with one INSERT, so
+    they are only sent if it commits. False if they could not be queued.
+    """
     try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = SMTP_EMAIL
-        msg["To"] = to_email
-        
-        part = MIMEText(html_content, "html")
-        msg.attach(part)
-        
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_EMAIL, SMTP_PASSWORD)
-            server.send_message(msg)
-            
-        print(f"Successfully sent email to {to_email}")
+        mail_queue.stage_many(session, [
+            {"to_email": address, "subject": rendered.subject, "html_content": rendered.html,
+             "text_content": rendered.text, "category": rendered.category}
+            for address, rendered in emails
+        ])
         return True
     except Exception as e:
-        print(f"Failed to send email to {to_email}: {e}")
+        print(f"Failed to queue {len(emails)} emails: {e}")
         return False
 
-def send_drift_email(student_name: str, email: str, career: str, drift_score: float, details: List[str]):
-    """
-    Sends a motivational email to a drifting student.
-    Note: For production, SMTP credentials should be set in environment variables.
-    """
-    import random
-    quote = random.choice(MOTIVATIONAL_QUOTES)
-    
-    subject = f"Stay on track, {student_name}! Your {career} Journey Needs You"
-    
-    # Construct details string
-    details_html = "".join([f"<li>{d}</li>" for d in details])
-    
-    body_html = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <h2 style="color: #2c3e50;">Hello {student_name},</h2>
-        <p>We've noticed you've been exploring a lot of different areas lately! While curiosity is great, we want to make sure you're still making progress toward your goal of becoming a <strong>{career}</strong>.</p>
-        
-        <div style="background-color: #f8f9fa; padding: 15px; border-left: 5px solid #e74c3c; margin: 20px 0;">
-            <p style="margin: 0;"><strong>Drift Alert:</strong> Your current focus seems to be shifting away from {career} core skills.</p>
-            <p style="margin: 0; font-size: 0.9em; color: #7f8c8d;">Drift Probability: {drift_score:.1%}</p>
-        </div>
+def send_signup_email(student_name: str, email: str, target_career: str):
+    """
+    Sends a welcome email upon registration.
+    """
+    return queue_rendered_email(email, render_email(
+        "signup",
+        subject=f"Welcome to CareerCompass AI, {student_name}!",
+        student_name=student_name,
+        target_career=target_career,
+    ))
 
-        <p>Recently recorded activities that might be taking you off-course:</p>
-        <ul>
-            {details_html}
-        </ul>
+LOGIN_EMAIL_DEBOUNCE_SECONDS = int(os.getenv("LOGIN_EMAIL_DEBOUNCE_SECONDS", 600))
 
-        <p style="font-style: italic; color: #2980b9; margin-top: 20px;">"{quote}"</p>
+async def claim_login_email(session: AsyncSession, student_id: int) -> bool:
+    """
+    Per-student debounce so a burst of logins queues a single email: stamps
+    last_login_email_at with one conditional UPDATE, unless it is within the
+    window. The database row decides, so concurrent logins on any worker
+    claim it at most once. Takes effect when `session` commits.
+    """
+    now = datetime.utcnow()
+    result = await session.execute(
+        update(Student)
+        .where(Student.id == student_id, or_(
+            Student.last_login_email_at.is_(None),
+            Student.last_login_email_at < now - timedelta(seconds=LOGIN_EMAIL_DEBOUNCE_SECONDS),
+        ))
+        .values(last_login_email_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
 
-        <p>Keep pushing! Small steps in the right direction lead to big results. Why not try a <strong>{career}</strong> related task today?</p>
-        
-        <hr style="border: 0; border-top: 1px solid #eee; margin: 20px 0;">
-        <p style="font-size: 0.8em; color: #95a5a6;">Best Regards,<br>The CareerCompass AI Team</p>
-    </body>
-    </html>
+def send_login_email(student_name: str, email: str, target_career: str):
     """
+    Sends a welcome email upon successful login.
+    """
+    return queue_rendered_email(email, render_email(
+        "login",
+        subject=f"Successful Login to CareerCompass AI, {student_name}!",
+        student_name=student_name,
+        target_career=target_career,
+    ))
 
-    return send_email_via_smtp(email, subject, body_html)
+# Students per audit write transaction: each chunk commits with its emails
+AUDIT_CHUNK_SIZE = 1000
+# Students per audit shard, the unit handed to a worker process
+AUDIT_SHARD_SIZE = int(os.getenv("AUDIT_SHARD_SIZE", 5000))
+# SQLite has a single writer, so extra processes only queue on its lock: run
+# shards in-process there unless AUDIT_WORKERS says otherwise
+AUDIT_WORKERS = int(os.getenv("AUDIT_WORKERS", 0 if engine.dialect.name == "sqlite" else min(4, os.cpu_count() or 1)))
+# Attempts per shard on a transient database error (e.g. "database is
+# locked"), AUDIT_RETRY_BACKOFF_SECONDS apart, doubling each time
+AUDIT_SHARD_ATTEMPTS = int(os.getenv("AUDIT_SHARD_ATTEMPTS", 5))
+AUDIT_RETRY_BACKOFF_SECONDS = float(os.getenv("AUDIT_RETRY_BACKOFF_SECONDS", 0.5))
+# Built-in schedule: every AUDIT_SCHEDULE_INTERVAL_MINUTES starting at
+# AUDIT_SCHEDULE_AT (UTC), fired at a random point in the first
+# AUDIT_SCHEDULE_JITTER_SECONDS. Only one app worker runs each window.
+AUDIT_SCHEDULE_ENABLED = os.getenv("AUDIT_SCHEDULE_ENABLED", "1") == "1"
+AUDIT_SCHEDULE_INTERVAL_MINUTES = float(os.getenv("AUDIT_SCHEDULE_INTERVAL_MINUTES", 24 * 60))
+AUDIT_SCHEDULE_AT = os.getenv("AUDIT_SCHEDULE_AT", "09:00")
+AUDIT_SCHEDULE_JITTER_SECONDS = float(os.getenv("AUDIT_SCHEDULE_JITTER_SECONDS", 300))
+AUDIT_LEASE_SECONDS = float(os.getenv("AUDIT_LEASE_SECONDS", 300))
+EMAIL_COOLDOWN = timedelta(hours=24)
+DRIFT_EMAIL_THRESHOLD = 0.6
+DRIFT_MIN_ACTIVITIES = 3
+# How far ahead each score update projects when the score, left to age,
+# would pass DRIFT_EMAIL_THRESHOLD (see _update_drift_scores)
+DRIFT_PROJECTION_DAYS = 60
+INACTIVITY_THRESHOLD = timedelta(hours=24)
 
-def send_news_email(student_name: str, email: str, news_items: List[dict]):
+def claim_email_slots(session: Session, students: List[Student], column: str) -> Dict[int, Optional[datetime]]:
     """
-    Sends a tech news update email.
+    Stamps `column` ("last_emailed_at" or "last_news_sent_at") with now for
+    the students that are out of cooldown in the database, as one conditional
+    UPDATE ... RETURNING. The in-memory students may be stale (another audit
+    may have emailed them since they were loaded), so this, not the Python
+    check, decides who gets an email: of two overlapping audits only one
+    claims each student. Returns {student id: previous stamp} for the claimed.
     """
-    subject = f"Stay Updated, {student_name}! New Tech News for you"
-    
-    news_html = ""
-    for item in news_items:
-        news_html += f"""
-        <div style="margin-bottom: 20px; border-bottom: 1px solid #eee; padding-bottom: 10px;">
-            <h3 style="margin-bottom: 5px;"><a href="{item['url']}" style="color: #2980b9; text-decoration: none;">{item['title']}</a></h3>
-            <p style="margin: 0; font-size: 0.9em; color: #555;">{item['description']}</p>
-        </div>
-        """
-        
-    body_html = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <h2 style="color: #2c3e50;">Hello {student_name},</h2>
-        <p>Stay ahead of the curve! Here are the latest updates from the tech world that might interest you on your journey:</p>
-        
-        {news_html}
-        
-        <p>Keep learning and stay curious!</p>
-        <hr style="border: 0; border-top: 1px solid #eee; margin: 20px 0;">
-        <p style="font-size: 0.8em; color: #95a5a6;">Best Regards,<br>The CareerCompass AI Team</p>
-    </body>
-    </html>
-    """
-    
-    return send_email_via_smtp(email, subject, body_html)
-
-def send_inactivity_email(student_name: str, email: str, target_career: str):
-    """
-    Sends a motivational reminder to inactive students.
-    """
-    import random
-    quote = random.choice(MOTIVATIONAL_QUOTES)
-    subject = f"We miss you, {student_name}! Don't lose your leads"
-    
-    body_html = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <h2 style="color: #2c3e50;">Hello {student_name},</h2>
-        <p>We haven't seen you at CareerCompass AI in a while! Consistency is key to mastering <strong>{target_career}</strong> skills.</p>
-        
-        <div style="background-color: #e8f4fd; padding: 15px; border-left: 5px solid #3498db; margin: 20px 0;">
-            <p style="margin: 0;"><strong>Pro-Tip:</strong> Just 15 minutes of focused learning today can make a big difference.</p>
-        </div>
+    if not students:
+        return {}
+    now = datetime.utcnow()
+    stamp = getattr(Student, column)
+    cooled_down = or_(stamp.is_(None), stamp < now - EMAIL_COOLDOWN)
+    statement = update(Student).values({column: now}).execution_options(synchronize_session=False)
+    if session.get_bind().dialect.update_returning:
+        claimed = set(session.execute(
+            statement.where(Student.id.in_([student.id for student in students]), cooled_down).returning(Student.id)
+        ).scalars())
+    else:
+        # e.g. MySQL: no UPDATE ... RETURNING, so one conditional UPDATE per student
+        claimed = {
+            student.id for student in students
+            if session.execute(statement.where(Student.id == student.id, cooled_down)).rowcount == 1
+        }
+    previous = {}
+    for student in students:
+        if student.id in claimed:
+            previous[student.id] = getattr(student, column)
+            # Already written by the UPDATE; keep the ORM from writing it again
+            set_committed_value(student, column, now)
+    return previous
 
-        <p style="font-style: italic; color: #2980b9; margin-top: 20px;">"{quote}"</p>
+def release_email_slot(session: Session, student: Student, column: str, previous: Optional[datetime]):
+    """Undoes a claim_email_slots claim when the email could not be queued after all."""
+    session.execute(
+        update(Student).where(Student.id == student.id).values({column: previous})
+        .execution_options(synchronize_session=False)
+    )
+    set_committed_value(student, column, previous)
 
-        <p>Ready to jump back in? We've got fresh news and insights waiting for you.</p>
-        
-        <hr style="border: 0; border-top: 1px solid #eee; margin: 20px 0;">
-        <p style="font-size: 0.8em; color: #95a5a6;">Best Regards,<br>The CareerCompass AI Team</p>
-    </body>
-    </html>
+def audit_students(session: Session, students: List[Student], current_news: List[dict]) -> List[dict]:
     """
-    
-    return send_email_via_smtp(email, subject, body_html)
+    Runs the drift, inactivity and news checks for one chunk of students.
+    Emails are staged in `session`, so they are only sent if it commits.
+    """
+    reports = {}  # student id -> report; each student gets at most one email per audit
+    now = datetime.utcnow()
 
-def send_signup_email(student_name: str, email: str, target_career: str):
+    def cooling_down(stamp: Optional[datetime]) -> bool:
+        return stamp is not None and now - stamp < EMAIL_COOLDOWN
+
+    # Counts and suggestions come from the stored aggregates; activities are
+    # only re-classified for students whose aggregate predates the skill table.
+    refresh_stale_aggregates(session, students)
+
+    # --- 1. Career Drift Audit ---
+    # Prevent spamming: only email once every 24 hours. The in-memory checks
+    # are a pre-filter; claim_email_slots makes the final, atomic decision.
+    eligible = [
+        student for student in students
+        if _activity_total(student) >= DRIFT_MIN_ACTIVITIES and not cooling_down(student.last_emailed_at)
+    ]
+    # Recency and visit features age even when nothing changes, so the
+    # eligible students are rescored as of now, in one model call
+    _update_drift_scores(eligible, now)
+    drift_results = {student.id: drift_result_from_aggregate(student) for student in eligible}
+    drifting = [
+        s for s in students
+        if s.id in drift_results and drift_results[s.id].get("drift_score", 0.0) > DRIFT_EMAIL_THRESHOLD
+    ]
+    # Each check claims its students and stages all of their emails at once
+    claimed = claim_email_slots(session, drifting, "last_emailed_at")
+    emailed = [student for student in drifting if student.id in claimed]
+    if stage_emails(session, [
+        (student.email, render_drift_email(student.name, student.target_career, drift_results[student.id]["drift_score"],
+                                           drift_results[student.id]["suggestions"]))
+        for student in emailed
+    ]):
+        for student in emailed:
+            reports[student.id] = {"name": student.name, "type": "Drift", "status": "Emailed",
+                                   "score": drift_results[student.id]["drift_score"]}
+    else:
+        for student in emailed:
+            release_email_slot(session, student, "last_emailed_at", claimed[student.id])
+
+    # --- 2. Inactivity Audit (Only if not already emailed for drift today) ---
+    # If last visit was > 24 hours ago; also respect the general 24h cooldown
+    # for ANY email type to avoid spam
+    inactive = [
+        student for student in students
+        if student.id not in reports
+        and student.last_visited_at and (now - student.last_visited_at > INACTIVITY_THRESHOLD)
+        and not cooling_down(student.last_emailed_at)
+    ]
+    claimed = claim_email_slots(session, inactive, "last_emailed_at")
+    emailed = [student for student in inactive if student.id in claimed]
+    if stage_emails(session, [
+        (student.email, render_inactivity_email(student.name, student.target_career)) for student in emailed
+    ]):
+        for student in emailed:
+            reports[student.id] = {"name": student.name, "type": "Inactivity", "status": "Emailed"}
+    else:
+        for student in emailed:
+            release_email_slot(session, student, "last_emailed_at", claimed[student.id])
+
+    # --- 3. News Update Audit (Only if not already emailed today) ---
+    # If student hasn't received news in 24 hours
+    if current_news:
+        news_due = [
+            student for student in students
+            if student.id not in reports and not cooling_down(student.last_news_sent_at)
+        ]
+        claimed = claim_email_slots(session, news_due, "last_news_sent_at")
+        emailed = [student for student in news_due if student.id in claimed]
+        if stage_emails(session, [
+            (student.email, render_news_email(student.name, current_news[:3])) for student in emailed  # Send top 3
+        ]):
+            for student in emailed:
+                reports[student.id] = {"name": student.name, "type": "News", "status": "Emailed"}
+        else:
+            for student in emailed:
+                release_email_slot(session, student, "last_news_sent_at", claimed[student.id])
+
+    return [reports[student.id] for student in students if student.id in reports]
+
+def audit_candidate_ids(session: Session, start_id: int, end_id: int, include_news: bool = True) -> List[int]:
     """
-    Sends a welcome email upon registration.
+    Ids in [start_id, end_id] that may be owed an email, as the union of three
+    candidate sets selected in SQL on indexed columns (drift score, last visit,
+    last news), so ineligible students are never loaded. These predicates
+    mirror the ones in audit_students, which still makes the final decision.
     """
-    subject = f"Welcome to CareerCompass AI, {student_name}!"
-    
-    body_html = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <h2 style="color: #2c3e50;">Welcome aboard, {student_name}!</h2>
-        <p>We're thrilled to have you join CareerCompass AI. Your journey to becoming a <strong>{target_career}</strong> starts now.</p>
-        <p>Make sure to log your learning activities regularly so our AI can provide tailored insights to keep you on the most optimal path.</p>
-        <p>Happy learning!</p>
-        <hr style="border: 0; border-top: 1px solid #eee; margin: 20px 0;">
-        <p style="font-size: 0.8em; color: #95a5a6;">Best Regards,<br>The CareerCompass AI Team</p>
-    </body>
-    </html>
-    """
-    
-    return send_email_via_smtp(email, subject, body_html)
+    now = datetime.utcnow()
+    out_of_cooldown = or_(Student.last_emailed_at.is_(None), Student.last_emailed_at < now - EMAIL_COOLDOWN)
+    in_shard = Student.id.between(start_id, end_id)
+    version = get_skill_matcher(CAREER_SKILLS).version
+    total = Student.relevant_count + Student.conflicting_count + Student.irrelevant_count
+    candidate_sets = [
+        # 1. Drift: stored score over the threshold...
+        select(Student.id).where(
+            in_shard, Student.current_drift_score > DRIFT_EMAIL_THRESHOLD, Student.drift_skills_version == version,
+            total >= DRIFT_MIN_ACTIVITIES, out_of_cooldown,
+        ),
+        # ...or a stored score that may have passed it since, as it aged
+        select(Student.id).where(
+            in_shard, Student.drift_rescore_at <= now, Student.drift_skills_version == version,
+            total >= DRIFT_MIN_ACTIVITIES, out_of_cooldown,
+        ),
+        # ...or an aggregate from an older skill table, which is rebuilt before it
+        # can be judged (spelled as ranges rather than != so the index applies)
+        select(Student.id).where(
+            in_shard, or_(Student.drift_skills_version.is_(None), Student.drift_skills_version < version,
+                          Student.drift_skills_version > version),
+        ),
+        # 2. Inactivity
+        select(Student.id).where(in_shard, Student.last_visited_at < now - INACTIVITY_THRESHOLD, out_of_cooldown),
+    ]
+    if include_news:
+        # 3. News
+        candidate_sets.append(select(Student.id).where(
+            in_shard,
+            or_(Student.last_news_sent_at.is_(None), Student.last_news_sent_at < now - EMAIL_COOLDOWN),
+        ))
+    candidates = set()
+    for statement in candidate_sets:
+        candidates.update(session.exec(statement).all())
+    return sorted(candidates)
 
-def send_login_email(student_name: str, email: str, target_career: str):
+def audit_shard(shard_id: int, current_news: List[dict]) -> dict:
     """
-    Sends a welcome email upon successful login.
+    Audits one id range of an audit job. Runs in a worker process. Each chunk
+    of students commits on its own, with its student updates, staged emails
+    and the shard's progress, so write transactions stay short and a retried
+    or resumed shard continues after the last committed chunk.
     """
-    subject = f"Successful Login to CareerCompass AI, {student_name}!"
-    
-    body_html = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-        <h2 style="color: #2c3e50;">Welcome back, {student_name}!</h2>
-        <p>You have successfully logged in to CareerCompass AI. Keep up the great work towards becoming a <strong>{target_career}</strong>.</p>
-        <p>Log your new activities today to keep our AI insights accurate and personalized.</p>
-        <p>Happy learning!</p>
-        <hr style="border: 0; border-top: 1px solid #eee; margin: 20px 0;">
-        <p style="font-size: 0.8em; color: #95a5a6;">Best Regards,<br>The CareerCompass AI Team</p>
-    </body>
-    </html>
-    """
-    
-    return send_email_via_smtp(email, subject, body_html)
-
-@app.post("/audit_drift")
+    with Session(engine) as session:
+        shard = session.get(AuditShard, shard_id)
+        if shard is None or shard.status == "done":
+            return {}
+        start_id, end_id = shard.start_id, shard.end_id
+
+        # Only eligible students are loaded and scored: O(eligible), not O(shard)
+        candidate_ids = audit_candidate_ids(session, max(start_id, shard.resume_after_id + 1), end_id,
+                                            include_news=bool(current_news))
+        session.commit()
+        for i in range(0, len(candidate_ids), AUDIT_CHUNK_SIZE):
+            chunk_ids = candidate_ids[i:i + AUDIT_CHUNK_SIZE]
+            students = session.exec(select(Student).where(Student.id.in_(chunk_ids)).order_by(Student.id)).all()
+            reports = audit_students(session, students, current_news)
+            shard = session.get(AuditShard, shard_id)
+            shard.drift_emails += sum(1 for r in reports if r["type"] == "Drift")
+            shard.inactivity_emails += sum(1 for r in reports if r["type"] == "Inactivity")
+            shard.news_emails += sum(1 for r in reports if r["type"] == "News")
+            shard.details = json.dumps(json.loads(shard.details) + reports)
+            shard.resume_after_id = chunk_ids[-1]
+            session.add(shard)
+            session.commit()
+            # Memory is bounded by the chunk, not the shard
+            session.expunge_all()
+
+        shard = session.get(AuditShard, shard_id)
+        shard.status = "done"
+        shard.processed_students = session.exec(
+            select(func.count(Student.id)).where(Student.id.between(start_id, end_id))
+        ).one()
+        shard.finished_at = datetime.utcnow()
+        session.add(shard)
+        session.commit()
+        return {"shard_id": shard_id, "processed_students": shard.processed_students,
+                "eligible_students": len(candidate_ids),
+                "emails": shard.drift_emails + shard.inactivity_emails + shard.news_emails}
+
+audit_runner = AuditJobRunner(
+    engine,
+    audit_shard,
+    shard_size=AUDIT_SHARD_SIZE,
+    workers=AUDIT_WORKERS,
+    # Fetched once per run in the server process and shared by every shard
+    context_fn=lambda: (get_tech_news(),),
+    # Hand freshly committed emails to the mail workers right away
+    on_shard_done=mail_queue.schedule_due,
+    lease_seconds=AUDIT_LEASE_SECONDS,
+    shard_attempts=AUDIT_SHARD_ATTEMPTS,
+    retry_backoff_seconds=AUDIT_RETRY_BACKOFF_SECONDS,
+)
+
+def _schedule_offset(at: str) -> timedelta:
+    hours, minutes = at.split(":")
+    return timedelta(hours=int(hours), minutes=int(minutes))
+
+audit_scheduler = AuditScheduler(
+    audit_runner,
+    interval=timedelta(minutes=AUDIT_SCHEDULE_INTERVAL_MINUTES),
+    offset=_schedule_offset(AUDIT_SCHEDULE_AT),
+    jitter_seconds=AUDIT_SCHEDULE_JITTER_SECONDS,
+)
+
+@app.post("/audit_drift", status_code=202)
 def audit_all_students():
     """
-    Iterates through all students: 
+    Queues a cohort audit and returns its job id right away; poll
+    GET /audit_jobs/{job_id} for progress. For every student:
     1. Checks for career drift -> sends email.
     2. Checks for inactivity (> 24h) -> sends email.
     3. Checks for new tech news -> sends email.
+    If an audit is already queued or running, that job is returned instead.
+    Audits also run on their own via audit_scheduler (see AUDIT_SCHEDULE_*).
     """
-    reports = []
-    current_news = get_tech_news()
-    # Get the timestamp of the latest news item for comparison
-    latest_news_time = datetime.utcnow() # Default fallback
-    if current_news:
-        try:
-            # RSS dates can be complex, for simulation we assume if news exists, it's "new" 
-            # if sent more than 24h ago
-            pass
-        except: pass
+    job = audit_runner.submit()
+    return audit_runner.progress(job.id)
 
-    with Session(engine) as session:
-        students = session.exec(select(Student)).all()
-        for student in students:
-            student_emailed = False
-            
-            # --- 1. Career Drift Audit ---
-            if len(student.activities) >= 3:
-                # Prevent spamming: only email once every 24 hours
-                can_email = True
-                if student.last_emailed_at:
-                    if datetime.utcnow() - student.last_emailed_at < timedelta(hours=24):
-                        can_email = False
-                
-                if can_email:
-                    results = predict_drift(StudentProfile(
-                        target_career=student.target_career,
-                        recent_activities=[ActivityInput(name=a.name, category=a.category) for a in student.activities]
-                    ))
-                    drift_prob = results.get("drift_score", 0.0)
-                    if drift_prob > 0.6:
-                        success = send_drift_email(
-                            student_name=student.name,
-                            email=student.email,
-                            career=student.target_career,
-                            drift_score=drift_prob,
-                            details=results.get("suggestions", [])
-                        )
-                        if success:
-                            student.last_emailed_at = datetime.utcnow()
-                            student.current_drift_score = drift_prob
-                            session.add(student)
-                            reports.append({"name": student.name, "type": "Drift", "status": "Emailed", "score": drift_prob})
-                            student_emailed = True
-
-            # --- 2. Inactivity Audit (Only if not already emailed for drift today) ---
-            if not student_emailed:
-                # If last visit was > 24 hours ago
-                if student.last_visited_at and (datetime.utcnow() - student.last_visited_at > timedelta(hours=24)):
-                    # Also respect a general 24h cooldown for ANY email type to avoid spam
-                    can_email = True
-                    if student.last_emailed_at and (datetime.utcnow() - student.last_emailed_at < timedelta(hours=24)):
-                        can_email = False
-                        
-                    if can_email:
-                        success = send_inactivity_email(student.name, student.email, student.target_career)
-                        if success:
-                            student.last_emailed_at = datetime.utcnow()
-                            session.add(student)
-                            reports.append({"name": student.name, "type": "Inactivity", "status": "Emailed"})
-                            student_emailed = True
-
-            # --- 3. News Update Audit (Only if not already emailed today) ---
-            if not student_emailed and current_news:
-                # If student hasn't received news in 24 hours
-                can_email = True
-                if student.last_news_sent_at:
-                     if datetime.utcnow() - student.last_news_sent_at < timedelta(hours=24):
-                         can_email = False
-                
-                if can_email:
-                    success = send_news_email(student.name, student.email, current_news[:3]) # Send top 3
-                    if success:
-                        student.last_news_sent_at = datetime.utcnow()
-                        session.add(student)
-                        reports.append({"name": student.name, "type": "News", "status": "Emailed"})
-        
-        session.commit()
-    return {"total_audited": len(reports), "details": reports}
+@app.get("/audit_jobs/{job_id}")
+def get_audit_job(job_id: str, details: bool = False):
+    """Progress of an audit job; `details=true` adds the per-student email reports."""
+    progress = audit_runner.progress(job_id, details=details)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Audit job not found")
+    return progress
 
 # Startup logic moved to lifespan
 
 class ActivityInput(BaseModel):
     name: str
     category: str
+    type: Optional[str] = None  # "Learning", "Project", "Coding"
+    timestamp: Optional[datetime] = None
 
 class StudentProfile(BaseModel):
     target_career: str
-    recent_activities: List[ActivityInput]
+    recent_activities: List[ActivityInput] = []
+    # When set, the stored per-student aggregate is used instead of recent_activities
+    student_id: Optional[int] = None
+    # Optional sliding window: only the last N activities and/or the last D days count
+    window_activities: Optional[int] = Field(default=None, gt=0)
+    window_days: Optional[int] = Field(default=None, gt=0)
+
+# Password hashing: "pbkdf2_sha256" (default) or "argon2" (needs argon2-cffi).
+# PASSWORD_ROUNDS is the pbkdf2 iteration count / argon2 time cost. Changing
+# the scheme or cost takes effect for existing accounts on their next login.
+PASSWORD_SCHEME = os.getenv("PASSWORD_SCHEME", "pbkdf2_sha256")
+PASSWORD_ROUNDS = int(os.getenv("PASSWORD_ROUNDS", 0)) or None
+PASSWORD_ARGON2_MEMORY_KIB = int(os.getenv("PASSWORD_ARGON2_MEMORY_KIB", 0)) or None
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 0)) or default_workers()
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 256))
+# How much lower than the app the hashing processes run (0-19); 0 lets them
+# compete with request handling for the CPU as equals
+PASSWORD_HASH_NICE = int(os.getenv("PASSWORD_HASH_NICE", 10))
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+password_hasher = PasswordHasher(
+    PASSWORD_SCHEME,
+    rounds=PASSWORD_ROUNDS,
+    argon2_memory_kib=PASSWORD_ARGON2_MEMORY_KIB,
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+    nice=PASSWORD_HASH_NICE,
+)
+
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except HasherBusy:
+        raise HTTPException(status_code=503, detail="Too many sign-ins in progress, try again shortly",
+                            headers={"Retry-After": "1"})
+
+async def verify_password(password: str, hashed: str):
+    try:
+        return await password_hasher.verify_and_update(password, hashed)
+    except HasherBusy:
+        raise HTTPException(status_code=503, detail="Too many sign-ins in progress, try again shortly",
+                            headers={"Retry-After": "1"})
 
 class StudentSignup(BaseModel):
     name: str
@@ -451,33 +704,18 @@ class StudentLogin(BaseModel):
     email: str
     password: str
 
-CAREER_SKILLS = {
-    "Data Scientist": ["Python", "Pandas", "Scikit-Learn", "SQL", "Statistics", "TensorFlow", "Keras", "Tableau", "PowerBI", "Matplotlib", "Seaborn", "NumPy", "R", "Machine Learning", "Deep Learning", "Data Analysis", "Data Science", "Analytics", "Model", "Dataset", "Database", "PyTorch", "NLP"],
-    "Frontend Developer": ["React", "CSS", "HTML", "JavaScript", "Figma", "Redux", "Tailwind", "Next.js", "TypeScript", "Vue", "Angular", "Sass", "Web Design", "UI", "UX", "Frontend", "App", "Website", "Webpack"],
-    "Backend Developer": ["Python", "FastAPI", "SQL", "Docker", "PostgreSQL", "System Design", "Go", "Redis", "Kafka", "Microservices", "Flask", "Node.js", "Express", "MongoDB", "Django", "Kubernetes", "API", "Database", "Server", "Backend", "Java", "Spring", "Springboot", "C#", ".NET", "Ruby", "PHP", "AWS", "Rust", "C++"],
-    "DevOps Engineer": ["Docker", "Kubernetes", "Jenkins", "Ansible", "Terraform", "Cloud", "AWS", "Azure", "GCP", "CI/CD", "Linux", "Bash", "Monitoring", "Prometheus", "Grafana", "Nginx"],
-    "Full Stack Developer": ["React", "Node.js", "Express", "MongoDB", "SQL", "HTML", "CSS", "JavaScript", "API", "Database", "Frontend", "Backend", "Full Stack"],
-    "AI/ML Engineer": ["Python", "PyTorch", "TensorFlow", "Deep Learning", "Neural Networks", "NLP", "Computer Vision", "Pytorch", "Scikit-Learn", "Keras", "AI", "ML"],
-    "Data Analyst": ["SQL", "Excel", "Tableau", "PowerBI", "Python", "Pandas", "Statistics", "Data Visualization", "Cleaning", "Reporting", "Analysis"],
-    "Business Analyst": ["Requirements", "Agile", "Scrum", "User Stories", "Process Mapping", "SQL", "Stakeholder", "Business", "UML", "BPMN"],
-    "Cybersecurity Engineer": ["Security", "Networking", "Pentesting", "Encryption", "Firewall", "Vulnerability", "Ethical Hacking", "CEH", "CISSP", "SOC", "Compliance"],
-    "Cloud Engineer": ["AWS", "Azure", "Google Cloud", "Serverless", "S3", "EC2", "Cloud Computing", "Infrastructure", "PaaS", "IaaS", "SaaS"],
-    "Mobile Developer": ["React Native", "Flutter", "Swift", "Kotlin", "Java", "Android", "iOS", "Mobile App", "Expo", "Dart"],
-    "UI/UX Designer": ["Figma", "Adobe XD", "Sketch", "Prototyping", "User Experience", "User Interface", "Typography", "Color Theory", "Wireframing", "UI", "UX"],
-    "Database Administrator": ["PostgreSQL", "MySQL", "MongoDB", "Oracle", "Database Design", "SQL Tuning", "Backup", "Indexing", "DBA", "Query Optimization"],
-    "Game Developer": ["Unity", "Unreal Engine", "C#", "C++", "Shaders", "Game Design", "3D Modeling", "Physics Engine", "Blender", "OpenGL"]
-}
-
+# Password hashing runs in password_hasher's own worker processes, so these
+# endpoints are async: the hash never holds a request threadpool slot. It also
+# never holds a database connection: hashes are computed outside any session.
 @app.post("/register")
-def register_student(student_in: StudentSignup):
-    with Session(engine) as session:
+async def register_student(student_in: StudentSignup, background_tasks: BackgroundTasks):
+    hashed_pwd = await hash_password(student_in.password)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         # Check if email exists
-        statement = select(Student).where(Student.email == student_in.email)
-        existing_student = session.exec(statement).first()
-        if existing_student:
+        statement = select(Student.id).where(Student.email == student_in.email)
+        if (await session.exec(statement)).first() is not None:
             raise HTTPException(status_code=400, detail="Email already registered")
         
-        hashed_pwd = pwd_context.hash(student_in.password)
         db_student = Student(
             name=student_in.name,
             email=student_in.email,
@@ -485,42 +723,61 @@ def register_student(student_in: StudentSignup):
             target_career=student_in.target_career
         )
         session.add(db_student)
-        session.commit()
-        session.refresh(db_student)
+        await session.commit()
+        await session.refresh(db_student)
         
-        # Send signup email
-        send_signup_email(db_student.name, db_student.email, db_student.target_career)
+        # Send signup email after the response goes out
+        background_tasks.add_task(send_signup_email, db_student.name, db_student.email, db_student.target_career)
         
         return db_student
 
 @app.post("/login")
-def login_student(login_in: StudentLogin):
-    with Session(engine) as session:
-        statement = select(Student).where(Student.email == login_in.email)
-        student = session.exec(statement).first()
-        if not student or not pwd_context.verify(login_in.password, student.hashed_password):
+async def login_student(login_in: StudentLogin, background_tasks: BackgroundTasks):
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        statement = select(Student.id, Student.hashed_password).where(Student.email == login_in.email)
+        account = (await session.exec(statement)).first()
+    if not account:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    student_id, stored_hash = account
+    valid, new_hash = await verify_password(login_in.password, stored_hash)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        if new_hash:
+            # Stored with an older scheme or cost: upgrade it now that we have the
+            # password, unless it was changed while we were verifying
+            await session.execute(
+                update(Student).where(Student.id == student_id, Student.hashed_password == stored_hash)
+                .values(hashed_password=new_hash)
+            )
+        send_email = await claim_login_email(session, student_id)
+        student = await session.get(Student, student_id)
+        if not student:
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
         # Update last visited
         student.last_visited_at = datetime.utcnow()
         session.add(student)
-        session.commit()
-        session.refresh(student)
+        await session.commit()
         
-        # Send login email
-        send_login_email(student.name, student.email, student.target_career)
+        # Send login email after the response goes out, at most once per debounce window
+        if send_email:
+            background_tasks.add_task(send_login_email, student.name, student.email, student.target_career)
         
         return student
 
+# Plain reads/writes run on the AsyncSession so they don't occupy a threadpool
+# slot; endpoints that score drift stay sync (CPU-bound).
 @app.post("/visit/{student_id}")
-def update_visit(student_id: int):
-    with Session(engine) as session:
-        student = session.get(Student, student_id)
+async def update_visit(student_id: int):
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        student = await session.get(Student, student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
         student.last_visited_at = datetime.utcnow()
         session.add(student)
-        session.commit()
+        await session.commit()
         return {"status": "success", "last_visited_at": student.last_visited_at}
 
 @app.post("/students/")
@@ -534,6 +791,7 @@ def create_student(student: Student):
         if existing_student:
             if existing_student.target_career != student.target_career:
                 existing_student.target_career = student.target_career
+                rebuild_drift_aggregates([existing_student], load_activity_histories(session, [existing_student.id]))
                 session.add(existing_student)
                 session.commit()
                 session.refresh(existing_student)
@@ -545,9 +803,9 @@ def create_student(student: Student):
         return student
 
 @app.get("/students/{student_id}")
-def get_student(student_id: int):
-    with Session(engine) as session:
-        student = session.get(Student, student_id)
+async def get_student(student_id: int):
+    async with AsyncSession(async_engine) as session:
+        student = await session.get(Student, student_id)
         if not student:
              raise HTTPException(status_code=404, detail="Student not found")
         return student
@@ -556,113 +814,571 @@ def get_student(student_id: int):
 def create_activity(activity: Activity):
     with Session(engine) as session:
         session.add(activity)
+        session.flush()  # A stale aggregate is rebuilt from history, including this row
+
+        # Fold the new activity into the student's running drift aggregate
+        student = lock_students(session, [activity.student_id]).get(activity.student_id)
+        if student:
+            fold_new_activities(session, [student], {student.id: [(activity.name, activity.type, activity.timestamp)]})
+
         session.commit()
         session.refresh(activity)
         return activity
 
+# --- Bulk activity import ---
+ACTIVITY_IMPORT_BATCH_SIZE = int(os.getenv("ACTIVITY_IMPORT_BATCH_SIZE", 5000))
+ACTIVITY_IMPORT_MAX_ERRORS = 1000  # Row errors listed in a report; "failed" counts all of them
+
+class ActivityImportRow(BaseModel):
+    student_id: int
+    name: str = Field(min_length=1)
+    category: str
+    type: str
+    timestamp: Optional[datetime] = None
+
+def new_import_report() -> dict:
+    return {"received": 0, "inserted": 0, "failed": 0, "errors": []}
+
+def _import_error(report: dict, row_number: int, message: str):
+    report["failed"] += 1
+    if len(report["errors"]) < ACTIVITY_IMPORT_MAX_ERRORS:
+        report["errors"].append({"row": row_number, "error": message})
+
+def import_activity_batch(rows: List[tuple], report: dict):
+    """
+    Validates (row_number, raw_row) pairs and inserts the valid ones in a single
+    transaction with one executemany, then folds them into the students' drift
+    aggregates. Invalid rows and unknown students are recorded in `report`.
+    """
+    report["received"] += len(rows)
+    errors = []
+    valid = []
+    for row_number, raw in rows:
+        try:
+            valid.append((row_number, ActivityImportRow.model_validate(raw)))
+        except ValidationError as e:
+            errors.append((row_number, "; ".join(
+                f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()
+            )))
+
+    mappings = []
+    if valid:
+        with Session(engine) as session:
+            student_ids = {row.student_id for _, row in valid}
+            known = set(session.exec(select(Student.id).where(Student.id.in_(student_ids))))
+            now = datetime.utcnow()
+            new_activities = {student_id: [] for student_id in known}
+            for row_number, row in valid:
+                if row.student_id not in known:
+                    errors.append((row_number, f"Unknown student_id {row.student_id}"))
+                    continue
+                mappings.append({
+                    "student_id": row.student_id,
+                    "name": row.name,
+                    "category": row.category,
+                    "type": row.type,
+                    "timestamp": _naive_utc(row.timestamp) if row.timestamp else now,
+                })
+                new_activities[row.student_id].append((row.name, row.type, mappings[-1]["timestamp"]))
+            if mappings:
+                session.execute(insert(Activity), mappings)
+                students = lock_students(session, [sid for sid, rows in new_activities.items() if rows])
+                fold_new_activities(session, list(students.values()), new_activities)
+                session.commit()
+
+    report["inserted"] += len(mappings)
+    for row_number, message in sorted(errors):
+        _import_error(report, row_number, message)
+
+async def _iter_request_rows(request: Request):
+    """Yields (row_number, raw_row) from a JSON array body or an NDJSON stream, 1-based."""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        row_number = 0
+        pending = b""
+        async for chunk in request.stream():
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                if line.strip():
+                    row_number += 1
+                    yield row_number, line
+        if pending.strip():
+            yield row_number + 1, pending
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    for row_number, row in enumerate(rows, start=1):
+        yield row_number, row
+
+@app.post("/activities/bulk")
+async def bulk_create_activities(request: Request):
+    """
+    Imports many activities from a JSON array, or from an NDJSON stream sent with
+    Content-Type: application/x-ndjson. Rows are inserted in batched transactions
+    as they arrive; invalid rows are skipped and reported by position.
+    """
+    report = new_import_report()
+    batch = []
+    async for row_number, raw in _iter_request_rows(request):
+        if isinstance(raw, bytes):
+            try:
+                raw = json.loads(raw)
+            except ValueError:
+                report["received"] += 1
+                _import_error(report, row_number, "Invalid JSON")
+                continue
+        batch.append((row_number, raw))
+        if len(batch) >= ACTIVITY_IMPORT_BATCH_SIZE:
+            await run_in_threadpool(import_activity_batch, batch, report)
+            batch = []
+    if batch:
+        await run_in_threadpool(import_activity_batch, batch, report)
+    return report
+
+ACTIVITY_PAGE_SIZE = 100
+ACTIVITY_PAGE_MAX = 1000
+
+def _naive_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def encode_activity_cursor(activity: Activity) -> str:
+    raw = f"{activity.timestamp.isoformat()}|{activity.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_activity_cursor(cursor: str) -> tuple:
+    try:
+        timestamp, activity_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(activity_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @app.get("/students/{student_id}/activities/")
-def get_student_activities(student_id: int):
-    with Session(engine) as session:
-        student = session.get(Student, student_id)
+async def get_student_activities(
+    student_id: int,
+    response: Response,
+    since: Optional[datetime] = None,
+    limit: int = Query(ACTIVITY_PAGE_SIZE, ge=1, le=ACTIVITY_PAGE_MAX),
+    cursor: Optional[str] = None,
+):
+    """
+    One page of the student's activities, newest first. When more remain, the
+    X-Next-Cursor header holds the `cursor` value for the next page.
+    """
+    async with AsyncSession(async_engine) as session:
+        student = await session.get(Student, student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
-        return student.activities
+        # Relationships can't lazy-load under asyncio, so query the rows directly;
+        # (student_id, timestamp DESC) is served by ix_activity_student_id_timestamp
+        statement = select(Activity).where(Activity.student_id == student_id)
+        if since is not None:
+            statement = statement.where(Activity.timestamp >= _naive_utc(since))
+        if cursor:
+            after_timestamp, after_id = decode_activity_cursor(cursor)
+            statement = statement.where(or_(
+                Activity.timestamp < after_timestamp,
+                and_(Activity.timestamp == after_timestamp, Activity.id < after_id),
+            ))
+        statement = statement.order_by(Activity.timestamp.desc(), Activity.id.desc()).limit(limit + 1)
+        activities = (await session.exec(statement)).all()
+        if len(activities) > limit:
+            activities = activities[:limit]
+            response.headers["X-Next-Cursor"] = encode_activity_cursor(activities[-1])
+        return activities
 
-@app.post("/predict_drift")
-def predict_drift(profile: StudentProfile):
-    if not model:
-        raise HTTPException(status_code=500, detail="Model not loaded")
-    
-    target = profile.target_career
+def _suggestion(name: str, target: str, conflicting_careers) -> str:
+    if conflicting_careers:
+        career_list = ", ".join(conflicting_careers)
+        return f"'{name}' is more related to {career_list}. It's not necessary for {target}."
+    return f"'{name}' seems irrelevant to your {target} path."
 
-    if not target:
-        return {"drift_score": 0, "status": "No Target", "message": "Please select a career target first.", "suggestions": []}
-    
-    if target not in CAREER_SKILLS:
-        return {"error": "Unknown career target"}
-        
-    relevant_skills = CAREER_SKILLS[target]
-    other_skills = {}
-    for career, skills in CAREER_SKILLS.items():
-        if career != target:
-            other_skills[career] = skills
-
-    relevant_score = 0.0
-    total = len(profile.recent_activities)
-    suggestions = []
-    
-    if total == 0:
-        return {"drift_score": 0, "status": "No Data", "message": "Add activities to analyze.", "suggestions": []}
+class DriftInput(NamedTuple):
+    """One profile to score; activity types, timestamps and the last visit are optional."""
+    target_career: Optional[str]
+    activity_names: List[str]
+    activity_types: Optional[List[Optional[str]]] = None
+    timestamps: Optional[List[Optional[datetime]]] = None
+    last_visited_at: Optional[datetime] = None
 
-    for act in profile.recent_activities:
-        act_score = 0.0
-        is_conflicting = False
-        conflicting_career = None
-        
-        # 1. Skill Matching (Priority)
-        act_name_lower = act.name.lower()
-        import re
-        
-        def is_skill_in_text(skill, text):
-            skill = skill.lower()
-            pattern = rf"\b{re.escape(skill)}\b"
-            return bool(re.search(pattern, text))
-
-        # Check if it matches target skills
-        target_skill_match = False
-        for skill in relevant_skills:
-            if is_skill_in_text(skill, act_name_lower):
-                target_skill_match = True
-                break
-        
-        if target_skill_match:
-            act_score = 1.0
-        else:
-            # Check if it matches other career skills
-            conflicting_careers = []
-            for career, skills in other_skills.items():
-                for skill in skills:
-                    if is_skill_in_text(skill, act_name_lower):
-                        conflicting_careers.append(career)
-                        is_conflicting = True
-                        break # break out of the skills loop for this career
-
-            if is_conflicting:
-                act_score = 0.0
-                career_list = ", ".join(conflicting_careers)
-                suggestions.append(f"'{act.name}' is more related to {career_list}. It's not necessary for {target}.")
-            else:
-                act_score = 0.0
-                suggestions.append(f"'{act.name}' seems irrelevant to your {target} path.")
+def drift_features(inputs: List[DriftInput], as_of: Optional[datetime] = None):
+    """
+    FEATURE_NAMES matrix, one row per input, from a single featurizer pass
+    over the activities of all inputs: the same computation ml/train.py
+    trains on. Returns the flat (group, name, target) activity columns too.
+    """
+    groups, names, targets, types, timestamps = [], [], [], [], []
+    for group, (target, activity_names, activity_types, activity_timestamps, _) in enumerate(inputs):
+        count = len(activity_names)
+        groups.extend([group] * count)
+        names.extend(activity_names)
+        targets.extend([target] * count)
+        types.extend(activity_types or [None] * count)
+        timestamps.extend(activity_timestamps or [None] * count)
+    features = get_featurizer(CAREER_SKILLS).cohort_features(
+        groups, names, targets, types, timestamps, len(inputs),
+        last_visited=[drift_input.last_visited_at for drift_input in inputs], as_of=as_of,
+    )
+    return features, (groups, names, targets)
 
-        relevant_score += act_score
-            
-    relevant_ratio = relevant_score / total
-    
-    # Predict
-    probs = model.predict_proba([[relevant_ratio]])[0]
-    drift_probability = float(probs[1])
-    on_track_probability = 1.0 - drift_probability
-    
-    # De-duplicate suggestions
-    suggestions = list(set(suggestions))
+def _predict_drift_probabilities(features):
+    """One model call for a whole cohort's feature matrix."""
+    model = get_model()
+    # The one-feature curve and forest read relevant_ratio, column 0
+    return model.predict_proba(features[:, :getattr(model, "n_features_in_", features.shape[1])])[:, 1]
 
+def _drift_result(drift_probability: float, relevant_ratio: float, suggestions: List[str]) -> dict:
+    drift_probability = float(drift_probability)
     return {
         "drift_score": drift_probability,
-        "on_track_score": on_track_probability,
+        "on_track_score": 1.0 - drift_probability,
         "is_drifting": bool(drift_probability > 0.5),
         "relevant_ratio": relevant_ratio,
         "message": "Needs Attention" if drift_probability > 0.5 else "On Track",
         "suggestions": suggestions
     }
 
+def score_drift_batch(profiles: List[tuple]) -> List[dict]:
+    """
+    Scores many DriftInput profiles at once; plain (target_career,
+    activity_names) pairs are accepted too. Features are computed for the
+    whole batch up front and the model is called a single time on the matrix.
+    """
+    require_model()
+
+    profiles = [DriftInput(*profile) for profile in profiles]
+    results: List[Optional[dict]] = [None] * len(profiles)
+    scored = []  # indexes of profiles with a known target and activities
+
+    for i, profile in enumerate(profiles):
+        target = profile.target_career
+        if not target:
+            results[i] = {"drift_score": 0, "status": "No Target", "message": "Please select a career target first.", "suggestions": []}
+        elif target not in CAREER_SKILLS:
+            results[i] = {"error": "Unknown career target"}
+        elif not profile.activity_names:
+            results[i] = {"drift_score": 0, "status": "No Data", "message": "Add activities to analyze.", "suggestions": []}
+        else:
+            scored.append(i)
+
+    if scored:
+        featurizer = get_featurizer(CAREER_SKILLS)
+        features, (groups, names, targets) = drift_features([profiles[i] for i in scored])
+        relevant = featurizer.relevance(names, targets)
+
+        suggestions = [set() for _ in scored]
+        for group, name, target, is_relevant in zip(groups, names, targets, relevant):
+            if not is_relevant:
+                suggestions[group].add(_suggestion(name, target, featurizer.matcher.matched_careers(name)))
+
+        # Predict
+        drift_probs = _predict_drift_probabilities(features)
+        for group, i in enumerate(scored):
+            # Sorted, like the stored aggregate's, so the order doesn't depend on the input's
+            results[i] = _drift_result(drift_probs[group], float(features[group, 0]), sorted(suggestions[group]))
+
+    return results
+
+# --- Incremental Drift Aggregate ---
+# Each student carries running relevant/conflicting/irrelevant counts, the
+# suggestion set, the featurizer's SUM_NAMES sums and the resulting drift
+# score. create_activity folds in one activity at a time; a full rebuild only
+# happens when the target career changes or the skill table no longer matches
+# `drift_skills_version`. The recency sums decay over time, so the stored
+# score is as of the last update: readers rescore as of now, and each update
+# records in `drift_rescore_at` when the aging score could first pass the
+# email threshold, which is when the audit's SQL prefilter picks it up.
+
+DRIFT_AGGREGATE_COLUMNS = ("relevant_count", "conflicting_count", "irrelevant_count", "drift_suggestions",
+                           "drift_skills_version", "drift_feature_sums", "drift_sums_as_of", "current_drift_score",
+                           "drift_rescore_at")
+
+# Written by every score update: the audit and /predict_drift rescore from an
+# unlocked read, so they must leave the counts and sums alone
+DRIFT_SCORE_COLUMNS = ("current_drift_score", "drift_rescore_at")
+
+def lock_students(session: Session, student_ids: List[int]) -> Dict[int, Student]:
+    """
+    Loads students for a read-modify-write of their aggregates, locked until
+    `session` commits (FOR NO KEY UPDATE, which leaves the activity foreign
+    key checks unblocked; id order, so overlapping imports can't deadlock).
+    SQLite has no row locks: call this after the transaction's first write,
+    which already holds its single write lock, so the rows read are current.
+    """
+    if not student_ids:
+        return {}
+    statement = (
+        select(Student).where(Student.id.in_(student_ids)).order_by(Student.id)
+        .with_for_update(key_share=True).execution_options(populate_existing=True)
+    )
+    return {student.id: student for student in session.exec(statement)}
+
+def _mark_written(students: List[Student], columns: tuple):
+    # Every column is written, changed or not, so a batch's UPDATEs share one
+    # column set and the ORM flushes them as a single executemany rather than
+    # one statement per student
+    for student in students:
+        for column in columns:
+            flag_modified(student, column)
+
+def _activity_total(student: Student) -> int:
+    return student.relevant_count + student.conflicting_count + student.irrelevant_count
+
+def _add_to_aggregate(student: Student, names: List[str], matcher, suggestions: set):
+    # Tally locally and assign once: attribute writes on table models are not free
+    relevant = conflicting = irrelevant = 0
+    for name in names:
+        is_relevant, conflicting_careers = matcher.classify(name, student.target_career)
+        if is_relevant:
+            relevant += 1
+        else:
+            if conflicting_careers:
+                conflicting += 1
+            else:
+                irrelevant += 1
+            suggestions.add(_suggestion(name, student.target_career, conflicting_careers))
+    student.relevant_count += relevant
+    student.conflicting_count += conflicting
+    student.irrelevant_count += irrelevant
+
+def _stored_sums(students: List[Student], as_of: datetime):
+    """The students' stored SUM_NAMES rows, aged to `as_of`."""
+    return age_sums([json.loads(student.drift_feature_sums) for student in students],
+                    [student.drift_sums_as_of for student in students], as_of)
+
+def _add_activity_sums(students: List[Student], activities: dict, as_of: datetime):
+    """Adds {student_id: [(name, type, timestamp)]} to the students' stored sums in one featurizer pass."""
+    groups, names, targets, types, timestamps = [], [], [], [], []
+    for group, student in enumerate(students):
+        for name, activity_type, timestamp in activities[student.id]:
+            groups.append(group)
+            names.append(name)
+            targets.append(student.target_career)
+            types.append(activity_type)
+            timestamps.append(timestamp)
+    sums = _stored_sums(students, as_of) + get_featurizer(CAREER_SKILLS).activity_sums(
+        groups, names, targets, types, timestamps, len(students), as_of
+    )
+    for student, row in zip(students, sums):
+        student.drift_feature_sums = json.dumps(row.tolist())
+        student.drift_sums_as_of = as_of
+
+def _update_drift_scores(students: List[Student], as_of: Optional[datetime] = None):
+    """
+    Re-scores students from their stored sums as of `as_of` (default now),
+    and sets `drift_rescore_at` for those under the email threshold: the day
+    before the one on which their score, with no new activities or visits,
+    would first pass it, or DRIFT_PROJECTION_DAYS ahead if it does not.
+    """
+    _mark_written(students, DRIFT_SCORE_COLUMNS)
+    if not get_model():
+        return
+    as_of = as_of or datetime.utcnow()
+    scored = [s for s in students if s.target_career in CAREER_SKILLS and _activity_total(s) > 0]
+    for student in students:
+        student.current_drift_score = 0.0
+        student.drift_rescore_at = None
+    if scored:
+        featurizer = get_featurizer(CAREER_SKILLS)
+        sums = _stored_sums(scored, as_of)
+        last_visited = [student.last_visited_at for student in scored]
+        drift_probs = _predict_drift_probabilities(featurizer.features_from_sums(sums, last_visited, as_of))
+        # Row d - 1: whether each score is over the threshold d days from now
+        projected = _predict_drift_probabilities(
+            featurizer.projected_features(sums, last_visited, as_of, DRIFT_PROJECTION_DAYS)
+        ).reshape(DRIFT_PROJECTION_DAYS, len(scored)) > DRIFT_EMAIL_THRESHOLD
+        crosses, first_day = projected.any(axis=0), projected.argmax(axis=0)
+        for student, drift_probability, student_crosses, day in zip(scored, drift_probs, crosses, first_day):
+            student.current_drift_score = float(drift_probability)
+            if drift_probability <= DRIFT_EMAIL_THRESHOLD:
+                days = int(day) if student_crosses else DRIFT_PROJECTION_DAYS
+                student.drift_rescore_at = as_of + timedelta(days=days)
+
+def load_activity_histories(session: Session, student_ids: List[int]) -> dict:
+    """{student_id: [(name, type, timestamp)]} for many students in one grouped query."""
+    histories = {student_id: [] for student_id in student_ids}
+    if not student_ids:
+        return histories
+    rows = session.exec(
+        select(Activity.student_id, Activity.name, Activity.type, Activity.timestamp)
+        .where(Activity.student_id.in_(student_ids))
+        .order_by(Activity.id)
+    )
+    for student_id, name, activity_type, timestamp in rows:
+        histories[student_id].append((name, activity_type, timestamp))
+    return histories
+
+def rebuild_drift_aggregates(students: List[Student], histories: dict):
+    """Recomputes aggregates from full activity histories (one model call for all)."""
+    matcher = get_skill_matcher(CAREER_SKILLS)
+    now = datetime.utcnow()
+    for student in students:
+        student.relevant_count = student.conflicting_count = student.irrelevant_count = 0
+        suggestions = set()
+        if student.target_career in CAREER_SKILLS:
+            _add_to_aggregate(student, [row[0] for row in histories[student.id]], matcher, suggestions)
+        student.drift_suggestions = json.dumps(sorted(suggestions))
+        student.drift_skills_version = matcher.version
+        student.drift_feature_sums = json.dumps([0.0] * len(SUM_NAMES))
+        student.drift_sums_as_of = now
+    if students:
+        _add_activity_sums(students, histories, now)
+    _mark_written(students, DRIFT_AGGREGATE_COLUMNS)
+    _update_drift_scores(students, now)
+
+def refresh_stale_aggregates(session: Session, students: List[Student]):
+    """Rebuilds only the aggregates computed against an older skill table."""
+    version = get_skill_matcher(CAREER_SKILLS).version
+    stale = [student for student in students if student.drift_skills_version != version]
+    if stale:
+        rebuild_drift_aggregates(stale, load_activity_histories(session, [student.id for student in stale]))
+        session.add_all(stale)
+
+def fold_new_activities(session: Session, students: List[Student], new_activities: dict):
+    """
+    Adds just-inserted activities ({student_id: [(name, type, timestamp)]}) to
+    the students' running aggregates with one model call. Aggregates from an
+    older skill table are rebuilt from the full history instead, so the new
+    rows must already be flushed, and the students loaded with lock_students.
+    """
+    matcher = get_skill_matcher(CAREER_SKILLS)
+    now = datetime.utcnow()
+    current = [student for student in students if student.drift_skills_version == matcher.version]
+    for student in current:
+        suggestions = set(json.loads(student.drift_suggestions))
+        if student.target_career in CAREER_SKILLS:
+            _add_to_aggregate(student, [row[0] for row in new_activities[student.id]], matcher, suggestions)
+        student.drift_suggestions = json.dumps(sorted(suggestions))
+    if current:
+        _add_activity_sums(current, new_activities, now)
+    _mark_written(current, DRIFT_AGGREGATE_COLUMNS)
+    _update_drift_scores(current, now)
+    session.add_all(current)
+    refresh_stale_aggregates(session, students)
+
+def drift_result_from_aggregate(student: Student) -> dict:
+    """Same response shape as score_drift_batch, read from the stored aggregate in O(1)."""
+    target = student.target_career
+    if not target:
+        return {"drift_score": 0, "status": "No Target", "message": "Please select a career target first.", "suggestions": []}
+    if target not in CAREER_SKILLS:
+        return {"error": "Unknown career target"}
+    total = _activity_total(student)
+    if total == 0:
+        return {"drift_score": 0, "status": "No Data", "message": "Add activities to analyze.", "suggestions": []}
+    return _drift_result(student.current_drift_score, student.relevant_count / total, json.loads(student.drift_suggestions))
+
+def load_recent_activities(session: Session, student_id: int, window_activities: Optional[int] = None,
+                           window_days: Optional[int] = None) -> List[tuple]:
+    """
+    (name, type, timestamp) of the student's activities inside the sliding
+    window, newest first. Reads at most `window_activities` index entries, so
+    the cost does not grow with the length of the history.
+    """
+    statement = select(Activity.name, Activity.type, Activity.timestamp).where(Activity.student_id == student_id)
+    if window_days is not None:
+        statement = statement.where(Activity.timestamp >= datetime.utcnow() - timedelta(days=window_days))
+    statement = statement.order_by(Activity.timestamp.desc(), Activity.id.desc())
+    if window_activities is not None:
+        statement = statement.limit(window_activities)
+    return list(session.exec(statement).all())
+
+def drift_input_from_rows(target_career: str, rows: List[tuple], last_visited_at: Optional[datetime]) -> DriftInput:
+    return DriftInput(target_career, [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows],
+                      last_visited_at)
+
+def windowed_drift_input(profile: StudentProfile) -> DriftInput:
+    """
+    Applies the profile's sliding window to `recent_activities`, which may
+    arrive in any order: they are windowed newest first, like stored ones.
+    """
+    activities = profile.recent_activities
+    if profile.window_days is not None:
+        cutoff = datetime.utcnow() - timedelta(days=profile.window_days)
+        # Entries without a timestamp can't be placed in time, so they are kept
+        activities = [act for act in activities if act.timestamp is None or _naive_utc(act.timestamp) >= cutoff]
+    if profile.window_activities is not None:
+        # Newest first; undated entries count as older than any dated one
+        activities = sorted(activities, key=lambda act: (act.timestamp is not None,
+                                                         _naive_utc(act.timestamp) if act.timestamp else datetime.min),
+                            reverse=True)[:profile.window_activities]
+    return drift_input_from_rows(
+        profile.target_career,
+        [(act.name, act.type, _naive_utc(act.timestamp) if act.timestamp else None) for act in activities],
+        None,
+    )
+
+def score_drift_profiles(session: Session, profiles: List[StudentProfile]) -> List[dict]:
+    """
+    Scores profiles in request order. A profile naming a stored student is
+    scored from that student's history: the stored window when it asks for
+    one, else the stored aggregate if its target matches. Every other profile
+    is scored from its recent_activities. The students are loaded in one
+    query and all classified inputs share one model call.
+    """
+    require_model()
+    student_ids = {profile.student_id for profile in profiles if profile.student_id is not None}
+    students = {}
+    if student_ids:
+        students = {student.id: student for student in session.exec(select(Student).where(Student.id.in_(student_ids)))}
+
+    results: List[Optional[dict]] = [None] * len(profiles)
+    inputs = []  # (index, DriftInput) to classify
+    from_aggregate = []  # (index, student)
+    for i, profile in enumerate(profiles):
+        student = students.get(profile.student_id)
+        if student and (profile.window_activities is not None or profile.window_days is not None):
+            # Sliding window: classify only the recent slice of the stored history
+            rows = load_recent_activities(session, student.id, profile.window_activities, profile.window_days)
+            inputs.append((i, drift_input_from_rows(profile.target_career, rows, student.last_visited_at)))
+        elif student and student.target_career == profile.target_career:
+            from_aggregate.append((i, student))
+        else:
+            inputs.append((i, windowed_drift_input(profile)))
+
+    if from_aggregate:
+        # Stored aggregate: no need to re-classify the whole history, but the
+        # score is rescored as of now since its features age
+        rescored = list({student.id: student for _, student in from_aggregate}.values())
+        refresh_stale_aggregates(session, rescored)
+        _update_drift_scores(rescored)
+        for i, student in from_aggregate:
+            results[i] = drift_result_from_aggregate(student)
+        session.add_all(rescored)
+        session.commit()
+    if inputs:
+        for (i, _), result in zip(inputs, score_drift_batch([drift_input for _, drift_input in inputs])):
+            results[i] = result
+    return results
+
+@app.post("/predict_drift")
+def predict_drift(profile: StudentProfile):
+    with Session(engine) as session:
+        return score_drift_profiles(session, [profile])[0]
+
+@app.post("/predict_drift/batch")
+def predict_drift_batch(profiles: List[StudentProfile]):
+    """Scores a whole list of profiles with one model call; results keep request order."""
+    with Session(engine) as session:
+        return score_drift_profiles(session, profiles)
+
 @app.put("/students/{student_id}/career")
 def update_student_career(student_id: int, target_career: str = Body(..., embed=True)):
     with Session(engine) as session:
         student = session.get(Student, student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
-        student.target_career = target_career
+        if student.target_career != target_career:
+            student.target_career = target_career
+            rebuild_drift_aggregates([student], load_activity_histories(session, [student.id]))
         session.add(student)
         session.commit()
         session.refresh(student)
@@ -0,0 +1,29 @@
+import sys
+
+import migrations
+from database import engine, create_db_and_tables
+
+# Applies pending schema migrations to DATABASE_URL (replaces the old
+# migrate_students.py / fix_db.py scripts). The server also runs this at startup.
+#
+#   python migrate.py            upgrade to the latest revision
+#   python migrate.py current    show the database's revision
+#   python migrate.py history    list all revisions
+
+
+def main(command="upgrade"):
+    if command == "upgrade":
+        create_db_and_tables()
+        print(f"Database is at revision {migrations.current_revision(engine)}")
+    elif command == "current":
+        print(migrations.current_revision(engine) or "none")
+    elif command == "history":
+        for module in migrations.load_revisions():
+            print(f"{module.revision}  {module.description}")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,102 @@
+"""
+Ordered schema migrations for existing databases, in the spirit of Alembic.
+
+Each `rNNNN_*.py` module in this package is a revision with `revision`,
+`down_revision`, `description` and an `upgrade(conn)` function. Applied
+revisions are recorded in the `schema_version` table, so every revision runs
+once per database, even when several app workers start up at once: each
+revision is checked and applied under a database-wide lock. Operations are
+idempotent (see ops.py) because fresh databases already get the full schema
+from `SQLModel.metadata.create_all`.
+"""
+import importlib
+import pkgutil
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+SCHEMA_VERSION_TABLE = "schema_version"
+# pg_advisory_xact_lock key shared by every process migrating one database
+MIGRATION_LOCK_KEY = 0x6D696772  # "migr"
+# How long a process waits for another one's migration before giving up
+MIGRATION_LOCK_TIMEOUT_SECONDS = 600
+
+
+def load_revisions() -> list:
+    """Revision modules in upgrade order, checked to form a single chain."""
+    modules = [
+        importlib.import_module(f"{__name__}.{info.name}")
+        for info in pkgutil.iter_modules(__path__)
+        if info.name.startswith("r")
+    ]
+    modules.sort(key=lambda module: module.revision)
+    previous = None
+    for module in modules:
+        if module.down_revision != previous:
+            raise RuntimeError(f"Migration {module.revision} expects {module.down_revision}, found {previous}")
+        previous = module.revision
+    return modules
+
+
+def _lock(conn):
+    """
+    Holds the migration lock until `conn`'s transaction ends: a transaction
+    advisory lock on PostgreSQL, the write lock (BEGIN IMMEDIATE) on SQLite.
+    Must run before anything else in the transaction.
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    elif conn.dialect.name == "sqlite":
+        # Each attempt waits out the busy timeout; a long migration may need several
+        deadline = time.monotonic() + MIGRATION_LOCK_TIMEOUT_SECONDS
+        while True:
+            try:
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                return
+            except OperationalError as e:
+                if "locked" not in str(e) or time.monotonic() > deadline:
+                    raise
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} "
+        "(revision VARCHAR(32) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+def applied_revisions(conn) -> List[str]:
+    _ensure_version_table(conn)
+    return [row[0] for row in conn.execute(text(f"SELECT revision FROM {SCHEMA_VERSION_TABLE} ORDER BY revision"))]
+
+
+def current_revision(engine) -> Optional[str]:
+    with engine.begin() as conn:
+        applied = applied_revisions(conn)
+    return applied[-1] if applied else None
+
+
+def upgrade(engine, target: Optional[str] = None) -> List[str]:
+    """Applies pending revisions up to `target` (default: head). Returns the revisions applied."""
+    applied_now = []
+    for module in load_revisions():
+        with engine.begin() as conn:
+            # Another process may be applying this revision: wait, then check
+            _lock(conn)
+            pending = module.revision not in applied_revisions(conn)
+            if pending:
+                module.upgrade(conn)
+                conn.execute(
+                    text(f"INSERT INTO {SCHEMA_VERSION_TABLE} (revision, applied_at) VALUES (:revision, :applied_at)"),
+                    {"revision": module.revision, "applied_at": datetime.utcnow()},
+                )
+        if pending:
+            print(f"Applied migration {module.revision}: {module.description}")
+            applied_now.append(module.revision)
+        # Applied now or earlier, nothing past the target runs
+        if module.revision == target:
+            break
+    return applied_now
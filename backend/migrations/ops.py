@@ -0,0 +1,29 @@
+from sqlalchemy import inspect, text
+
+
+def has_table(conn, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+
+def has_column(conn, table: str, column: str) -> bool:
+    return any(col["name"] == column for col in inspect(conn).get_columns(table))
+
+
+def has_index(conn, table: str, index: str) -> bool:
+    return any(ix["name"] == index for ix in inspect(conn).get_indexes(table))
+
+
+def add_column(conn, table: str, column: str, definition: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN unless the column is already there. Returns True if added."""
+    if has_column(conn, table, column):
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+    return True
+
+
+def create_index(conn, table: str, index: str, columns: str, unique: bool = False) -> bool:
+    """CREATE [UNIQUE] INDEX unless an index with that name exists. `columns` is raw SQL, e.g. "a, b DESC"."""
+    if has_index(conn, table, index):
+        return False
+    conn.execute(text(f"CREATE {'UNIQUE ' if unique else ''}INDEX {index} ON {table} ({columns})"))
+    return True
@@ -0,0 +1,19 @@
+"""Notification timestamps on student (formerly fix_db.py and the first part of migrate_students.py)."""
+from datetime import datetime
+
+from sqlalchemy import text
+
+from migrations import ops
+
+revision = "0001"
+down_revision = None
+description = "student notification timestamps"
+
+
+def upgrade(conn):
+    ops.add_column(conn, "student", "last_emailed_at", "TIMESTAMP")
+    ops.add_column(conn, "student", "last_news_sent_at", "TIMESTAMP")
+    if ops.add_column(conn, "student", "last_visited_at", "TIMESTAMP"):
+        # Treat existing students as just visited so they aren't flagged inactive at once
+        conn.execute(text("UPDATE student SET last_visited_at = :now WHERE last_visited_at IS NULL"),
+                     {"now": datetime.utcnow()})
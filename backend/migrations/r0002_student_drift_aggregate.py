@@ -0,0 +1,17 @@
+"""Running drift aggregate columns on student (formerly the rest of migrate_students.py)."""
+from migrations import ops
+
+revision = "0002"
+down_revision = "0001"
+description = "student drift aggregate columns"
+
+
+def upgrade(conn):
+    for column, definition in [
+        ("relevant_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("conflicting_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("irrelevant_count", "INTEGER NOT NULL DEFAULT 0"),
+        ("drift_suggestions", "VARCHAR NOT NULL DEFAULT '[]'"),
+        ("drift_skills_version", "VARCHAR"),
+    ]:
+        ops.add_column(conn, "student", column, definition)
@@ -0,0 +1,10 @@
+"""Composite index for per-student activity history, newest first (id breaks timestamp ties)."""
+from migrations import ops
+
+revision = "0003"
+down_revision = "0002"
+description = "activity (student_id, timestamp DESC, id DESC) index"
+
+
+def upgrade(conn):
+    ops.create_index(conn, "activity", "ix_activity_student_id_timestamp", "student_id, timestamp DESC, id DESC")
@@ -0,0 +1,15 @@
+"""Schedule window and worker lease on audit jobs, for the built-in audit scheduler."""
+from migrations import ops
+
+revision = "0004"
+down_revision = "0003"
+description = "auditjob scheduled_for, lease_owner, lease_expires_at"
+
+
+def upgrade(conn):
+    if not ops.has_table(conn, "auditjob"):
+        return
+    ops.add_column(conn, "auditjob", "scheduled_for", "TIMESTAMP")
+    ops.add_column(conn, "auditjob", "lease_owner", "VARCHAR")
+    ops.add_column(conn, "auditjob", "lease_expires_at", "TIMESTAMP")
+    ops.create_index(conn, "auditjob", "ix_auditjob_scheduled_for", "scheduled_for", unique=True)
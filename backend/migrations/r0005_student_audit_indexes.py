@@ -0,0 +1,12 @@
+"""Indexes behind the audit's set-based eligibility queries."""
+from migrations import ops
+
+revision = "0005"
+down_revision = "0004"
+description = "student audit eligibility indexes"
+
+
+def upgrade(conn):
+    for column in ("current_drift_score", "last_emailed_at", "last_visited_at", "last_news_sent_at",
+                   "drift_skills_version"):
+        ops.create_index(conn, "student", f"ix_student_{column}", column)
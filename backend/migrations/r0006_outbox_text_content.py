@@ -0,0 +1,11 @@
+"""Plain-text alternative part for queued emails."""
+from migrations import ops
+
+revision = "0006"
+down_revision = "0005"
+description = "outboxemail text_content"
+
+
+def upgrade(conn):
+    if ops.has_table(conn, "outboxemail"):
+        ops.add_column(conn, "outboxemail", "text_content", "TEXT")
@@ -0,0 +1,11 @@
+"""Category on queued emails, so mail can be routed to different transports."""
+from migrations import ops
+
+revision = "0007"
+down_revision = "0006"
+description = "outboxemail category"
+
+
+def upgrade(conn):
+    if ops.has_table(conn, "outboxemail"):
+        ops.add_column(conn, "outboxemail", "category", "VARCHAR")
@@ -0,0 +1,16 @@
+"""Per-student drift feature sums for the multi-feature drift model."""
+from sqlalchemy import text
+
+from migrations import ops
+
+revision = "0008"
+down_revision = "0007"
+description = "student drift feature sums"
+
+
+def upgrade(conn):
+    ops.add_column(conn, "student", "drift_feature_sums", "VARCHAR")
+    ops.add_column(conn, "student", "drift_sums_as_of", "TIMESTAMP")
+    # Existing aggregates have no sums yet: mark them stale so they are rebuilt
+    # from the activity history (lazily, or by the next audit)
+    conn.execute(text("UPDATE student SET drift_skills_version = NULL WHERE drift_feature_sums IS NULL"))
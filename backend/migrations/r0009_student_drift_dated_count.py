@@ -0,0 +1,12 @@
+"""Drift feature sums gain a count of activities with a timestamp."""
+from sqlalchemy import text
+
+revision = "0009"
+down_revision = "0008"
+description = "student drift sums dated count"
+
+
+def upgrade(conn):
+    # Stored sums have one column fewer than featurizer.SUM_NAMES now: mark
+    # every aggregate stale so it is rebuilt from the activity history
+    conn.execute(text("UPDATE student SET drift_skills_version = NULL"))
@@ -0,0 +1,15 @@
+"""When a stored drift score must be recomputed because it aged."""
+from sqlalchemy import text
+
+from migrations import ops
+
+revision = "0010"
+down_revision = "0009"
+description = "student drift rescore time"
+
+
+def upgrade(conn):
+    ops.add_column(conn, "student", "drift_rescore_at", "TIMESTAMP")
+    ops.create_index(conn, "student", "ix_student_drift_rescore_at", "drift_rescore_at")
+    # Existing scores are as of their last update: due for a rescore right away
+    conn.execute(text("UPDATE student SET drift_rescore_at = drift_sums_as_of"))
@@ -0,0 +1,12 @@
+"""Per-chunk checkpoint on audit shards, so a retried or resumed shard skips committed chunks."""
+from migrations import ops
+
+revision = "0011"
+down_revision = "0010"
+description = "auditshard resume_after_id"
+
+
+def upgrade(conn):
+    if not ops.has_table(conn, "auditshard"):
+        return
+    ops.add_column(conn, "auditshard", "resume_after_id", "INTEGER NOT NULL DEFAULT 0")
@@ -0,0 +1,13 @@
+"""Delivery lease on outbox rows, so two mail queues on one database never send the same row."""
+from migrations import ops
+
+revision = "0012"
+down_revision = "0011"
+description = "outboxemail lease_owner, lease_until"
+
+
+def upgrade(conn):
+    if not ops.has_table(conn, "outboxemail"):
+        return
+    ops.add_column(conn, "outboxemail", "lease_owner", "VARCHAR")
+    ops.add_column(conn, "outboxemail", "lease_until", "TIMESTAMP")
@@ -0,0 +1,12 @@
+"""Persisted login email debounce, shared by every app worker."""
+from migrations import ops
+
+revision = "0013"
+down_revision = "0012"
+description = "student last_login_email_at"
+
+
+def upgrade(conn):
+    if not ops.has_table(conn, "student"):
+        return
+    ops.add_column(conn, "student", "last_login_email_at", "TIMESTAMP")
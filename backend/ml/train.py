@@ -1,71 +1,284 @@
+import argparse
+import hashlib
 import pandas as pd
 import numpy as np
 import os
-from sklearn.ensemble import RandomForestClassifier
+from datetime import datetime
+from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
+from sklearn.metrics import classification_report, roc_auc_score
+from sklearn.preprocessing import StandardScaler
 import joblib
-import random
+import sys
 
-# Configuration
-CAREERS = ["Data Scientist", "Frontend Dev", "Backend Dev"]
-SKILLS_MAP = {
-    "Data Scientist": ["Python", "Pandas", "Scikit-Learn", "SQL", "Statistics", "TensorFlow", "Keras", "Tableau", "PowerBI"],
-    "Frontend Dev": ["React", "CSS", "HTML", "JavaScript", "Figma", "Redux", "Tailwind", "Next.js", "TypeScript"],
-    "Backend Dev": ["FastAPI", "Docker", "PostgreSQL", "System Design", "Go", "Redis", "Kafka", "Microservices", "Flask"]
-}
+# drift_model, drift_curve and featurizer live next to main.py, shared with serving
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drift_curve import curve_from_forest
+from drift_model import model_from_sklearn
+from featurizer import CAREER_SKILLS, FEATURE_NAMES, SUM_NAMES, get_featurizer
+from generate_dataset import AS_OF as DATASET_AS_OF
+from model_registry import ModelRegistry
 
-def load_and_process_data(filepath="ml/data/career_data.csv"):
+DRIFT_MODEL_PATH = "drift_model.npz"
+# Legacy one-feature forest and its exported curve
+MODEL_PATH = "drift_model.pkl"
+CURVE_PATH = "drift_curve.npz"
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "drift_models")
+
+# "type", "timestamp" and "last_visited_at" are optional: older exports
+# without them train with those features unknown
+FEATURE_COLUMNS = ["student_id", "target_career", "activity_name", "type", "timestamp", "last_visited_at", "status"]
+OPTIONAL_COLUMNS = ["type", "timestamp", "last_visited_at"]
+# Activity rows read per chunk by the streaming loaders; memory is bounded by
+# this plus one small row per student, whatever the dataset size
+CHUNK_ROWS = int(os.getenv("TRAIN_CHUNK_ROWS", 1_000_000))
+# Ground-truth labels for training on the activity table: one row per
+# student, (student_id, status) with status "Drifting" or "On Track", recorded
+# from observed outcomes. The stored drift scores are the model's own output
+# and never serve as labels. Students without a row are left out.
+DB_LABEL_TABLE = os.getenv("TRAIN_LABEL_TABLE", "drift_label")
+
+def partial_features(df: pd.DataFrame, as_of: datetime) -> pd.DataFrame:
+    """Per-student featurizer sums (SUM_NAMES) for one chunk of activity rows."""
+    df = df.assign(**{column: None for column in OPTIONAL_COLUMNS if column not in df})
+    # groupby(sort=False) lists students in order of appearance, like factorize
+    groups, student_ids = pd.factorize(df["student_id"])
+    stats = df.groupby("student_id", sort=False).agg(
+        target_career=("target_career", "first"),
+        status=("status", "first"),
+        last_visited_at=("last_visited_at", "max"),
+    )
+    # The same featurizer serving scores with
+    sums = get_featurizer(CAREER_SKILLS).activity_sums(
+        groups, df["activity_name"], df["target_career"], df["type"], df["timestamp"], len(student_ids), as_of
+    )
+    return stats.assign(**dict(zip(SUM_NAMES, sums.T)))
+
+def combine_partials(partials) -> pd.DataFrame:
+    """Merges per-chunk sums of students whose activities span several chunks."""
+    partials = list(partials)
+    if len(partials) == 1:
+        return partials[0]
+    combined = pd.concat(partials)
+    for column in ("target_career", "status"):
+        # Chunks carry their own categories; compare the labels, not the codes
+        combined[column] = combined[column].astype(object)
+    aggregations = {"target_career": "first", "status": "first", "last_visited_at": "max"}
+    aggregations.update({name: "sum" for name in SUM_NAMES})
+    return combined.groupby(level=0, sort=False).agg(aggregations)
+
+def finalize_features(stats: pd.DataFrame, as_of: datetime) -> pd.DataFrame:
+    stats = stats.sort_index()
+    features = get_featurizer(CAREER_SKILLS).features_from_sums(
+        stats[SUM_NAMES].to_numpy(), pd.to_datetime(stats["last_visited_at"]).to_numpy(), as_of
+    )
+    return pd.concat([
+        pd.DataFrame({"target_career": stats["target_career"].astype(object).to_numpy()}),
+        pd.DataFrame(features, columns=FEATURE_NAMES),
+        pd.DataFrame({"is_drifting": (stats["status"] == "Drifting").astype(int).to_numpy()}),
+    ], axis=1)
+
+def empty_features() -> pd.DataFrame:
+    return pd.DataFrame(columns=["target_career", *FEATURE_NAMES, "is_drifting"])
+
+def extract_features(df: pd.DataFrame, as_of: datetime = DATASET_AS_OF) -> pd.DataFrame:
+    """Per-student FEATURE_NAMES and drift label from one row per activity."""
+    if df.empty:
+        return empty_features()
+    return finalize_features(partial_features(df, as_of), as_of)
+
+def extract_features_streaming(chunks, as_of: datetime = DATASET_AS_OF) -> pd.DataFrame:
+    """
+    extract_features over an iterable of activity DataFrames, holding only one
+    chunk plus the per-student sums at a time. A student's activities may
+    be split across chunks.
+    """
+    partials, pending_rows, chunk_rows = [], 0, 0
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        partials.append(partial_features(chunk, as_of))
+        pending_rows += len(partials[-1])
+        chunk_rows = max(chunk_rows, len(chunk))
+        # Fold the per-chunk sums into one row per student before they outgrow a chunk
+        if len(partials) > 2 and pending_rows > chunk_rows:
+            partials = [combine_partials(partials)]
+            pending_rows = 0
+    if not partials:
+        return empty_features()
+    return finalize_features(combine_partials(partials), as_of)
+
+def iter_csv_chunks(filepath, chunk_rows=CHUNK_ROWS):
+    header = pd.read_csv(filepath, nrows=0).columns
+    return pd.read_csv(
+        filepath,
+        usecols=[column for column in FEATURE_COLUMNS if column in header],
+        dtype={"student_id": "int64", "target_career": "category", "activity_name": "category",
+               "type": "category", "status": "category"},
+        parse_dates=[column for column in ("timestamp", "last_visited_at") if column in header],
+        chunksize=chunk_rows,
+    )
+
+def iter_parquet_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Streams a Parquet file or a (career-partitioned) Parquet dataset directory in record batches."""
+    try:
+        import pyarrow.dataset as ds
+    except ImportError:
+        raise RuntimeError("Reading Parquet training data needs pyarrow: pip install pyarrow")
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    columns = [column for column in FEATURE_COLUMNS if column in dataset.schema.names]
+    for batch in dataset.to_batches(columns=columns, batch_size=chunk_rows):
+        yield batch.to_pandas()
+
+def iter_activity_table_chunks(database_url=None, chunk_rows=CHUNK_ROWS, label_table=DB_LABEL_TABLE):
+    """
+    Streams (student, activity) rows straight from the activity table with a
+    server-side cursor, so the export is never held in memory. Labels come
+    from `label_table` (see DB_LABEL_TABLE), which must exist.
+    """
+    from sqlalchemy import column, inspect, select, table
+    from database import build_engine, sqlite_url
+    from models import Activity, Student
+
+    engine = build_engine(database_url or sqlite_url)
+    try:
+        inspector = inspect(engine)
+        if not inspector.has_table(label_table):
+            raise RuntimeError(f"Training on the activity table needs ground-truth labels: no {label_table!r} table "
+                               f"with (student_id, status) rows; pass --labels or set TRAIN_LABEL_TABLE")
+        missing = {"student_id", "status"} - {c["name"] for c in inspector.get_columns(label_table)}
+        if missing:
+            raise RuntimeError(f"Label table {label_table!r} has no {', '.join(sorted(missing))} column")
+
+        labels = table(label_table, column("student_id"), column("status"))
+        statement = (
+            select(
+                Activity.student_id,
+                Student.target_career,
+                Activity.name.label("activity_name"),
+                Activity.type,
+                Activity.timestamp,
+                Student.last_visited_at,
+                labels.c.status,
+            )
+            .join(Student, Student.id == Activity.student_id)
+            .join(labels, labels.c.student_id == Activity.student_id)
+            .where(Student.target_career.is_not(None), Student.target_career != "")
+        )
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(statement)
+            for rows in result.partitions():
+                yield pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+    finally:
+        engine.dispose()
+
+def load_and_process_data(filepath="ml/data/career_data.csv", chunk_rows=CHUNK_ROWS, as_of=DATASET_AS_OF):
+    """Features from a CSV file or a Parquet file/dataset directory, read in chunks."""
     if not os.path.exists(filepath):
         print(f"Dataset not found at {filepath}")
         return pd.DataFrame()
 
-    df = pd.read_csv(filepath)
-    
-    # Feature Engineering: Aggregate by student
-    student_stats = []
-    
-    for student_id, group in df.groupby("student_id"):
-        target = group["target_career"].iloc[0]
-        status = group["status"].iloc[0]
-        activities = group["activity_name"].tolist()
-        
-        # Calculate Relevance
-        relevant_skills = SKILLS_MAP.get(target, [])
-        relevant_count = sum(1 for a in activities if a in relevant_skills)
-        relevant_ratio = relevant_count / len(activities) if len(activities) > 0 else 0
-        
-        student_stats.append({
-            "target_career": target,
-            "relevant_ratio": relevant_ratio,
-            "is_drifting": 1 if status == "Drifting" else 0
-        })
-        
-    return pd.DataFrame(student_stats)
-
-def train():
-    print("Loading Dataset from CSV...")
-    df = load_and_process_data()
+    if os.path.isdir(filepath) or filepath.endswith(".parquet"):
+        return extract_features_streaming(iter_parquet_chunks(filepath, chunk_rows), as_of)
+    return extract_features_streaming(iter_csv_chunks(filepath, chunk_rows), as_of)
+
+def training_data_hash(df: pd.DataFrame) -> str:
+    """SHA-256 of the featurized training frame, whichever source it came from."""
+    columns = ["target_career", *FEATURE_NAMES, "is_drifting"]
+    return hashlib.sha256(pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes()).hexdigest()
+
+def impute_training_means(X_train: np.ndarray, *others: np.ndarray):
+    """Replaces NaNs with the column means of X_train's observed values (0 for a column with none)."""
+    observed = ~np.isnan(X_train)
+    counts = observed.sum(axis=0)
+    means = np.divide(np.where(observed, X_train, 0.0).sum(axis=0), counts, out=np.zeros(X_train.shape[1]),
+                      where=counts > 0)
+    return [np.where(np.isnan(X), means, X) for X in (X_train, *others)]
+
+def train(df=None, registry_dir=MODEL_REGISTRY_DIR, promote=False):
+    if df is None:
+        print("Loading Dataset from CSV...")
+        df = load_and_process_data()
     
     if df.empty:
         print("No data to train.")
         return
 
-    X = df[["relevant_ratio"]]
-    y = df["is_drifting"]
+    X = df[FEATURE_NAMES].to_numpy(dtype=np.float64)
+    y = df["is_drifting"].to_numpy()
     
     print(f"Training Model on {len(df)} student profiles...")
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # Fill features a student has no data for (NaN) with the training mean,
+    # which the scaler then records: DriftModel imputes the same way at serving
+    X_train, X_test = impute_training_means(X_train, X_test)
     
-    clf = RandomForestClassifier(n_estimators=100)
-    clf.fit(X_train, y_train)
+    scaler = StandardScaler().fit(X_train)
+    clf = LogisticRegression(max_iter=1000)
+    clf.fit(scaler.transform(X_train), y_train)
     
     print("Evaluation:")
-    print(classification_report(y_test, clf.predict(X_test)))
+    print(classification_report(y_test, clf.predict(scaler.transform(X_test))))
+    auc = roc_auc_score(y_test, clf.predict_proba(scaler.transform(X_test))[:, 1])
+    # What relevant_ratio alone (the previous model's only input) can separate
+    baseline_auc = roc_auc_score(y_test, -X_test[:, FEATURE_NAMES.index("relevant_ratio")])
+    print(f"ROC AUC: {auc:.3f} (relevant_ratio alone: {baseline_auc:.3f})")
     
     # Save Model
-    joblib.dump(clf, "drift_model.pkl")
-    print("Model saved to drift_model.pkl")
+    model = model_from_sklearn(scaler, clf, FEATURE_NAMES, metadata={
+        "source": "LogisticRegression",
+        "skills_version": get_featurizer(CAREER_SKILLS).version,
+        "trained_students": int(len(X_train)),
+        "roc_auc": round(float(auc), 4),
+    })
+    model.save(DRIFT_MODEL_PATH)
+    print(f"Model saved to {DRIFT_MODEL_PATH}")
+
+    # Running servers pick a version up once it is promoted
+    registry = ModelRegistry(registry_dir)
+    version = registry.publish(DRIFT_MODEL_PATH, FEATURE_NAMES, training_data_hash(df), metrics={
+        "roc_auc": round(float(auc), 4),
+        "baseline_roc_auc": round(float(baseline_auc), 4),
+        "test_students": int(len(X_test)),
+    }, metadata=model.metadata)
+    if promote:
+        registry.promote(version)
+    print(f"Published {version} to {registry_dir}" + (" and promoted it" if promote else
+                                                      f"; promote with `python model_registry.py promote {version}`"))
+
+def export_curve(clf=None):
+    """
+    Exports the legacy one-feature forest as a compact NumPy curve; serving
+    falls back to it only when drift_model.npz is missing.
+    """
+    if clf is None:
+        clf = joblib.load(MODEL_PATH)
+    curve = curve_from_forest(clf)
+    curve.save(CURVE_PATH)
+    print(f"Drift curve with {len(curve.knots)} knots saved to {CURVE_PATH}")
 
 if __name__ == "__main__":
-    train()
+    parser = argparse.ArgumentParser(description="Train the drift model")
+    parser.add_argument("--export-curve", action="store_true",
+                        help="re-export the curve from the existing drift_model.pkl without retraining")
+    parser.add_argument("--data", default="ml/data/career_data.csv",
+                        help="CSV file, Parquet file or career-partitioned Parquet directory")
+    parser.add_argument("--from-db", nargs="?", const="", metavar="DATABASE_URL",
+                        help="train on the activity table instead (default: DATABASE_URL)")
+    parser.add_argument("--labels", default=DB_LABEL_TABLE, metavar="TABLE",
+                        help="with --from-db, the table of (student_id, status) ground-truth labels")
+    parser.add_argument("--as-of", type=datetime.fromisoformat,
+                        help="featurize as of this UTC time (default: the synthetic dataset's, or now with --from-db)")
+    parser.add_argument("--registry", default=MODEL_REGISTRY_DIR, help="model registry to publish the new version to")
+    parser.add_argument("--promote", action="store_true", help="serve the new version right away")
+    args = parser.parse_args()
+
+    if args.export_curve:
+        export_curve()
+    elif args.from_db is not None:
+        print("Streaming activities from the database...")
+        train(extract_features_streaming(iter_activity_table_chunks(args.from_db or None, label_table=args.labels),
+                                         args.as_of or datetime.utcnow()), args.registry, args.promote)
+    else:
+        print(f"Loading dataset from {args.data}...")
+        train(load_and_process_data(args.data, as_of=args.as_of or DATASET_AS_OF), args.registry, args.promote)
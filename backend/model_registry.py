@@ -0,0 +1,215 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from typing import List, Optional
+
+# Versioned drift model artifacts, so a retrained model can be shipped to
+# running workers without restarting them:
+#
+#   <root>/versions/v0001/model.npz       the DriftModel artifact
+#   <root>/versions/v0001/manifest.json   feature schema, training data hash,
+#                                         metrics and the artifact's SHA-256
+#   <root>/CURRENT                        the promoted version and the ones
+#                                         it replaced, newest first
+#
+# Versions are immutable once published; promote and rollback only rewrite
+# CURRENT, through a rename, so a worker reads either the old pointer or the
+# new one. Workers poll CURRENT (main.get_model) and swap the model in.
+#
+#   python model_registry.py                 list versions
+#   python model_registry.py promote v0003   make v0003 the served model
+#   python model_registry.py rollback        go back to the previous version
+#   python model_registry.py verify v0003    check the artifact's checksum
+
+ARTIFACT = "model.npz"
+MANIFEST = "manifest.json"
+CURRENT = "CURRENT"
+
+
+class ChecksumMismatch(ValueError):
+    """The artifact on disk is not the one the manifest was written for."""
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _check_sha256(actual: str, manifest: dict):
+    if actual != manifest["sha256"]:
+        raise ChecksumMismatch(f"artifact checksum {actual[:12]} does not match its manifest ({manifest['sha256'][:12]})")
+
+
+def _write_atomic(path: str, data: dict):
+    """Writes JSON to a temporary file next to `path` and renames it over `path`."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class ModelRegistry:
+    def __init__(self, root: str):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+
+    def _version_dir(self, version: str) -> str:
+        if os.path.basename(version) != version or not version.startswith("v"):
+            raise ValueError(f"Invalid model version {version!r}")
+        return os.path.join(self.versions_dir, version)
+
+    def versions(self) -> List[str]:
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self.versions_dir) if name.startswith("v"))
+
+    def manifest(self, version: str) -> dict:
+        path = os.path.join(self._version_dir(version), MANIFEST)
+        if not os.path.exists(path):
+            raise KeyError(f"Unknown model version {version}")
+        with open(path) as f:
+            return json.load(f)
+
+    def publish(self, model_path: str, feature_names: List[str], training_data_hash: Optional[str] = None,
+                metrics: Optional[dict] = None, metadata: Optional[dict] = None) -> str:
+        """
+        Copies a saved DriftModel into a new version and returns its name. The
+        version is staged under a temporary name and renamed into place, so it
+        never appears half written; it is not served until promoted.
+        """
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.versions_dir, prefix=".staging-")
+        try:
+            artifact = os.path.join(staging, ARTIFACT)
+            shutil.copyfile(model_path, artifact)
+            with open(artifact, "rb") as f:
+                os.fsync(f.fileno())
+            manifest = {
+                "sha256": file_sha256(artifact),
+                "feature_names": list(feature_names),
+                "training_data_hash": training_data_hash,
+                "metrics": metrics or {},
+                "metadata": metadata or {},
+                "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            }
+            while True:
+                existing = self.versions()
+                version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+                manifest["version"] = version
+                _write_atomic(os.path.join(staging, MANIFEST), manifest)
+                try:
+                    # rename() refuses a non-empty target: a concurrent publish took this number
+                    os.rename(staging, self._version_dir(version))
+                    return version
+                except OSError:
+                    if not os.path.isdir(self._version_dir(version)):
+                        raise
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def pointer(self) -> dict:
+        """{"version": promoted version or None, "previous": [...]}."""
+        try:
+            with open(os.path.join(self.root, CURRENT)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": None, "previous": []}
+
+    def current(self) -> Optional[str]:
+        return self.pointer()["version"]
+
+    def promote(self, version: str):
+        """Makes `version` the served model once its artifact checks out."""
+        self.verify(version)
+        pointer = self.pointer()
+        if pointer["version"] == version:
+            return
+        previous = [pointer["version"]] + pointer["previous"] if pointer["version"] else pointer["previous"]
+        self._set_pointer(version, previous)
+
+    def rollback(self) -> str:
+        """Re-promotes the version the current one replaced and returns it."""
+        pointer = self.pointer()
+        if not pointer["previous"]:
+            raise ValueError("No earlier model version to roll back to")
+        version, *previous = pointer["previous"]
+        self.verify(version)
+        self._set_pointer(version, previous)
+        return version
+
+    def _set_pointer(self, version: str, previous: List[str]):
+        _write_atomic(os.path.join(self.root, CURRENT), {
+            "version": version,
+            "previous": previous,
+            "promoted_at": datetime.utcnow().isoformat(timespec="seconds"),
+        })
+
+    def verify(self, version: str) -> dict:
+        """Returns the version's manifest, raising ChecksumMismatch if its artifact changed."""
+        manifest = self.manifest(version)
+        _check_sha256(file_sha256(os.path.join(self._version_dir(version), ARTIFACT)), manifest)
+        return manifest
+
+    def load(self, version: str, feature_names: List[str]):
+        """
+        Loads a version as a DriftModel. The artifact is memory-mapped once and
+        both hashed and parsed from that mapping, so the checked bytes are the
+        loaded bytes even if the file is replaced meanwhile.
+        """
+        from drift_model import DriftModel
+
+        manifest = self.manifest(version)
+        if manifest["feature_names"] != list(feature_names):
+            raise ValueError("trained on a different feature schema; retrain with ml/train.py")
+        with open(os.path.join(self._version_dir(version), ARTIFACT), "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            _check_sha256(hashlib.sha256(mapped).hexdigest(), manifest)
+            model = DriftModel.load(io.BytesIO(mapped), feature_names)
+        model.metadata = {**model.metadata, "version": version}
+        return model
+
+
+def main(root: str, command: str = "list", *args):
+    registry = ModelRegistry(root)
+    if command == "list":
+        current = registry.current()
+        for version in registry.versions():
+            manifest = registry.manifest(version)
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  {manifest['created_at']}  data {str(manifest['training_data_hash'])[:12]}"
+                  f"  {json.dumps(manifest['metrics'])}")
+    elif command == "promote" and args:
+        registry.promote(args[0])
+        print(f"Promoted {args[0]}")
+    elif command == "rollback":
+        print(f"Rolled back to {registry.rollback()}")
+    elif command == "verify" and args:
+        registry.verify(args[0])
+        print(f"{args[0]}: checksum OK")
+    else:
+        print(f"Unknown command: {' '.join((command, *args))}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main(os.getenv("MODEL_REGISTRY_DIR", "drift_models"), *sys.argv[1:3])
+    except (KeyError, ValueError) as e:
+        print(f"{' '.join(sys.argv[1:3])} failed: {e}")
+        sys.exit(1)
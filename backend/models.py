@@ -1,4 +1,5 @@
 from typing import Optional, List
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel, Relationship
 from datetime import datetime
 
@@ -8,14 +9,32 @@ class Student(SQLModel, table=True):
     email: str = Field(unique=True, index=True)
     hashed_password: str
     target_career: Optional[str] = Field(default="")  # e.g., "Data Scientist", "Full Stack Dev"
-    current_drift_score: float = 0.0
-    last_emailed_at: Optional[datetime] = Field(default=None)
-    last_visited_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
-    last_news_sent_at: Optional[datetime] = Field(default=None)
+    # Indexed: the audit selects its drift, inactivity and news candidates on these
+    current_drift_score: float = Field(default=0.0, index=True)
+    last_emailed_at: Optional[datetime] = Field(default=None, index=True)
+    last_visited_at: Optional[datetime] = Field(default_factory=datetime.utcnow, index=True)
+    last_news_sent_at: Optional[datetime] = Field(default=None, index=True)
+    # Login notifications are debounced on this, shared by every app worker
+    last_login_email_at: Optional[datetime] = Field(default=None)
+
+    # Running drift aggregate, updated as activities are added
+    relevant_count: int = 0
+    conflicting_count: int = 0
+    irrelevant_count: int = 0
+    drift_suggestions: str = "[]"  # JSON list of unique suggestions
+    drift_skills_version: Optional[str] = Field(default=None, index=True)  # Skill table the counts were computed with
+    drift_feature_sums: Optional[str] = None  # JSON list of featurizer.SUM_NAMES, as of drift_sums_as_of
+    drift_sums_as_of: Optional[datetime] = None
+    # When the score, aging without new activities or visits, could first pass
+    # the drift email threshold: the audit rescores students once it is due
+    drift_rescore_at: Optional[datetime] = Field(default=None, index=True)
     
     activities: List["Activity"] = Relationship(back_populates="student")
 
 class Activity(SQLModel, table=True):
+    # Per-student history newest first: activity pages and windowed drift scoring
+    __table_args__ = (Index("ix_activity_student_id_timestamp", "student_id", text("timestamp DESC"), text("id DESC")),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     student_id: int = Field(foreign_key="student.id")
     name: str # e.g., "React Course", "LeetCode Graph Problem"
@@ -24,3 +43,54 @@ class Activity(SQLModel, table=True):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     
     student: Optional[Student] = Relationship(back_populates="activities")
+
+class OutboxEmail(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    to_email: str
+    subject: str
+    html_content: str
+    text_content: Optional[str] = Field(default=None)  # text/plain alternative part
+    category: Optional[str] = Field(default=None)  # Template name, e.g. "news"; selects the transport route
+    status: str = Field(default="pending", index=True)  # "pending", "sending", "sent", "failed"
+    # While "sending": the worker that claimed the row and until when; a row
+    # whose lease ran out (its worker died mid-send) is claimable again
+    lease_owner: Optional[str] = Field(default=None)
+    lease_until: Optional[datetime] = Field(default=None)
+    attempts: int = 0
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = Field(default=None)
+
+class AuditJob(SQLModel, table=True):
+    id: str = Field(primary_key=True)  # uuid4 hex, returned by POST /audit_drift
+    status: str = Field(default="queued", index=True)  # "queued", "running", "completed", "failed"
+    shard_size: int
+    total_shards: Optional[int] = Field(default=None)  # Set once the student id range is partitioned
+    total_students: int = 0
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = Field(default=None)
+    finished_at: Optional[datetime] = Field(default=None)
+    # Schedule window this job was created for; unique, so one worker wins each window
+    scheduled_for: Optional[datetime] = Field(default=None, unique=True, index=True)
+    # Worker currently running the job; others may take over once the lease expires
+    lease_owner: Optional[str] = Field(default=None)
+    lease_expires_at: Optional[datetime] = Field(default=None)
+
+class AuditShard(SQLModel, table=True):
+    # One id range of an audit job. Each chunk of students commits together with
+    # its emails and the shard's running totals and resume_after_id, so a retried
+    # or resumed shard continues after the last committed chunk; "done" is final
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job_id: str = Field(foreign_key="auditjob.id", index=True)
+    start_id: int  # inclusive
+    end_id: int  # inclusive
+    status: str = Field(default="pending")  # "pending", "done"
+    processed_students: int = 0
+    drift_emails: int = 0
+    inactivity_emails: int = 0
+    news_emails: int = 0
+    details: str = "[]"  # JSON list of per-student reports
+    resume_after_id: int = 0  # Last student id of the last committed chunk
+    finished_at: Optional[datetime] = Field(default=None)
@@ -0,0 +1,393 @@
+import asyncio
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+TAG_RE = re.compile('<[^<]+?>')
+
+# Verified Expert & Update Items (March 2026)
+VERIFIED_NEWS = [
+    {
+        "title": "OpenAI Launches GPT-5.4 with Native 'Computer Use'",
+        "description": "Released March 5, 2026, the new model can navigate UIs and execute multi-step workflows autonomously, outperforming human baselines in professional benchmarks.",
+        "url": "https://openai.com/news/gpt-5-4-announcement",
+        "urlToImage": "",
+        "publishedAt": "2026-03-05T09:00:00Z",
+        "source": "OpenAI Blog",
+        "category": "Expert"
+    },
+    {
+        "title": "Nvidia's Vera Rubin Platform Ships First Samples",
+        "description": "The new Rubin architecture, succeeding Blackwell, promises 5x faster AI workload performance with the NVL72 system. Production shipments expected in H2 2026.",
+        "url": "https://nvidianews.nvidia.com/news/rubin-architecture-update",
+        "urlToImage": "",
+        "publishedAt": "2026-03-08T11:00:00Z",
+        "source": "Nvidia News",
+        "category": "Update"
+    },
+    {
+        "title": "Apple MacBook Neo Debuts with A18 Pro for $599",
+        "description": "Apple disrupts the budget laptop market with the MacBook Neo. Powered by the A18 Pro chip, it brings premium AI capabilities to a more affordable price point.",
+        "url": "https://apple.com/macbook-neo",
+        "urlToImage": "",
+        "publishedAt": "2026-03-04T15:00:00Z",
+        "source": "Apple Newsroom",
+        "category": "Update"
+    },
+    {
+        "title": "The Rise of 'Agentic AI' in Enterprise Workflows",
+        "description": "Gartner reports that 40% of enterprise apps will feature task-specific AI agents by the end of 2026, shifting focus from tools to autonomous agents.",
+        "url": "https://gartner.com/news/agentic-ai-2026",
+        "urlToImage": "",
+        "publishedAt": "2026-03-07T10:30:00Z",
+        "source": "Gartner",
+        "category": "Expert"
+    }
+]
+
+# Deterministic unique image assignment for 8 items
+MASTER_IMAGE_IDS = [
+    "1518770660439-4636190af475", # Circuits
+    "1550751827-4bd374c3f58b", # Mesh
+    "1485827404703-89b55fcc595e", # Robot
+    "1531297484001-80022131f5a1", # Workspace
+    "1451187580459-43490279c0fa", # Globe
+    "1581091226825-a6a2a5aee158", # Hardware
+    "1677442136019-21780ecad995", # AI Brain
+    "1496181133206-80ce9b88a853"  # MacBook
+]
+
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+RSS_ITEM_TAG = "item"
+ATOM_ENTRY_TAG = f"{ATOM_NS}entry"
+
+
+class Feed(NamedTuple):
+    source: str
+    url: str
+    timeout: float = 5.0
+    limit: int = 4
+
+
+DEFAULT_FEEDS = [Feed("TechCrunch", "https://techcrunch.com/feed/")]
+
+
+def parse_feeds(value: str, default_timeout: float = 5.0) -> List[Feed]:
+    """
+    Parses a NEWS_FEEDS style string: entries separated by ';', each
+    'Source|url' or 'Source|url|timeout_seconds'.
+    """
+    feeds = []
+    for entry in value.split(";"):
+        parts = [part.strip() for part in entry.split("|")]
+        if len(parts) < 2 or not parts[1]:
+            continue
+        timeout = float(parts[2]) if len(parts) > 2 and parts[2] else default_timeout
+        feeds.append(Feed(parts[0], parts[1], timeout))
+    return feeds
+
+
+def _clean_description(description: Optional[str]) -> str:
+    # Simple cleanup of HTML tags in description
+    return TAG_RE.sub('', description or "")[:150] + "..."
+
+
+def _text(element, tag: str) -> Optional[str]:
+    """The child's stripped text, or None when the child is missing or empty."""
+    child = element.find(tag)
+    if child is None or child.text is None:
+        return None
+    return child.text.strip() or None
+
+
+# Items without a title or link can't be shown (NewsItem requires both), so
+# the parsers skip them and return None
+def _rss_item(item, source: str) -> Optional[dict]:
+    title, url = _text(item, "title"), _text(item, "link")
+    if not title or not url:
+        return None
+    return {
+        "title": title,
+        "description": _clean_description(_text(item, "description")),
+        "url": url,
+        "urlToImage": "", # Assigned in build_news
+        "publishedAt": _text(item, "pubDate") or "",
+        "source": source,
+        "category": "Tech"
+    }
+
+
+def _atom_entry(entry, source: str) -> Optional[dict]:
+    url = None
+    for link in entry.findall(f"{ATOM_NS}link"):
+        if link.get("rel", "alternate") == "alternate":
+            url = (link.get("href") or "").strip() or None
+            break
+    title = _text(entry, f"{ATOM_NS}title")
+    if not title or not url:
+        return None
+    return {
+        "title": title,
+        "description": _clean_description(_text(entry, f"{ATOM_NS}summary") or _text(entry, f"{ATOM_NS}content")),
+        "url": url,
+        "urlToImage": "",
+        "publishedAt": _text(entry, f"{ATOM_NS}published") or _text(entry, f"{ATOM_NS}updated") or "",
+        "source": source,
+        "category": "Tech"
+    }
+
+
+class FeedParser:
+    """
+    Incremental RSS/Atom parser: feed it body chunks as they arrive and it
+    emits items as soon as each closing tag is seen, discarding parsed
+    elements so memory doesn't grow with the feed size.
+    """
+
+    def __init__(self, source: str, limit: int):
+        self.source = source
+        self.limit = limit
+        self.items: List[dict] = []
+        self._parser = ET.XMLPullParser(events=("end",))
+
+    @property
+    def done(self) -> bool:
+        return len(self.items) >= self.limit
+
+    def feed(self, chunk: bytes):
+        self._parser.feed(chunk)
+        for _, element in self._parser.read_events():
+            if self.done:
+                break
+            if element.tag == RSS_ITEM_TAG:
+                item = _rss_item(element, self.source)
+            elif element.tag == ATOM_ENTRY_TAG:
+                item = _atom_entry(element, self.source)
+            else:
+                continue
+            element.clear()
+            if item is not None:
+                self.items.append(item)
+
+
+def parse_feed(content: bytes, source: str = "TechCrunch", limit: int = 4) -> List[dict]:
+    """Parses the top `limit` items of an RSS or Atom document into news dicts."""
+    parser = FeedParser(source, limit)
+    parser.feed(content)
+    return parser.items
+
+
+def _published_ts(item: dict) -> float:
+    value = item.get("publishedAt")
+    if not value:
+        return 0.0
+    try:
+        return parsedate_to_datetime(value).timestamp()  # RSS (RFC 822)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()  # Atom (RFC 3339)
+    except ValueError:
+        return 0.0
+
+
+def merge_feed_items(per_feed_items: List[List[dict]], limit: int = 4) -> List[dict]:
+    """Newest `limit` items across feeds, de-duplicated by URL."""
+    seen_urls = set()
+    merged = []
+    for items in per_feed_items:
+        for item in items:
+            if not item["url"] or item["url"] in seen_urls:
+                continue
+            seen_urls.add(item["url"])
+            merged.append(item)
+    merged.sort(key=_published_ts, reverse=True)
+    return merged[:limit]
+
+
+def build_news(live_items: List[dict]) -> List[dict]:
+    """Merges live items with the verified ones and assigns images."""
+    all_news = [dict(item) for item in live_items + VERIFIED_NEWS]
+    for i, item in enumerate(all_news):
+        if i < len(MASTER_IMAGE_IDS):
+            item["urlToImage"] = f"https://images.unsplash.com/photo-{MASTER_IMAGE_IDS[i]}?w=600&q=80"
+    return all_news[:len(MASTER_IMAGE_IDS)]
+
+
+class FeedState:
+    """Per-feed cache validators and last good items."""
+
+    def __init__(self):
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.items: List[dict] = []
+
+
+async def fetch_feed(client: "httpx.AsyncClient", feed: Feed, state: FeedState) -> bool:
+    """
+    Conditionally fetches one feed and parses it while it streams in.
+    Returns True if the feed changed. Raises on errors or timeout.
+    """
+    headers = {}
+    if state.etag:
+        headers["If-None-Match"] = state.etag
+    if state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+
+    async def _fetch():
+        async with client.stream("GET", feed.url, headers=headers, timeout=feed.timeout) as response:
+            if response.status_code == 304:
+                return False
+            response.raise_for_status()
+            parser = FeedParser(feed.source, feed.limit)
+            async for chunk in response.aiter_bytes():
+                parser.feed(chunk)
+                if parser.done:
+                    break  # Don't download the rest of the feed
+            state.items = parser.items
+            state.etag = response.headers.get("ETag")
+            state.last_modified = response.headers.get("Last-Modified")
+            return True
+
+    # Bound the whole fetch, not just each socket operation
+    return await asyncio.wait_for(_fetch(), feed.timeout)
+
+
+async def fetch_all(client: "httpx.AsyncClient", feeds: List[Feed], states: Dict[str, FeedState]) -> int:
+    """Fetches every feed concurrently. Returns how many feeds answered (200 or 304)."""
+    results = await asyncio.gather(
+        *(fetch_feed(client, feed, states[feed.url]) for feed in feeds),
+        return_exceptions=True
+    )
+    ok = 0
+    for feed, result in zip(feeds, results):
+        if isinstance(result, BaseException):
+            # Keep serving whatever we had last for this feed
+            print(f"RSS Fetch Error ({feed.source}): {result!r}")
+        else:
+            ok += 1
+    return ok
+
+
+class NewsFeedCache:
+    """
+    Keeps the aggregated feeds in memory so `/news` never waits on the network.
+
+    A background thread runs an event loop with one shared `httpx.AsyncClient`
+    and refreshes every feed concurrently every `ttl` seconds, so a refresh
+    takes as long as the slowest feed (capped by its own timeout) rather than
+    the sum. Each feed is fetched with a conditional GET (ETag /
+    If-Modified-Since), so an unchanged feed costs a 304 and no parsing. If a
+    feed is down, its last good items keep being served.
+    """
+
+    def __init__(self, feeds: List[Feed], ttl: float = 900, max_connections: int = 20):
+        self.feeds = feeds
+        self.ttl = ttl
+        self.max_connections = max_connections
+
+        self._states: Dict[str, FeedState] = {feed.url: FeedState() for feed in feeds}
+        self._news: List[dict] = build_news([])
+        self._fetched_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+
+        self._refresh_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self) -> List[dict]:
+        """Returns the cached news list; kicks off a refresh if it has gone stale."""
+        if self.is_stale() and self._retry_due() and not self._refresh_lock.locked():
+            if self._loop is not None and self._loop.is_running():
+                asyncio.run_coroutine_threadsafe(self.refresh_async(), self._loop)
+            else:
+                threading.Thread(target=self.refresh, name="news-refresh", daemon=True).start()
+        return list(self._news)
+
+    def is_stale(self) -> bool:
+        return self._fetched_at is None or time.monotonic() - self._fetched_at > self.ttl
+
+    def _retry_due(self) -> bool:
+        # While the feeds are down, don't start a new fetch on every request
+        return self._attempted_at is None or time.monotonic() - self._attempted_at > min(self.ttl, 60)
+
+    def _new_client(self) -> "httpx.AsyncClient":
+        # httpx (and its TLS setup) is only imported once the refresher starts
+        import httpx
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        return httpx.AsyncClient(limits=limits, follow_redirects=True)
+
+    def refresh(self) -> bool:
+        """Blocking refresh, usable from any thread. Returns False if every feed failed."""
+        if self._loop is not None and self._loop.is_running():
+            return asyncio.run_coroutine_threadsafe(self.refresh_async(), self._loop).result()
+        return asyncio.run(self.refresh_async())
+
+    async def refresh_async(self) -> bool:
+        if not self._refresh_lock.acquire(blocking=False):
+            return True  # Another refresh is already in flight
+        self._attempted_at = time.monotonic()
+        try:
+            if self._client is not None and asyncio.get_running_loop() is self._loop:
+                ok = await fetch_all(self._client, self.feeds, self._states)
+            else:
+                async with self._new_client() as client:
+                    ok = await fetch_all(client, self.feeds, self._states)
+
+            self._news = build_news(merge_feed_items([self._states[feed.url].items for feed in self.feeds]))
+            if ok or not self.feeds:
+                self._fetched_at = time.monotonic()
+            return bool(ok) or not self.feeds
+        finally:
+            self._refresh_lock.release()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="news-refresher", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self, ready: threading.Event):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._refresh_forever(ready))
+        finally:
+            self._loop = None
+            loop.close()
+
+    async def _refresh_forever(self, ready: threading.Event):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        async with self._new_client() as client:
+            self._client = client
+            ready.set()
+            try:
+                while not self._stop.is_set():
+                    await self.refresh_async()
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), self.ttl)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._client = None
@@ -0,0 +1,176 @@
+import asyncio
+import importlib.util
+import os
+import threading
+from concurrent.futures import BrokenExecutor
+from typing import Optional, Tuple
+
+# Password hashing is deliberately slow, so it runs in its own small pool of
+# worker processes instead of on the request threadpool: a login storm then
+# queues behind `workers` hashing jobs rather than taking every threadpool
+# slot from other endpoints. The workers also lower their own scheduling
+# priority (`nice`), so on a host with fewer spare cores than hashing jobs
+# (down to a single core) the OS still runs the event loop first and other
+# endpoints stay responsive; idle CPU still goes to hashing.
+
+SCHEMES = ("pbkdf2_sha256", "argon2")
+
+
+def installed_schemes() -> list:
+    """The SCHEMES whose backend is importable: hashes made with any of them keep verifying."""
+    return [scheme for scheme in SCHEMES if scheme != "argon2" or importlib.util.find_spec("argon2") is not None]
+
+
+class HasherBusy(Exception):
+    """More hashing jobs are already waiting than the hasher accepts."""
+
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords on a dedicated, bounded pool of `workers`
+    processes running at `nice` lower priority than the app.
+
+    `rounds` is pbkdf2_sha256's iteration count or argon2's time cost;
+    `argon2_memory_kib` is argon2's memory cost. Unset values use passlib's
+    defaults. Hashes made with another scheme or other parameters still
+    verify, and verify_and_update() returns a replacement hash for them.
+    A hash no installed scheme recognizes verifies as a mismatch. At most
+    `max_pending` jobs may wait or run; beyond that, HasherBusy.
+    """
+
+    def __init__(self, scheme: str = "pbkdf2_sha256", rounds: Optional[int] = None,
+                 argon2_memory_kib: Optional[int] = None, workers: int = 1, max_pending: int = 256,
+                 nice: int = 10):
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown password scheme {scheme!r}, expected one of {SCHEMES}")
+        if scheme == "argon2" and importlib.util.find_spec("argon2") is None:
+            raise ValueError("The argon2 password scheme needs argon2-cffi: pip install argon2-cffi")
+        self.scheme = scheme
+        self.rounds = rounds
+        self.argon2_memory_kib = argon2_memory_kib
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.nice = nice
+        self._context = None
+        self._executor = None  # ProcessPoolExecutor, started on first use
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def context_settings(self) -> dict:
+        """CryptContext keyword arguments: hash with `scheme`, verify every installed scheme."""
+        settings = {"schemes": [self.scheme] + [s for s in installed_schemes() if s != self.scheme],
+                    "default": self.scheme, "deprecated": "auto"}
+        if self.scheme == "pbkdf2_sha256" and self.rounds:
+            settings["pbkdf2_sha256__rounds"] = self.rounds
+        if self.scheme == "argon2":
+            if self.rounds:
+                settings["argon2__time_cost"] = self.rounds
+            if self.argon2_memory_kib:
+                settings["argon2__memory_cost"] = self.argon2_memory_kib
+        return settings
+
+    @property
+    def context(self):
+        # passlib is only imported once a password actually has to be hashed or checked
+        if self._context is None:
+            with self._lock:
+                if self._context is None:
+                    from passlib.context import CryptContext
+                    self._context = CryptContext(**self.context_settings())
+        return self._context
+
+    def hash_sync(self, password: str) -> str:
+        return self.context.hash(password)
+
+    def verify_and_update_sync(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(matches, replacement hash when the stored one uses outdated scheme or parameters)."""
+        return _verify_and_update(self.context, password, hashed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash_in_worker, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(_verify_in_worker, password, hashed)
+
+    def pending(self) -> int:
+        return self._pending
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HasherBusy(f"{self._pending} password hashing jobs already pending")
+            self._pending += 1
+            executor = self._get_executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenExecutor:
+            # A worker died (e.g. killed by the OOM killer): start a fresh pool next time
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _get_executor(self):
+        # Called with self._lock held
+        if self._executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(self.context_settings(), self.nice),
+            )
+        return self._executor
+
+    def start(self):
+        """
+        Starts every worker process now. A worker started by a login would
+        boot its interpreter at full priority, before it can lower it,
+        stalling requests on a host with no spare core.
+        """
+        from concurrent.futures import wait
+        with self._lock:
+            executor = self._get_executor()
+        # With no idle worker, each submission starts one more, up to `workers`
+        wait([executor.submit(os.getpid) for _ in range(self.workers)])
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def _verify_and_update(context, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return context.verify_and_update(password, hashed)
+    except ValueError:
+        # A hash no installed scheme recognizes (or a malformed one) matches no password
+        return False, None
+
+
+# Set in each worker process by _init_worker
+_worker_context = None
+
+
+def _init_worker(settings: dict, nice: int):
+    global _worker_context
+    if nice:
+        os.nice(nice)
+    from passlib.context import CryptContext
+    _worker_context = CryptContext(**settings)
+
+
+def _hash_in_worker(password: str) -> str:
+    return _worker_context.hash(password)
+
+
+def _verify_in_worker(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return _verify_and_update(_worker_context, password, hashed)
+
+
+def default_workers() -> int:
+    """Leave at least one core to the event loop and the rest of the app."""
+    return max(1, (os.cpu_count() or 2) - 1)
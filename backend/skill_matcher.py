@@ -0,0 +1,82 @@
+import hashlib
+import json
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+
+def skill_table_fingerprint(career_skills: Dict[str, List[str]]) -> int:
+    """Cheap in-process identity for the skill table, used to detect edits."""
+    return hash(tuple((career, tuple(skills)) for career, skills in career_skills.items()))
+
+
+def skill_table_version(career_skills: Dict[str, List[str]]) -> str:
+    """Stable identity for the skill table that can be persisted across processes."""
+    return hashlib.sha1(json.dumps(career_skills).encode("utf-8")).hexdigest()[:16]
+
+
+class SkillMatcher:
+    """
+    Matches activity names against every career's skill list in one pass.
+
+    Each career gets a single compiled alternation regex, so an activity is
+    checked with one search per career instead of one freshly compiled regex
+    per skill. Word-boundary semantics are identical to the previous
+    per-skill `\\b<skill>\\b` check: an alternation search succeeds exactly
+    when at least one of its alternatives would have matched on its own.
+    """
+
+    def __init__(self, career_skills: Dict[str, List[str]]):
+        self.fingerprint = skill_table_fingerprint(career_skills)
+        self.version = skill_table_version(career_skills)
+        self.careers: Tuple[str, ...] = tuple(career_skills)
+        self._patterns = [
+            (career, self._compile(skills)) for career, skills in career_skills.items()
+        ]
+        # Activity names repeat heavily across a cohort, so memoise per name.
+        self.matched_careers = lru_cache(maxsize=65536)(self._matched_careers)
+
+    @staticmethod
+    def _compile(skills: List[str]) -> re.Pattern:
+        if not skills:
+            return re.compile(r"(?!x)x")  # never matches
+        # Longest first so shared prefixes ("React Native" / "React") don't
+        # shadow each other; the boundary check backtracks across alternatives.
+        alternatives = sorted({re.escape(s.lower()) for s in skills}, key=len, reverse=True)
+        return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b")
+
+    def _matched_careers(self, activity_name: str) -> Tuple[str, ...]:
+        """Every career with at least one skill in `activity_name`, in table order."""
+        text = activity_name.lower()
+        return tuple(career for career, pattern in self._patterns if pattern.search(text))
+
+    def classify(self, activity_name: str, target: str) -> Tuple[bool, Tuple[str, ...]]:
+        """
+        Returns (is_relevant, conflicting_careers) for an activity.
+        Conflicting careers are only reported when the target doesn't match.
+        """
+        matched = self.matched_careers(activity_name)
+        if target in matched:
+            return True, ()
+        return False, matched
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher(career_skills: Dict[str, List[str]]) -> SkillMatcher:
+    """
+    Returns the shared matcher, rebuilding it only if the skill table changed
+    since it was last compiled.
+    """
+    global _matcher
+    fingerprint = skill_table_fingerprint(career_skills)
+    matcher = _matcher
+    if matcher is not None and matcher.fingerprint == fingerprint:
+        return matcher
+    with _matcher_lock:
+        if _matcher is None or _matcher.fingerprint != fingerprint:
+            _matcher = SkillMatcher(career_skills)
+        return _matcher
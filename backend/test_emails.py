@@ -1,6 +1,7 @@
 import requests
 import json
-import time
+
+from audit_polling import wait_for_audit
 
 BASE_URL = "http://127.0.0.1:8000"
 
@@ -55,8 +56,8 @@ def test_drift_emails():
     # 3. Trigger the drift audit endpoint
     print("Triggering /audit_drift endpoint...")
     audit_resp = requests.post(f"{BASE_URL}/audit_drift")
-    if audit_resp.status_code == 200:
-        results = audit_resp.json()
+    if audit_resp.status_code == 202:
+        results = wait_for_audit(BASE_URL, audit_resp.json())
         print(f"Audit response: {json.dumps(results, indent=2)}")
         
         # Check if our tester was emailed
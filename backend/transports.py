@@ -0,0 +1,104 @@
+import mailbox
+import os
+from typing import List, Optional
+
+from mailer import OutgoingEmail, SimulatedConnection, SmtpConnection, SmtpTransport, build_message
+
+# Mail transports used by MailQueue. A transport takes a list of outbox
+# messages in send_batch() and returns one entry per message: None when it
+# was accepted, or an error string to retry it. Raising fails (and retries)
+# the whole batch. MailQueue never hands a transport more than its
+# max_batch_size messages at once, and calls close() when its worker stops.
+
+
+def smtp_transport(host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                   max_batch_size: int = 100) -> SmtpTransport:
+    """SMTP over one persistent connection, or a console simulation without credentials."""
+    if not username or not password:
+        return SmtpTransport(SimulatedConnection(), max_batch_size=max_batch_size)
+    return SmtpTransport(SmtpConnection(host, port, username, password), max_batch_size=max_batch_size)
+
+
+class MaildirTransport:
+    """
+    Delivers into a local Maildir instead of sending anything: for tests,
+    staging and inspecting what an audit would have sent.
+    """
+
+    def __init__(self, path: str, max_batch_size: int = 500):
+        self.path = path
+        self.max_batch_size = max_batch_size
+        self._maildir = None
+
+    def send_batch(self, messages: List[OutgoingEmail]) -> List[Optional[str]]:
+        if self._maildir is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._maildir = mailbox.Maildir(self.path, create=True)
+        errors = []
+        for message in messages:
+            try:
+                self._maildir.add(build_message(message.from_addr, message.to_email, message.subject,
+                                                message.html_content, message.text_content))
+                errors.append(None)
+            except Exception as e:
+                errors.append(str(e))
+        return errors
+
+    def close(self):
+        self._maildir = None
+
+
+class HttpBulkTransport:
+    """
+    Submits up to `max_batch_size` messages per call to a bulk email API.
+
+    Request:  POST <url>, "Authorization: Bearer <api_key>", JSON body
+              {"messages": [{"id", "from", "to", "subject", "html", "text"}, ...]}
+    Response: 2xx with {"results": [{"id", "status": "accepted" | "rejected", "error"}, ...]}
+
+    Rejected messages (and any the provider did not report on) are retried
+    individually; a non-2xx response or a network error retries the batch.
+    One keep-alive HTTP client is reused for every call.
+    """
+
+    def __init__(self, url: str, api_key: Optional[str] = None, max_batch_size: int = 500, timeout: float = 30.0):
+        self.url = url
+        self.api_key = api_key
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self._client = None
+
+    def send_batch(self, messages: List[OutgoingEmail]) -> List[Optional[str]]:
+        if self._client is None:
+            # httpx is only imported once something is actually sent through the provider
+            import httpx
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.Client(headers=headers, timeout=self.timeout)
+        response = self._client.post(self.url, json={"messages": [
+            {
+                "id": message.outbox_id,
+                "from": message.from_addr,
+                "to": message.to_email,
+                "subject": message.subject,
+                "html": message.html_content,
+                "text": message.text_content,
+            }
+            for message in messages
+        ]})
+        response.raise_for_status()
+        results = {result.get("id"): result for result in response.json().get("results", [])}
+        errors = []
+        for message in messages:
+            result = results.get(message.outbox_id)
+            if result is None:
+                errors.append("no result from bulk provider")
+            elif result.get("status") == "accepted":
+                errors.append(None)
+            else:
+                errors.append(result.get("error") or f"rejected by bulk provider ({result.get('status')})")
+        return errors
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
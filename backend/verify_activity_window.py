@@ -0,0 +1,177 @@
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Seeds a throwaway SQLite DB with a few long activity histories and checks
+# the activity page and sliding-window drift queries: both are served by the
+# (student_id, timestamp DESC) index, cursor pagination walks a history exactly
+# once, and windowed scoring costs the same at 1k and 200k activities.
+
+tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'activity_window.db')}"
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+import main
+from database import create_db_and_tables, engine
+
+HISTORY_SIZES = {1: 1_000, 2: 200_000, 3: 2_500}
+ACTIVITY_NAMES = ["FastAPI Basics", "SQL Joins", "Docker Compose", "React Hooks", "Cooking"]
+WINDOW = 50
+REPEATS = 50
+
+
+def seed():
+    create_db_and_tables()
+    rng = random.Random(3)
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(os.environ["DATABASE_URL"][len("sqlite:///"):])
+    conn.executemany(
+        "INSERT INTO student (id, name, email, hashed_password, target_career, current_drift_score, "
+        "relevant_count, conflicting_count, irrelevant_count, drift_suggestions) "
+        "VALUES (?, ?, ?, '', 'Backend Developer', 0.0, 0, 0, 0, '[]')",
+        ((sid, f"Student {sid}", f"s{sid}@example.com") for sid in HISTORY_SIZES),
+    )
+    for sid, size in HISTORY_SIZES.items():
+        step = (datetime.utcnow() - start) / size
+        conn.executemany(
+            "INSERT INTO activity (student_id, name, category, type, timestamp) VALUES (?, ?, 'Misc', 'Learning', ?)",
+            ((sid, rng.choice(ACTIVITY_NAMES), (start + step * i).strftime("%Y-%m-%d %H:%M:%S.%f")) for i in range(size)),
+        )
+    conn.commit()
+    conn.close()
+
+
+def check_query_plans():
+    print("1. Query plans use ix_activity_student_id_timestamp...")
+    with engine.connect() as conn:
+        for label, sql in [
+            ("page", "SELECT * FROM activity WHERE student_id = 2 ORDER BY timestamp DESC, id DESC LIMIT 101"),
+            ("window", "SELECT name FROM activity WHERE student_id = 2 AND timestamp >= '2026-01-01' "
+                       "ORDER BY timestamp DESC, id DESC LIMIT 50"),
+        ]:
+            plan = " / ".join(row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+            print(f"   {label}: {plan}")
+            assert "ix_activity_student_id_timestamp" in plan, plan
+
+
+def check_pagination(client):
+    print("2. Cursor pagination walks a history exactly once, newest first...")
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 1000}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/students/3/activities/", params=params)
+        assert response.status_code == 200, response.text
+        seen.extend(response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    ids = [a["id"] for a in seen]
+    assert len(ids) == len(set(ids)) == HISTORY_SIZES[3], len(ids)
+    timestamps = [a["timestamp"] for a in seen]
+    assert timestamps == sorted(timestamps, reverse=True)
+    print(f"   {len(ids)} activities in {pages} pages")
+
+    since = (datetime.utcnow() - timedelta(days=30)).isoformat()
+    recent = client.get("/students/3/activities/", params={"since": since, "limit": 1000}).json()
+    assert recent and all(a["timestamp"] >= since for a in recent), recent[:2]
+    assert client.get("/students/3/activities/", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/students/3/activities/", params={"limit": 5000}).status_code == 422
+
+
+def assert_same_result(actual, expected):
+    # Each call featurizes as of its own "now": recency features move by microseconds
+    assert abs(actual["drift_score"] - expected["drift_score"]) < 1e-6, (actual, expected)
+    rest = lambda result: {k: v for k, v in result.items() if k not in ("drift_score", "on_track_score")}
+    assert rest(actual) == rest(expected), (actual, expected)
+
+
+def check_windowed_drift(client):
+    print(f"3. Windowed drift (last {WINDOW} activities) matches scoring the same slice...")
+    with Session(engine) as session:
+        rows = main.load_recent_activities(session, 2, window_activities=WINDOW)
+    expected = main.score_drift_batch([main.drift_input_from_rows("Backend Developer", rows, None)])[0]
+    body = {"target_career": "Backend Developer", "student_id": 2, "window_activities": WINDOW}
+    actual = client.post("/predict_drift", json=body).json()
+    assert_same_result(actual, expected)
+
+    batch = client.post("/predict_drift/batch", json=[{
+        "target_career": "Backend Developer",
+        "recent_activities": [{"name": name, "category": "x", "type": activity_type, "timestamp": timestamp.isoformat()}
+                              for name, activity_type, timestamp in reversed(rows)] + [
+            {"name": "Old", "category": "x", "timestamp": "2020-01-01T00:00:00Z"}
+        ],
+        "window_days": 365,
+    }]).json()[0]
+    assert_same_result(batch, expected)
+
+    # The last N by timestamp, whatever order the client sends them in
+    shuffled = [{"name": name, "category": "x", "type": activity_type, "timestamp": timestamp.isoformat()}
+                for name, activity_type, timestamp in rows]
+    random.Random(5).shuffle(shuffled)
+    older = [{"name": "Old", "category": "x", "timestamp": "2020-01-01T00:00:00Z"},
+             {"name": "Undated", "category": "x"}]
+    for activities in (shuffled + older, older + shuffled, list(reversed(shuffled)) + older[::-1]):
+        unordered = client.post("/predict_drift", json={
+            "target_career": "Backend Developer", "recent_activities": activities, "window_activities": WINDOW,
+        }).json()
+        assert_same_result(unordered, expected)
+
+    print("4. Windowed cost stays flat as the history grows...")
+    timings = {}
+    for sid in (1, 2):
+        body = {"target_career": "Backend Developer", "student_id": sid, "window_activities": WINDOW}
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            assert client.post("/predict_drift", json=body).status_code == 200
+        timings[sid] = (time.perf_counter() - start) / REPEATS
+        print(f"   {HISTORY_SIZES[sid]:>7} activities: {timings[sid] * 1000:.2f} ms per call")
+    assert timings[2] < timings[1] * 3, timings
+
+
+def check_batch_matches_single(client):
+    print("5. The batch endpoint resolves student_id like /predict_drift...")
+    profiles = [
+        {"target_career": "Backend Developer", "student_id": 3},  # stored aggregate
+        {"target_career": "Backend Developer", "student_id": 2, "window_activities": WINDOW},  # stored window
+        {"target_career": "Data Scientist", "student_id": 3},  # other target: scored from recent_activities
+        {"target_career": "Backend Developer", "student_id": 999,  # unknown student: likewise
+         "recent_activities": [{"name": "SQL Joins", "category": "x"}]},
+        {"target_career": "Backend Developer", "recent_activities": [{"name": "Cooking", "category": "x"}]},
+    ]
+    singles = [client.post("/predict_drift", json=profile).json() for profile in profiles]
+    batch = client.post("/predict_drift/batch", json=profiles).json()
+    assert len(batch) == len(profiles), batch
+    for actual, expected in zip(batch, singles):
+        assert_same_result(actual, expected)
+    # Scored from the stored history, not the empty recent_activities ("No Data")
+    assert "status" not in batch[0] and "status" not in batch[1], batch[:2]
+
+
+def verify():
+    seed()
+    check_query_plans()
+    client = TestClient(main.app)
+    check_pagination(client)
+    check_windowed_drift(client)
+    check_batch_matches_single(client)
+    print("SUCCESS: activity history queries are bounded by the page or window size")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
+    finally:
+        engine.dispose()
+        tmp.cleanup()
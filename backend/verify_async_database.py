@@ -0,0 +1,133 @@
+import asyncio
+import importlib.util
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# Drives the async endpoints (AsyncSession) alongside the sync ones against
+# every available backend: a throwaway SQLite file through aiosqlite, and
+# PostgreSQL through asyncpg when TEST_POSTGRES_URL is set or a local
+# initdb/pg_ctl can start a temporary cluster. Each backend runs in its own
+# interpreter because the engines are built from DATABASE_URL at import time.
+
+CONCURRENT_VISITS = 50
+CONCURRENT_LOGINS = 10
+
+
+async def exercise_app():
+    import httpx
+    import main
+    from database import async_engine, create_db_and_tables
+
+    create_db_and_tables()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/register", json={
+            "name": "Async Student", "email": "async@example.com",
+            "password": "secret", "target_career": "Backend Developer",
+        })
+        assert response.status_code == 200, response.text
+        student_id = response.json()["id"]
+
+        names = ["FastAPI Basics", "SQL Joins", "Cooking"]
+        for name in names:
+            response = await client.post("/activities/", json={
+                "student_id": student_id, "name": name, "category": "Misc", "type": "Learning",
+            })
+            assert response.status_code == 200, response.text
+
+        activities = (await client.get(f"/students/{student_id}/activities/")).json()
+        assert [a["name"] for a in activities] == names[::-1], activities  # newest first
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[client.post(f"/visit/{student_id}") for _ in range(CONCURRENT_VISITS)])
+        elapsed = time.perf_counter() - start
+        assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+        print(f"   {CONCURRENT_VISITS} concurrent /visit calls in {elapsed * 1000:.0f} ms")
+
+        account = {"email": "async@example.com", "password": "secret"}
+        responses = await asyncio.gather(*[client.post("/login", json=account) for _ in range(CONCURRENT_LOGINS)])
+        assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+        async with async_engine.connect() as conn:
+            login_emails = (await conn.exec_driver_sql(
+                "SELECT count(*) FROM outboxemail WHERE category = 'login'")).scalar()
+        assert login_emails == 1, f"{CONCURRENT_LOGINS} concurrent logins queued {login_emails} login emails"
+        print(f"   {CONCURRENT_LOGINS} concurrent /login calls queued {login_emails} login email")
+
+        student = (await client.get(f"/students/{student_id}")).json()
+        assert student["last_visited_at"] is not None and student["relevant_count"] == 2, student
+        assert (await client.get("/students/999999")).status_code == 404
+        assert (await client.post("/visit/999999")).status_code == 404
+
+    async with async_engine.connect() as conn:
+        if async_engine.dialect.name == "sqlite":
+            setting = ("journal_mode", (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar())
+        else:
+            setting = ("statement_timeout", (await conn.exec_driver_sql("SHOW statement_timeout")).scalar())
+    print(f"   async engine: {async_engine.url.drivername}, {setting[0]}={setting[1]}")
+    await async_engine.dispose()
+
+
+def run_backend(label, url):
+    print(f"{label}: {url}")
+    env = {**os.environ, "DATABASE_URL": url, "MODEL_WARMUP": "0"}
+    result = subprocess.run([sys.executable, "-W", "ignore", __file__, "--child"], env=env,
+                            capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith("   "):
+            print(line)
+    assert result.returncode == 0, f"{label} failed:\n{result.stdout[-2000:]}\n{result.stderr[-2000:]}"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_postgres():
+    url = os.getenv("TEST_POSTGRES_URL")
+    if url:
+        run_backend("PostgreSQL", url)
+        return
+
+    if not (shutil.which("initdb") and shutil.which("pg_ctl")):
+        print("PostgreSQL: skipped (set TEST_POSTGRES_URL or install initdb/pg_ctl)")
+        return
+    missing = [name for name in ("asyncpg", "psycopg2") if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"PostgreSQL: skipped ({missing[0]} is not installed)")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "pgdata")
+        port = free_port()
+        subprocess.run(["initdb", "-D", data_dir, "-U", "postgres", "--auth=trust"], check=True, capture_output=True)
+        subprocess.run(["pg_ctl", "-D", data_dir, "-o", f"-p {port} -k {tmp}", "-w", "start"],
+                       check=True, capture_output=True)
+        try:
+            run_backend("PostgreSQL (throwaway cluster)", f"postgresql://postgres@127.0.0.1:{port}/postgres")
+        finally:
+            subprocess.run(["pg_ctl", "-D", data_dir, "-m", "immediate", "stop"], capture_output=True)
+
+
+def verify():
+    with tempfile.TemporaryDirectory() as tmp:
+        run_backend("SQLite", f"sqlite:///{os.path.join(tmp, 'async.db')}")
+    run_postgres()
+    print("SUCCESS: async endpoints work on every available backend")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        asyncio.run(exercise_app())
+        sys.exit(0)
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
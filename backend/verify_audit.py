@@ -1,5 +1,6 @@
 import requests
-import time
+
+from audit_polling import wait_for_audit
 
 BASE_URL = "http://localhost:8000"
 
@@ -19,7 +20,7 @@ def test_drift_audit():
     print("\nStep 2: Triggering Drift Audit...")
     audit_resp = requests.post(f"{BASE_URL}/audit_drift")
     print(f"Audit Status: {audit_resp.status_code}")
-    print(f"Audit Result: {audit_resp.json()}")
+    print(f"Audit Result: {wait_for_audit(BASE_URL, audit_resp.json())}")
 
 if __name__ == "__main__":
     test_drift_audit()
@@ -0,0 +1,174 @@
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+# Seeds a throwaway cohort and runs the sharded audit job: serially and in a
+# process pool (same emails; on SQLite the pool mostly queues on the single
+# writer lock, which is why AUDIT_WORKERS defaults to 0 there), then kills a
+# job mid-shard and checks that resuming it finishes the remaining work
+# without re-sending anything already committed. Shards failing with
+# "database is locked" are retried, and a job whose retries run out is left
+# to resume rather than marked failed.
+
+NUM_STUDENTS = 20_000
+NUM_ACTIVITIES = 200_000
+SHARD_SIZE = 2000
+CRASH_AFTER_EMAILS = 7000
+ACTIVITY_NAMES = ["React Hooks", "FastAPI Basics", "Docker Compose", "SQL Joins", "Cooking", "Figma UI Kit"]
+NEWS = [{"title": f"Story {i}", "url": f"https://example.com/{i}", "description": "News"} for i in range(3)]
+
+CHILD = """
+import os, sys
+import main
+from audit_jobs import AuditJobRunner
+
+workers = int(sys.argv[1])
+crash_after = int(sys.argv[2])
+if crash_after:
+    # Hard crash in the middle of a shard, after some of its emails were staged
+    stage_many = main.mail_queue.stage_many
+    staged = [0]
+    def crashing_stage_many(session, messages):
+        staged[0] += len(messages)
+        if staged[0] >= crash_after:
+            os._exit(3)
+        return stage_many(session, messages)
+    main.mail_queue.stage_many = crashing_stage_many
+
+shard_fn = main.audit_shard
+failures = [int(os.getenv("FAIL_SHARD_CALLS", 0))]
+if failures[0]:
+    # The first calls fail the way a shard does when SQLite's write lock is busy
+    from sqlalchemy.exc import OperationalError
+    def shard_fn(shard_id, *context):
+        if failures[0]:
+            failures[0] -= 1
+            raise OperationalError("UPDATE student", {{}}, Exception("database is locked"))
+        return main.audit_shard(shard_id, *context)
+
+runner = AuditJobRunner(main.engine, shard_fn, shard_size={shard_size}, workers=workers,
+                        context_fn=lambda: ({news!r},), shard_attempts=3, retry_backoff_seconds=0.01)
+job_id = sys.argv[3] if len(sys.argv) > 3 else runner.submit().id
+runner.run_job(job_id)
+print(job_id)
+"""
+
+
+def seed(db_path):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}"}
+    subprocess.run([sys.executable, "-c", "import models; from database import create_db_and_tables; create_db_and_tables()"],
+                   env=env, check=True, capture_output=True)
+    rng = random.Random(5)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO student (id, name, email, hashed_password, target_career, current_drift_score, "
+        "last_visited_at, relevant_count, conflicting_count, irrelevant_count, drift_suggestions) "
+        "VALUES (?, ?, ?, '', 'Backend Developer', 0.0, ?, 0, 0, 0, '[]')",
+        ((i, f"Student {i}", f"student{i}@example.com",
+          "2026-01-01 00:00:00" if i % 3 == 0 else "2099-01-01 00:00:00") for i in range(1, NUM_STUDENTS + 1)),
+    )
+    # Aggregates are left stale (no skill version), so every shard rebuilds them from history
+    conn.executemany(
+        "INSERT INTO activity (student_id, name, category, type, timestamp) "
+        "VALUES (?, ?, 'Misc', 'Learning', '2026-01-01 00:00:00')",
+        ((rng.randint(1, NUM_STUDENTS), rng.choice(ACTIVITY_NAMES)) for _ in range(NUM_ACTIVITIES)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_child(db_path, workers, crash_after=0, job_id=None, fail_shard_calls=0):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}", "FAIL_SHARD_CALLS": str(fail_shard_calls)}
+    code = CHILD.format(shard_size=SHARD_SIZE, news=NEWS)
+    args = [sys.executable, "-W", "ignore", "-c", code, str(workers), str(crash_after)] + ([job_id] if job_id else [])
+    start = time.perf_counter()
+    result = subprocess.run(args, env=env, capture_output=True, text=True)
+    return result, time.perf_counter() - start
+
+
+def outbox(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = Counter(conn.execute("SELECT to_email, subject FROM outboxemail"))
+    shards = dict(Counter(status for (status,) in conn.execute("SELECT status FROM auditshard")))
+    job = conn.execute("SELECT id, status, last_error, lease_owner FROM auditjob").fetchall()
+    conn.close()
+    return rows, shards, job
+
+
+def verify():
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "base.db")
+        print(f"Seeding {NUM_STUDENTS} students / {NUM_ACTIVITIES} activities...")
+        seed(base)
+
+        timings, sent = {}, {}
+        for workers in (0, 4):
+            db_path = os.path.join(tmp, f"workers{workers}.db")
+            shutil.copy(base, db_path)
+            result, timings[workers] = run_child(db_path, workers)
+            assert result.returncode == 0, result.stderr[-2000:]
+            sent[workers], shards, job = outbox(db_path)
+            assert shards == {"done": NUM_STUDENTS // SHARD_SIZE} and job[0][1] == "completed", (shards, job)
+            label = "in-process" if workers == 0 else f"{workers} worker processes"
+            print(f"{label:<20} {timings[workers]:6.2f}s  {sum(sent[workers].values())} emails")
+        assert sent[0] == sent[4], "parallel audit sent different emails"
+        assert max(sent[0].values()) == 1
+        print(f"Pool vs in-process: {timings[0] / timings[4]:.1f}x (including worker start-up)")
+
+        print("\nTransient lock errors...")
+        db_path = os.path.join(tmp, "flaky.db")
+        shutil.copy(base, db_path)
+        result, _ = run_child(db_path, 0, fail_shard_calls=2)
+        assert result.returncode == 0, result.stderr[-2000:]
+        retried, shards, job = outbox(db_path)
+        print(f"   2 failed attempts: shards {shards}, job {job[0][1]}")
+        assert job[0][1] == "completed" and retried == sent[0], (shards, job)
+
+        db_path = os.path.join(tmp, "locked.db")
+        shutil.copy(base, db_path)
+        result, _ = run_child(db_path, 0, fail_shard_calls=3)
+        assert result.returncode == 0, result.stderr[-2000:]
+        _, shards, job = outbox(db_path)
+        print(f"   out of retries: shards {shards}, job {job[0][1]} ({job[0][2]})")
+        assert job[0][1] == "running" and job[0][2] == "database is locked" and job[0][3] is None, job
+        result, _ = run_child(db_path, 0, job_id=job[0][0])
+        assert result.returncode == 0, result.stderr[-2000:]
+        resumed, shards, job = outbox(db_path)
+        print(f"   resumed: shards {shards}, job {job[0][1]}")
+        assert job[0][1] == "completed" and job[0][2] is None and resumed == sent[0], (shards, job)
+
+        print("\nCrash mid-shard, then resume...")
+        db_path = os.path.join(tmp, "crash.db")
+        shutil.copy(base, db_path)
+        result, _ = run_child(db_path, 0, crash_after=CRASH_AFTER_EMAILS)
+        assert result.returncode == 3, (result.returncode, result.stderr[-2000:])
+        before, shards, job = outbox(db_path)
+        print(f"   after crash: shards {shards}, job {job[0][1]}, {sum(before.values())} emails committed")
+        assert job[0][1] == "running" and shards.get("done") and shards.get("pending")
+
+        # The crashed worker's lease on the job runs out before anyone resumes it
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE auditjob SET lease_expires_at = '2000-01-01 00:00:00'")
+        conn.commit()
+        conn.close()
+        result, _ = run_child(db_path, 2, job_id=job[0][0])
+        assert result.returncode == 0, result.stderr[-2000:]
+        after, shards, job = outbox(db_path)
+        print(f"   after resume: shards {shards}, job {job[0][1]}, {sum(after.values())} emails")
+        assert job[0][1] == "completed" and shards == {"done": NUM_STUDENTS // SHARD_SIZE}
+        assert after == sent[0], "resumed audit sent different emails than an uninterrupted one"
+    print("SUCCESS: sharded audit is checkpointed per chunk, retried and resumable")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
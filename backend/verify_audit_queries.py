@@ -0,0 +1,93 @@
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+
+# Seeds a throwaway SQLite DB and runs a whole audit job in-process, checking
+# that it issues O(chunks) statements rather than one per student, even when
+# every stored drift aggregate is stale (histories must be reloaded) and every
+# student is owed an email.
+
+tmp = tempfile.TemporaryDirectory()
+DB_PATH = os.path.join(tmp.name, "audit_queries.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+import main
+from audit_jobs import AuditJobRunner
+from database import create_db_and_tables, engine
+
+NUM_STUDENTS = 50_000
+NUM_ACTIVITIES = 1_000_000
+SHARD_SIZE = 10_000
+ACTIVITY_NAMES = ["React Hooks", "FastAPI Basics", "Docker Compose", "SQL Joins", "Cooking", "Figma UI Kit"]
+NEWS = [{"title": "Story", "url": "https://example.com/story", "description": "News"}]
+# Statements per chunk: the students page, their activity histories, the
+# aggregate writes, the email claims and outbox inserts, and the checkpoint
+MAX_PER_CHUNK = 10
+# Per shard: the shard row, the candidate selects, the final count and "done"
+MAX_PER_SHARD = 12
+# Per job: lease, planning (one lookup per shard), status updates
+MAX_PER_JOB = 30
+
+
+def seed():
+    create_db_and_tables()
+    rng = random.Random(7)
+    conn = sqlite3.connect(DB_PATH)
+    conn.executemany(
+        "INSERT INTO student (id, name, email, hashed_password, target_career, current_drift_score, "
+        "relevant_count, conflicting_count, irrelevant_count, drift_suggestions) "
+        "VALUES (?, ?, ?, '', 'Backend Developer', 0.0, 0, 0, 0, '[]')",
+        ((i, f"Student {i}", f"student{i}@example.com") for i in range(1, NUM_STUDENTS + 1))
+    )
+    conn.executemany(
+        "INSERT INTO activity (student_id, name, category, type, timestamp) "
+        "VALUES (?, ?, 'Misc', 'Learning', '2026-01-01 00:00:00')",
+        ((rng.randint(1, NUM_STUDENTS), rng.choice(ACTIVITY_NAMES)) for _ in range(NUM_ACTIVITIES))
+    )
+    conn.commit()
+    conn.close()
+
+
+def verify():
+    print(f"Seeding {NUM_STUDENTS} students / {NUM_ACTIVITIES} activities...")
+    start = time.perf_counter()
+    seed()
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+    main.get_model()  # Not part of the audit's statements
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    runner = AuditJobRunner(engine, main.audit_shard, shard_size=SHARD_SIZE, workers=0, context_fn=lambda: (NEWS,))
+    start = time.perf_counter()
+    job = runner.submit()
+    runner.run_job(job.id)
+    elapsed = time.perf_counter() - start
+    progress = runner.progress(job.id)
+
+    shards = -(-NUM_STUDENTS // SHARD_SIZE)
+    chunks = shards * -(-SHARD_SIZE // main.AUDIT_CHUNK_SIZE)
+    max_statements = MAX_PER_JOB + MAX_PER_SHARD * shards + MAX_PER_CHUNK * chunks
+    print(f"Audited {progress['processed_students']} students in {shards} shards / {chunks} chunks, {elapsed:.1f}s")
+    print(f"Statements issued: {len(statements)} (limit {max_statements})")
+
+    assert progress["status"] == "completed" and progress["processed_students"] == NUM_STUDENTS, progress
+    # No email has been sent yet, so everyone is owed one (drift or news)
+    assert sum(progress["emails"].values()) == NUM_STUDENTS, progress["emails"]
+    assert len(statements) <= max_statements, f"expected at most {max_statements} statements, got {len(statements)}"
+    print("SUCCESS: audit statements are O(chunks)")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
+    finally:
+        engine.dispose()
+        tmp.cleanup()
@@ -0,0 +1,210 @@
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+# Checks the built-in audit scheduler: cron-style windows with jitter, one
+# audit per window when several app workers race for it, atomic cooldown
+# claims that stop two overlapping audits from emailing anyone twice, and job
+# leases that keep a live worker's job to itself but let others take over
+# once it dies.
+
+tmp = tempfile.TemporaryDirectory()
+DB_PATH = os.path.join(tmp.name, "audit_scheduler.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["AUDIT_WORKERS"] = "0"
+
+from sqlmodel import Session, select
+
+import main
+from audit_jobs import AuditJobRunner, AuditScheduler
+from database import create_db_and_tables, engine
+from models import AuditJob, AuditShard, Student
+
+NUM_STUDENTS = 600
+APP_WORKERS = 4
+NEWS = [{"title": "Story", "url": "https://example.com/1", "description": "News"}]
+
+# Every app worker process builds its own runner and scheduler, waits for a
+# shared start time, then ticks just before and just after a window opens
+CHILD = """
+import sys, time
+from datetime import datetime, timedelta
+import main
+from audit_jobs import AuditJobRunner, AuditScheduler
+
+runner = AuditJobRunner(main.engine, main.audit_shard, shard_size=200, workers=0,
+                        context_fn=lambda: ({news!r},))
+scheduler = AuditScheduler(runner, interval=timedelta(hours=6), jitter_seconds=0)
+window = datetime(2026, 10, 18, 12)
+scheduler.tick(now=window - timedelta(seconds=1))
+time.sleep(max(0.0, float(sys.argv[1]) - time.time()))
+job = scheduler.tick(now=window + timedelta(seconds=1))
+if job:
+    runner.run_job(job.id)
+print("won" if job else "skipped")
+"""
+
+
+def seed():
+    create_db_and_tables()
+    conn = sqlite3.connect(DB_PATH)
+    # Recently active students with no news yet: each is owed exactly one news email
+    conn.executemany(
+        "INSERT INTO student (id, name, email, hashed_password, target_career, current_drift_score, "
+        "last_visited_at, relevant_count, conflicting_count, irrelevant_count, drift_suggestions) "
+        "VALUES (?, ?, ?, '', 'Backend Developer', 0.0, '2099-01-01 00:00:00', 0, 0, 0, '[]')",
+        ((i, f"Student {i}", f"student{i}@example.com") for i in range(1, NUM_STUDENTS + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def reset():
+    with engine.begin() as conn:
+        for table in ("outboxemail", "auditshard", "auditjob"):
+            conn.exec_driver_sql(f"DELETE FROM {table}")
+        conn.exec_driver_sql("UPDATE student SET last_emailed_at = NULL, last_news_sent_at = NULL")
+
+
+def outbox():
+    with engine.connect() as conn:
+        return Counter(row[0] for row in conn.exec_driver_sql("SELECT to_email FROM outboxemail"))
+
+
+def check_windows():
+    print("1. Windows, jitter and cron-style start-up...")
+    runner = AuditJobRunner(engine, main.audit_shard, workers=0)
+    daily = AuditScheduler(runner, interval=timedelta(days=1), offset=timedelta(hours=9), jitter_seconds=0)
+    assert daily.window_start(datetime(2026, 10, 18, 8, 59)) == datetime(2026, 10, 17, 9)
+    assert daily.window_start(datetime(2026, 10, 18, 9, 0)) == datetime(2026, 10, 18, 9)
+    six_hourly = AuditScheduler(runner, interval=timedelta(hours=6), jitter_seconds=0)
+    assert six_hourly.window_start(datetime(2026, 10, 18, 13, 30)) == datetime(2026, 10, 18, 12)
+
+    reset()
+    scheduler = AuditScheduler(runner, interval=timedelta(hours=6), jitter_seconds=600, rng=random.Random(1))
+    window = datetime(2026, 10, 18, 12)
+    # Started well into a window that has already fired: skip it, like cron
+    assert scheduler.tick(now=window + timedelta(hours=1)) is None
+    next_window = window + timedelta(hours=6)
+    assert scheduler.tick(now=next_window) is None
+    fire_at = scheduler.next_run()
+    assert next_window <= fire_at <= next_window + timedelta(seconds=600), fire_at
+    assert scheduler.tick(now=fire_at - timedelta(seconds=1)) is None
+    job = scheduler.tick(now=fire_at + timedelta(seconds=1))
+    assert job is not None and job.scheduled_for == next_window
+    assert scheduler.tick(now=fire_at + timedelta(minutes=5)) is None, "fired the same window twice"
+    print(f"   window {next_window:%H:%M} fired at +{(fire_at - next_window).total_seconds():.0f}s jitter")
+
+
+def check_leader_election():
+    print(f"2. {APP_WORKERS} app workers race for the same window...")
+    reset()
+    start_at = time.time() + 3
+    children = [
+        subprocess.Popen([sys.executable, "-W", "ignore", "-c", CHILD.format(news=NEWS), str(start_at)],
+                         env=os.environ.copy(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for _ in range(APP_WORKERS)
+    ]
+    results = []
+    for child in children:
+        out, err = child.communicate(timeout=300)
+        assert child.returncode == 0, err[-2000:]
+        results.append(out.strip().splitlines()[-1])
+    with Session(engine) as session:
+        jobs = session.exec(select(AuditJob)).all()
+    sent = outbox()
+    print(f"   workers: {Counter(results)}; jobs: {len(jobs)}; {sum(sent.values())} emails")
+    assert results.count("won") == 1, results
+    assert len(jobs) == 1 and jobs[0].status == "completed" and jobs[0].lease_owner is None
+    assert len(sent) == NUM_STUDENTS and max(sent.values()) == 1
+
+
+def check_atomic_cooldown():
+    print("3. Two overlapping audits of the same students...")
+    reset()
+    # Both sessions load the students before either audit has emailed anyone,
+    # so the in-memory cooldown check passes in both
+    with Session(engine) as first, Session(engine) as second:
+        first_students = first.exec(select(Student).order_by(Student.id).limit(200)).all()
+        second_students = second.exec(select(Student).order_by(Student.id).limit(200)).all()
+        first_reports = main.audit_students(first, first_students, NEWS)
+        first.commit()
+        second_reports = main.audit_students(second, second_students, NEWS)
+        second.commit()
+    sent = outbox()
+    print(f"   first audit: {len(first_reports)} emails, stale second audit: {len(second_reports)}")
+    assert len(first_reports) == 200 and not second_reports, (len(first_reports), len(second_reports))
+    assert len(sent) == 200 and max(sent.values()) == 1
+
+
+def check_leases():
+    print("4. Job leases: held while alive, taken over once lapsed...")
+    reset()
+    ran = []
+
+    def slow_shard(shard_id):
+        time.sleep(0.4)
+        with Session(engine) as session:
+            shard = session.get(AuditShard, shard_id)
+            shard.status = "done"
+            session.add(shard)
+            session.commit()
+        ran.append(shard_id)
+
+    owner = AuditJobRunner(engine, slow_shard, shard_size=100, workers=0, lease_seconds=0.3)
+    rival = AuditJobRunner(engine, slow_shard, shard_size=100, workers=0, lease_seconds=0.3)
+    job = owner.submit()
+    running = threading.Thread(target=owner.run_job, args=(job.id,))
+    running.start()
+    # The job outlives its 0.3s lease several times over; the heartbeat keeps renewing it
+    for _ in range(8):
+        time.sleep(0.25)
+        assert rival.requeue_orphans() == [], "live job looked orphaned"
+        rival.run_job(job.id)
+    running.join()
+    assert len(ran) == len(set(ran)) == NUM_STUDENTS // 100, ran
+    with Session(engine) as session:
+        assert session.get(AuditJob, job.id).status == "completed"
+
+    # A worker that died mid-job: its lease lapses and another worker resumes it
+    reset()
+    ran.clear()
+    job = owner.submit()
+    assert owner._acquire_lease(job.id)
+    rival.run_job(job.id)
+    assert not ran, "ran a job another worker holds"
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE auditjob SET lease_expires_at = '2000-01-01 00:00:00'")
+    assert rival.requeue_orphans() == [job.id]
+    rival.run_job(job.id)
+    with Session(engine) as session:
+        job = session.get(AuditJob, job.id)
+    assert job.status == "completed" and job.lease_owner is None and len(ran) == NUM_STUDENTS // 100
+    print(f"   {len(ran)} shards run once each, takeover after lease expiry")
+
+
+def verify():
+    seed()
+    check_windows()
+    check_leader_election()
+    check_atomic_cooldown()
+    check_leases()
+    print("SUCCESS: scheduled audits run once per window and never double-send")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
+    finally:
+        engine.dispose()
+        tmp.cleanup()
@@ -0,0 +1,200 @@
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Train/serve parity for the drift features: ml/train.py, the scoring
+# endpoints (score_drift_batch) and the stored per-student aggregates must all
+# compute the same features and scores from the same activities, and the
+# batched featurizer must agree with the per-activity SkillMatcher.classify answer.
+
+tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'parity.db')}"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlmodel import Session
+
+import main
+from database import create_db_and_tables, engine
+from featurizer import CAREER_SKILLS, FEATURE_NAMES, get_featurizer
+from models import Activity, Student
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml"))
+import generate_dataset
+import train
+
+NOISE_WORDS = ["Course", "Project", "Intro to", "Advanced", "Tutorial", "Bootcamp", "Cooking", "Guitar", "Hiking"]
+# Punctuation-only skills, shared prefixes and case differences
+EDGE_CASES = ["C# basics", "C++ templates", ".NET Core", "CI/CD pipelines", "React Native app", "Reactive streams",
+              "Goals", "Go routines", "R programming", "UI/UX", "Node.js API", "PYTHON", "python", "", "Database Design"]
+STUDENTS = 3_000
+
+
+def random_activity(rng):
+    skills = [s for skills in CAREER_SKILLS.values() for s in skills]
+    parts = [rng.choice(NOISE_WORDS)]
+    for _ in range(rng.randint(0, 2)):
+        parts.append(rng.choice(skills))
+    rng.shuffle(parts)
+    return " ".join(parts)
+
+
+def random_cohort(rng):
+    """One row per activity: synthetic skills mixed with free-text names like the app stores."""
+    df = generate_dataset.generate(STUDENTS, seed=7)
+    names = df["activity_name"].astype(str).to_numpy(dtype=object)
+    free_text = rng.sample(range(len(df)), len(df) // 3)
+    names[free_text] = [random_activity(rng) for _ in free_text]
+    names[free_text[:len(EDGE_CASES)]] = EDGE_CASES
+    return df.assign(activity_name=names)
+
+
+def check_rows(rng):
+    featurizer = get_featurizer(CAREER_SKILLS)
+    names = [random_activity(rng) for _ in range(3000)] + EDGE_CASES
+    targets = list(CAREER_SKILLS) + ["Unknown Career", None]
+    pairs = [(name, target) for name in names for target in targets]
+    expected = np.array([target in CAREER_SKILLS and featurizer.matcher.classify(name, target)[0]
+                         for name, target in pairs])
+
+    as_lists = featurizer.relevance([n for n, _ in pairs], [t for _, t in pairs])
+    as_categoricals = featurizer.relevance(pd.Categorical([n for n, _ in pairs]), pd.Categorical([t for _, t in pairs]))
+    assert (as_lists == expected).all(), f"{int((as_lists != expected).sum())} list mismatches"
+    assert (as_categoricals == expected).all(), f"{int((as_categoricals != expected).sum())} categorical mismatches"
+    print(f"  {len(pairs):,} (activity, career) pairs: featurizer matches SkillMatcher.classify")
+
+
+def drift_inputs(df):
+    """One main.DriftInput per student (sorted by id, like ml/train.py's rows); missing values are None."""
+    def present(values):
+        return [None if pd.isna(value) else value for value in values]
+
+    return [
+        main.DriftInput(group["target_career"].iloc[0], group["activity_name"].tolist(),
+                        present(group["type"].astype(object)), present(group["timestamp"].dt.to_pydatetime()),
+                        present([group["last_visited_at"].iloc[0]])[0])
+        for _, group in df.groupby("student_id", sort=True)
+    ]
+
+
+def store_cohort(student_ids, inputs):
+    """
+    Saves students and their activities and rebuilds their stored aggregates.
+    Stored activities always have a type string and a timestamp: an unknown
+    type is stored as "", which counts as "other" like a missing one.
+    """
+    with Session(engine) as session:
+        students = [Student(id=sid, name="", email=f"s{sid}@example.com", hashed_password="",
+                            target_career=drift_input.target_career, last_visited_at=drift_input.last_visited_at)
+                    for sid, drift_input in zip(student_ids, inputs)]
+        session.add_all(students)
+        session.execute(insert(Activity), [
+            {"student_id": sid, "name": name, "category": "", "type": activity_type or "", "timestamp": timestamp}
+            for sid, drift_input in zip(student_ids, inputs)
+            for name, activity_type, timestamp in zip(*drift_input[1:4])
+        ])
+        main.rebuild_drift_aggregates(students, main.load_activity_histories(session, student_ids))
+        session.commit()
+        return [main.drift_result_from_aggregate(student) for student in students]
+
+
+def check_train_vs_serve(rng):
+    df = random_cohort(rng)
+    trained = train.extract_features(df, as_of=generate_dataset.AS_OF)
+    inputs = drift_inputs(df)
+
+    features, _ = main.drift_features(inputs, as_of=generate_dataset.AS_OF)
+    expected = trained[list(FEATURE_NAMES)].to_numpy()
+    assert np.array_equal(features, expected, equal_nan=True), f"max |diff| {np.nanmax(np.abs(features - expected))}"
+    print(f"  {len(df):,} activities / {len(inputs):,} students: ml/train.py == main.drift_features "
+          f"({len(FEATURE_NAMES)} features)")
+
+    served = main.score_drift_batch(inputs)
+    served_ratios = np.array([result["relevant_ratio"] for result in served])
+    assert np.array_equal(served_ratios, trained["relevant_ratio"].to_numpy()), \
+        f"max |diff| {np.abs(served_ratios - trained['relevant_ratio'].to_numpy()).max()}"
+    print("  score_drift_batch relevant ratios == ml/train.py")
+
+    # Stored scores are as of the update; score_drift_batch is as of its call,
+    # moments later. Only students the database can hold as they are: it has
+    # no undated activities, and a student without a visit gets one on insert.
+    student_ids = sorted(int(sid) for sid in df["student_id"].unique())
+    storable = [i for i, drift_input in enumerate(inputs)
+             if None not in drift_input.timestamps and drift_input.last_visited_at is not None]
+    stored = store_cohort([student_ids[i] for i in storable], [inputs[i] for i in storable])
+    served = main.score_drift_batch([inputs[i] for i in storable])
+    for key in ("relevant_ratio", "drift_score"):
+        stored_values = np.array([result[key] for result in stored])
+        served_values = np.array([result[key] for result in served])
+        assert np.allclose(stored_values, served_values, rtol=0, atol=1e-6), \
+            f"{key}: max |diff| {np.abs(stored_values - served_values).max()}"
+    print(f"  {len(stored):,} students: stored drift aggregates == score_drift_batch")
+
+    streamed = train.extract_features_streaming(
+        df.iloc[start:start + 4_000] for start in range(0, len(df), 4_000)
+    )
+    pd.testing.assert_frame_equal(streamed, trained)
+    print("  chunked training extraction == in-memory extraction")
+
+
+def check_idle_student():
+    """A score stored 40 days ago is served as of now, not as it was stored."""
+    now = datetime.utcnow()
+    stored_at = now - timedelta(days=40)
+    history = [(name, "Learning", stored_at) for name in ["FastAPI"] * 3 + ["Pandas"] * 7]
+    with Session(engine) as session:
+        student = Student(id=900_000, name="", email="idle@example.com", hashed_password="",
+                          target_career="Backend Developer", last_visited_at=now)
+        session.add(student)
+        session.execute(insert(Activity), [
+            {"student_id": student.id, "name": name, "category": "", "type": activity_type, "timestamp": timestamp}
+            for name, activity_type, timestamp in history
+        ])
+        # The aggregate as rebuild_drift_aggregates left it 40 days ago, one visit before now
+        main._add_to_aggregate(student, [row[0] for row in history], get_featurizer(CAREER_SKILLS).matcher, set())
+        student.drift_skills_version = get_featurizer(CAREER_SKILLS).matcher.version
+        student.drift_feature_sums = json.dumps([0.0] * len(main.SUM_NAMES))
+        student.drift_sums_as_of = stored_at
+        main._add_activity_sums([student], {student.id: history}, stored_at)
+        main._update_drift_scores([student], stored_at)
+        stored_score = student.current_drift_score
+        session.commit()
+
+    served = TestClient(main.app).post("/predict_drift", json={"target_career": "Backend Developer",
+                                                                "student_id": 900_000}).json()
+    expected = main.score_drift_batch([main.DriftInput("Backend Developer", *map(list, zip(*history)), now)])[0]
+    assert abs(served["drift_score"] - expected["drift_score"]) < 1e-6, (served, expected, stored_score)
+    assert abs(served["drift_score"] - stored_score) > 0.1, (served, stored_score)
+    print(f"  idle student: stored {stored_score:.3f} 40 days ago, served {served['drift_score']:.3f} as of now")
+
+
+def check_training_careers():
+    careers = set(generate_dataset.generate(200)["target_career"].astype(str))
+    assert careers <= set(CAREER_SKILLS), careers - set(CAREER_SKILLS)
+    print(f"  training data uses serving's career names ({len(careers)} of {len(CAREER_SKILLS)} in a 200-student sample)")
+
+
+def verify():
+    rng = random.Random(11)
+    create_db_and_tables()
+    print("Featurizer vs SkillMatcher:")
+    check_rows(rng)
+    print("Train vs serve:")
+    check_train_vs_serve(rng)
+    check_idle_student()
+    check_training_careers()
+    print("SUCCESS: training and serving compute identical drift features")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
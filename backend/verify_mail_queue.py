@@ -0,0 +1,146 @@
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from aiosmtpd.controller import Controller
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from mailer import MailQueue, SmtpConnection
+from models import OutboxEmail
+
+# Exercises the background mail queue against a local aiosmtpd stand-in.
+# Requires: pip install aiosmtpd
+
+SMTP_HOST = "127.0.0.1"
+SMTP_PORT = 8025
+
+
+class RecordingHandler:
+    """Accepts mail, optionally rejecting the first few DATA commands with a 451."""
+
+    def __init__(self, fail_first: int = 0):
+        self.fail_first = fail_first
+        self.messages = []
+        self.peers = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            return "451 Temporary failure, try again"
+        self.peers.add(session.peer)
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+def make_queue(engine, **kwargs):
+    return MailQueue(
+        engine,
+        lambda: SmtpConnection(SMTP_HOST, SMTP_PORT, use_tls=False),
+        from_addr="noreply@example.com",
+        backoff_base=0.2,
+        poll_interval=0.1,
+        **kwargs
+    )
+
+
+def wait_for(condition, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def check_pooled_delivery(engine, handler):
+    print("1. Delivering 100 messages with 2 workers...")
+    mail_queue = make_queue(engine, workers=2)
+    mail_queue.start()
+    for i in range(100):
+        mail_queue.enqueue(f"student{i}@example.com", f"Message {i}", "<p>Hello</p>")
+    assert wait_for(lambda: len(handler.messages) == 100), f"only {len(handler.messages)} delivered"
+    mail_queue.stop()
+    # Each worker keeps one authenticated session open across its messages
+    assert len(handler.peers) <= 2, f"expected at most 2 SMTP connections, saw {len(handler.peers)}"
+    print(f"   delivered 100 messages over {len(handler.peers)} connection(s)")
+
+
+def check_retry(engine, handler):
+    print("2. Retrying after temporary failures...")
+    handler.fail_first = 2
+    mail_queue = make_queue(engine, workers=1)
+    mail_queue.start()
+    outbox_id = mail_queue.enqueue("retry@example.com", "Retry me", "<p>Hello</p>")
+    assert wait_for(lambda: any("retry@example.com" in e.rcpt_tos for e in handler.messages))
+    mail_queue.stop()
+    with Session(engine) as session:
+        outbox = session.get(OutboxEmail, outbox_id)
+        assert outbox.status == "sent" and outbox.attempts == 3, (outbox.status, outbox.attempts)
+    print("   delivered on attempt 3")
+
+
+def check_durability(engine, handler):
+    print("3. Resuming unsent mail after a restart...")
+    stopped_queue = make_queue(engine, workers=1)
+    for i in range(5):
+        stopped_queue.enqueue(f"later{i}@example.com", "Queued before restart", "<p>Hello</p>")
+    assert stopped_queue.pending_count() == 5
+
+    restarted_queue = make_queue(engine, workers=1)
+    restarted_queue.start()
+    assert wait_for(lambda: restarted_queue.pending_count() == 0)
+    restarted_queue.stop()
+    with Session(engine) as session:
+        sent = session.exec(select(OutboxEmail).where(OutboxEmail.subject == "Queued before restart")).all()
+        assert all(outbox.status == "sent" for outbox in sent) and len(sent) == 5
+    print("   all 5 outbox rows delivered by the new queue")
+
+
+def check_shared_outbox(engine, handler):
+    print("4. Two queues on one outbox send each message once...")
+    with Session(engine) as session:
+        session.add_all(OutboxEmail(to_email=f"shared{i}@example.com", subject="Shared outbox", html_content="<p>Hi</p>")
+                        for i in range(50))
+        # Claimed by a worker that died mid-send: its lease has run out
+        session.add(OutboxEmail(to_email="orphan@example.com", subject="Shared outbox", html_content="<p>Hi</p>",
+                                status="sending", lease_owner="dead-worker",
+                                lease_until=datetime.utcnow() - timedelta(seconds=1)))
+        session.commit()
+    queues = [make_queue(engine, workers=2) for _ in range(2)]
+    for mail_queue in queues:
+        mail_queue.start()
+    assert wait_for(lambda: queues[0].pending_count() == 0)
+    time.sleep(0.5)  # Let any duplicate send land before counting
+    for mail_queue in queues:
+        mail_queue.stop()
+    delivered = [rcpt for e in handler.messages for rcpt in e.rcpt_tos if rcpt.startswith(("shared", "orphan"))]
+    assert len(delivered) == len(set(delivered)) == 51, f"{len(delivered)} deliveries of {len(set(delivered))} messages"
+    print("   51 messages, 51 deliveries (including one with an expired lease)")
+
+
+def verify():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname=SMTP_HOST, port=SMTP_PORT)
+    controller.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'outbox.db')}")
+            SQLModel.metadata.create_all(engine)
+            check_pooled_delivery(engine, handler)
+            check_retry(engine, handler)
+            check_durability(engine, handler)
+            check_shared_outbox(engine, handler)
+            engine.dispose()
+    finally:
+        controller.stop()
+    print("SUCCESS: mail queue delivered, retried and resumed correctly")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,169 @@
+import json
+import mailbox
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from mailer import MailQueue
+from models import OutboxEmail
+from transports import HttpBulkTransport, MaildirTransport
+
+# Exercises the pluggable mail transports: the Maildir sink, and a bulk HTTP
+# provider (a local mock server) that takes a whole audit's news digests in a
+# handful of API calls while everything else keeps its default transport.
+
+NUM_NEWS = 1000
+NUM_OTHER = 30
+HTTP_BATCH_SIZE = 250
+BOUNCE = "bounce@example.com"
+
+
+class MockBulkProvider(BaseHTTPRequestHandler):
+    """Accepts every message but BOUNCE; answers the first `fail_first` calls with a 503."""
+    calls = []
+    fail_first = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.lock:
+            failing = MockBulkProvider.fail_first > 0
+            MockBulkProvider.fail_first -= failing
+            self.calls.append((self.headers.get("Authorization"), len(body["messages"]), failing))
+        if failing:
+            self.send_response(503)
+            self.end_headers()
+            return
+        results = [
+            {"id": m["id"], "status": "rejected", "error": "mailbox does not exist"} if m["to"] == BOUNCE
+            else {"id": m["id"], "status": "accepted"}
+            for m in body["messages"]
+        ]
+        payload = json.dumps({"results": results}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def statuses(engine, category=None):
+    with Session(engine) as session:
+        query = select(OutboxEmail)
+        if category is not None:
+            query = query.where(OutboxEmail.category == category)
+        return {row.to_email: (row.status, row.attempts) for row in session.exec(query).all()}
+
+
+def check_maildir(engine, maildir_path):
+    print("1. Maildir sink...")
+    mail_queue = MailQueue(engine, lambda: MaildirTransport(maildir_path), from_addr="noreply@example.com",
+                           workers=2, backoff_base=0.2, poll_interval=0.1)
+    mail_queue.start()
+    for i in range(NUM_OTHER):
+        mail_queue.enqueue(f"student{i}@example.com", f"Message {i}", "<p>Hello</p>", "Hello", category="drift")
+    assert wait_for(lambda: mail_queue.pending_count() == 0)
+    mail_queue.stop()
+    delivered = list(mailbox.Maildir(maildir_path, create=False))
+    assert len(delivered) == NUM_OTHER, len(delivered)
+    parts = [part.get_content_type() for part in delivered[0].walk()]
+    assert parts == ["multipart/alternative", "text/plain", "text/html"], parts
+    assert sorted(m["To"] for m in delivered) == sorted(f"student{i}@example.com" for i in range(NUM_OTHER))
+    print(f"   {len(delivered)} messages written to the Maildir")
+
+
+def check_bulk_routing(engine, maildir_path, url):
+    print(f"2. {NUM_NEWS} news digests routed to the bulk provider, the rest to the Maildir...")
+    MockBulkProvider.calls.clear()
+    MockBulkProvider.fail_first = 1
+    mail_queue = MailQueue(
+        engine,
+        lambda: MaildirTransport(maildir_path),
+        from_addr="noreply@example.com",
+        workers=2,
+        max_attempts=2,
+        backoff_base=0.2,
+        poll_interval=0.1,
+        batch_size=500,
+        routes={"news": lambda: HttpBulkTransport(url, "test-key", max_batch_size=HTTP_BATCH_SIZE)},
+    )
+    # The audit stages a shard's worth of emails in one transaction, then
+    # schedules them all at once
+    with Session(engine) as session:
+        for i in range(NUM_NEWS - 1):
+            mail_queue.stage(session, f"reader{i}@example.com", "News", "<p>News</p>", "News", category="news")
+        mail_queue.stage(session, BOUNCE, "News", "<p>News</p>", "News", category="news")
+        for i in range(NUM_OTHER):
+            mail_queue.stage(session, f"drifter{i}@example.com", "Drift", "<p>Drift</p>", "Drift",
+                             category="drift")
+        session.commit()
+    mail_queue.start()
+    assert wait_for(lambda: mail_queue.pending_count() == 0), f"{mail_queue.pending_count()} still pending"
+    mail_queue.stop()
+
+    news = statuses(engine, "news")
+    assert news.pop(BOUNCE) == ("failed", 2), "rejected address was not retried then given up on"
+    assert all(status == "sent" for status, _ in news.values()), "news digest not delivered"
+    assert sum(1 for _, attempts in news.values() if attempts > 1) <= HTTP_BATCH_SIZE, "retried more than one batch"
+
+    calls = MockBulkProvider.calls
+    failed_calls = sum(1 for _, _, failing in calls if failing)
+    messages_per_call = [count for _, count, _ in calls]
+    print(f"   {NUM_NEWS} news emails in {len(calls)} API calls {messages_per_call} "
+          f"({failed_calls} answered 503 and retried)")
+    assert failed_calls == 1, calls
+    assert all(auth == "Bearer test-key" for auth, _, _ in calls), calls
+    assert max(messages_per_call) <= HTTP_BATCH_SIZE, messages_per_call
+    # One call per full batch, plus the 503'd batch and the bounce's retries
+    assert len(calls) <= math.ceil(NUM_NEWS / HTTP_BATCH_SIZE) + 4, len(calls)
+    assert sum(messages_per_call) < NUM_NEWS + HTTP_BATCH_SIZE + 4, "messages sent to the provider repeatedly"
+
+    drift = {to: status for to, (status, _) in statuses(engine, "drift").items() if to.startswith("drifter")}
+    assert len(drift) == NUM_OTHER and set(drift.values()) == {"sent"}, drift
+    in_maildir = [m["To"] for m in mailbox.Maildir(maildir_path, create=False)]
+    assert sum(1 for to in in_maildir if to.startswith("drifter")) == NUM_OTHER, "drift emails missing from the Maildir"
+    assert not any(to.startswith("reader") for to in in_maildir), "news went to the default transport"
+    print(f"   {NUM_OTHER} other emails delivered through the default transport")
+
+
+def verify():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'transports.db')}",
+                               connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(engine)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), MockBulkProvider)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            check_maildir(engine, os.path.join(tmp, "maildir"))
+            check_bulk_routing(engine, os.path.join(tmp, "routed"),
+                               f"http://127.0.0.1:{server.server_address[1]}/v1/messages/bulk")
+        finally:
+            server.shutdown()
+            engine.dispose()
+    print("SUCCESS: mail goes out through pluggable, batched transports")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+import sys
+import tempfile
+
+# Runs the migration chain against throwaway SQLite databases: an upgrade to a
+# target stops there even when the target is already applied, and several
+# processes upgrading one database at once (uvicorn --workers N all run
+# create_db_and_tables at startup) apply each revision exactly once.
+
+WORKERS = 4
+
+tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'unused.db')}"
+
+from sqlalchemy import text
+from sqlmodel import SQLModel
+
+import migrations
+import models  # noqa: F401  (registers the tables on SQLModel.metadata)
+from database import build_engine
+
+
+def fresh_engine(name):
+    engine = build_engine(f"sqlite:///{os.path.join(tmp.name, name)}")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def upgrade_worker(url, start):
+    start.wait()
+    return migrations.upgrade(build_engine(url))
+
+
+def check_target():
+    revisions = [module.revision for module in migrations.load_revisions()]
+    engine = fresh_engine("target.db")
+    applied = migrations.upgrade(engine, target=revisions[2])
+    assert applied == revisions[:3], applied
+    # Already applied: nothing past it may run
+    applied = migrations.upgrade(engine, target=revisions[1])
+    assert applied == [], applied
+    assert migrations.current_revision(engine) == revisions[2], migrations.current_revision(engine)
+    assert migrations.upgrade(engine) == revisions[3:]
+    assert migrations.upgrade(engine) == []
+    print(f"  target {revisions[1]} (already applied) applied nothing; head is {revisions[-1]}")
+
+
+def check_concurrent_upgrades():
+    fresh_engine("concurrent.db").dispose()
+    url = f"sqlite:///{os.path.join(tmp.name, 'concurrent.db')}"
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Manager() as manager, ctx.Pool(WORKERS) as pool:
+        start = manager.Event()
+        results = [pool.apply_async(upgrade_worker, (url, start)) for _ in range(WORKERS)]
+        start.set()
+        applied = [result.get(timeout=120) for result in results]
+    revisions = [module.revision for module in migrations.load_revisions()]
+    applied_all = sorted(revision for worker in applied for revision in worker)
+    assert applied_all == revisions, applied
+    with build_engine(url).connect() as conn:
+        rows = conn.execute(text(f"SELECT revision FROM {migrations.SCHEMA_VERSION_TABLE}")).scalars().all()
+    assert sorted(rows) == revisions, rows
+    print(f"  {WORKERS} processes upgrading at once applied {len(revisions)} revisions once each "
+          f"({', '.join(str(len(worker)) for worker in applied)} per process)")
+
+
+def verify():
+    print("Migrations:")
+    check_target()
+    check_concurrent_upgrades()
+    print("SUCCESS: upgrades stop at their target and run once across processes")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,144 @@
+import os
+import sys
+import tempfile
+import threading
+
+REGISTRY_DIR = tempfile.mkdtemp(prefix="drift-models-")
+os.environ["MODEL_REGISTRY_DIR"] = REGISTRY_DIR
+os.environ["MODEL_RELOAD_INTERVAL"] = "0"
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+from drift_model import DriftModel
+from featurizer import FEATURE_NAMES
+from model_registry import ARTIFACT, ChecksumMismatch
+
+# Publishes drift model versions to a scratch registry and checks promote,
+# rollback, checksum verification and hot reload while requests are scored
+# from several threads, plus recovery from a failed load without a restart.
+
+PROFILES = [
+    ("Frontend Developer", ["React Hooks", "Node.js API", "Cooking Class"]),
+    ("Data Scientist", ["Pandas", "Gardening", "Guitar Practice", "React Router"]),
+    ("AI/ML Engineer", ["PyTorch Training", "Deep Learning Course"]),
+]
+SCORING_THREADS = 4
+SWAPS = 50
+
+
+def scores():
+    return tuple(round(result["drift_score"], 9) for result in main.score_drift_batch(PROFILES))
+
+
+def reset_worker():
+    """Forgets the loaded model, as a freshly started worker would."""
+    main._model = main._model_version = main._model_error = main._model_checked_at = None
+
+
+def publish_versions(registry):
+    base = DriftModel.load(main.DRIFT_MODEL_PATH, FEATURE_NAMES)
+    flipped_path = os.path.join(tempfile.mkdtemp(), "flipped.npz")
+    DriftModel(base.feature_names, base.mean, base.scale, -base.coef, -base.intercept, base.metadata).save(flipped_path)
+    first = registry.publish(main.DRIFT_MODEL_PATH, FEATURE_NAMES, "a" * 64, metrics={"roc_auc": 0.99})
+    second = registry.publish(flipped_path, FEATURE_NAMES, "b" * 64, metrics={"roc_auc": 0.01})
+    assert (first, second) == ("v0001", "v0002"), (first, second)
+    manifest = registry.manifest(second)
+    assert manifest["feature_names"] == FEATURE_NAMES and manifest["training_data_hash"] == "b" * 64
+    assert manifest["metrics"] == {"roc_auc": 0.01} and len(manifest["sha256"]) == 64
+    return first, second
+
+
+def check_hot_swap(registry, expected):
+    stop = threading.Event()
+    seen, errors = set(), []
+
+    def score_forever():
+        while not stop.is_set():
+            try:
+                result = scores()
+                # Each batch is scored by one model, never a mix of two
+                assert result in expected.values(), result
+                seen.add(result)
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=score_forever) for _ in range(SCORING_THREADS)]
+    for thread in threads:
+        thread.start()
+    for i in range(SWAPS):
+        registry.promote("v0002")
+        main.get_model()
+        registry.rollback()
+        main.get_model()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors[0]
+    assert main._model_version == "v0001"
+    return len(seen)
+
+
+def run():
+    registry = main.model_registry
+    client = TestClient(main.app)
+
+    print("1. Nothing promoted: the fallback drift_model.npz is served...")
+    fallback = scores()
+    assert main._model_version is None and client.get("/model").json()["promoted"] is None
+
+    print("2. Published versions are not served until promoted...")
+    first, second = publish_versions(registry)
+    assert scores() == fallback and main._model_version is None
+
+    print("3. Promote switches the running worker without a restart...")
+    registry.promote(first)
+    assert scores() == fallback and main._model_version == first
+    registry.promote(second)
+    flipped = scores()
+    assert main._model_version == second and np.allclose(np.add(flipped, fallback), 1.0)
+    assert registry.pointer()["previous"] == [first]
+    assert registry.rollback() == first and scores() == fallback
+    status = client.get("/model").json()
+    assert status["version"] == status["promoted"] == first and status["metadata"]["version"] == first
+
+    print(f"4. {SWAPS * 2} swaps while {SCORING_THREADS} threads score requests...")
+    models_seen = check_hot_swap(registry, {first: fallback, second: flipped})
+    print(f"   no failed or mixed batches; {models_seen} model versions served")
+
+    print("5. A corrupted artifact is refused and the current model kept...")
+    with open(os.path.join(registry.versions_dir, second, ARTIFACT), "r+b") as f:
+        f.seek(-8, os.SEEK_END)
+        f.write(b"\0" * 8)
+    try:
+        registry.promote(second)
+        raise AssertionError("promoted a corrupted artifact")
+    except ChecksumMismatch:
+        pass
+    registry._set_pointer(second, [first])  # as if the file were damaged after promotion
+    assert scores() == fallback and main._model_version == first
+    status = client.get("/model").json()
+    assert status["promoted"] == second and "checksum" in status["error"], status
+
+    print("6. A worker that cannot load any model says why, then recovers...")
+    reset_worker()
+    try:
+        scores()
+        raise AssertionError("scored without a model")
+    except HTTPException as e:
+        assert e.status_code == 500 and "checksum" in e.detail, e.detail
+    assert registry.rollback() == first
+    assert scores() == fallback and main._model_error is None
+
+    print("SUCCESS: model versions are verified, promoted and hot-swapped safely")
+
+
+if __name__ == "__main__":
+    try:
+        run()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
@@ -4,6 +4,8 @@ import requests
 import datetime
 import json
 
+from audit_polling import wait_for_audit
+
 db_path = "career_drift.db"
 BASE_URL = "http://127.0.0.1:8000"
 
@@ -14,7 +16,7 @@ def setup_test_data():
 
     # Create inactive tester if not exists
     try:
-        resp = requests.post(f"{BASE_URL}/register", json={
+        requests.post(f"{BASE_URL}/register", json={
             "name": "Inactive Tester",
             "email": "inactive@example.com",
             "password": "pass",
@@ -55,9 +57,9 @@ def trigger_audit():
     print("Triggering /audit_drift...")
     try:
         resp = requests.post(f"{BASE_URL}/audit_drift")
-        if resp.status_code == 200:
+        if resp.status_code == 202:
             print("Audit triggered successfully.")
-            print(json.dumps(resp.json(), indent=2))
+            print(json.dumps(wait_for_audit(BASE_URL, resp.json()), indent=2))
         else:
             print(f"Audit failed: {resp.status_code} - {resp.text}")
     except Exception as e:
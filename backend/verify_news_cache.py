@@ -0,0 +1,164 @@
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from news import Feed, NewsFeedCache, VERIFIED_NEWS, parse_feed
+
+# Serves fixture RSS/Atom feeds from a local HTTP server and checks the news
+# cache: conditional GETs, stale-on-error, concurrent multi-feed fetches,
+# de-duplication across feeds and in-memory reads.
+
+FEED_PORT = 8777
+BASE_URL = f"http://127.0.0.1:{FEED_PORT}"
+FEED_ETAG = '"fixture-v1"'
+SLOW_FEED_DELAY = 1.0
+
+RSS_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Fixture</title>
+<item><title>Fixture Story One</title><link>https://example.com/one</link>
+<pubDate>Mon, 02 Mar 2026 10:00:00 +0000</pubDate><description>&lt;p&gt;First &lt;b&gt;story&lt;/b&gt;&lt;/p&gt;</description></item>
+<item><title>Fixture Story Two</title><link>https://example.com/two</link>
+<pubDate>Mon, 02 Mar 2026 09:00:00 +0000</pubDate><description>Second story</description></item>
+</channel></rss>"""
+
+ATOM_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Atom Fixture</title>
+<entry><title>Atom Story</title><link rel="alternate" href="https://example.com/atom"/>
+<updated>2026-03-02T11:00:00Z</updated><summary>From an Atom feed</summary></entry>
+<entry><title>Duplicate of One</title><link href="https://example.com/one"/>
+<updated>2026-03-02T08:00:00Z</updated><summary>Same URL as the RSS story</summary></entry>
+</feed>"""
+
+
+INCOMPLETE_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Incomplete</title>
+<item><link>https://example.com/untitled</link><description>No title</description></item>
+<item><title>  </title><link>https://example.com/blank</link></item>
+<item><title>No link</title><description>Nowhere to go</description></item>
+<item><title>Undated</title><link>https://example.com/undated</link></item>
+</channel></rss>"""
+
+INCOMPLETE_ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+<entry><link href="https://example.com/untitled-atom"/></entry>
+<entry><title>Atom undated</title><link href="https://example.com/undated-atom"/></entry>
+</feed>"""
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    hits = {"200": 0, "304": 0}
+    down = False
+
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(SLOW_FEED_DELAY)
+        if self.path.startswith("/hang"):
+            time.sleep(SLOW_FEED_DELAY * 5)
+        if FeedHandler.down:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == FEED_ETAG:
+            FeedHandler.hits["304"] += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        FeedHandler.hits["200"] += 1
+        body = ATOM_FEED if "atom" in self.path else RSS_FEED
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("ETag", FEED_ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def check_single_feed():
+    cache = NewsFeedCache([Feed("Fixture", f"{BASE_URL}/feed/", timeout=2)], ttl=0.2)
+
+    print("1. Initial fetch...")
+    assert cache.refresh()
+    news = cache.get()
+    assert news[0]["title"] == "Fixture Story One" and news[0]["description"] == "First story..."
+    assert len(news) == 2 + len(VERIFIED_NEWS)
+    assert FeedHandler.hits == {"200": 1, "304": 0}
+
+    print("2. Conditional refresh of an unchanged feed...")
+    assert cache.refresh()
+    assert FeedHandler.hits == {"200": 1, "304": 1}, FeedHandler.hits
+
+    print("3. Feed goes down: stale data keeps being served...")
+    FeedHandler.down = True
+    time.sleep(0.3)
+    assert not cache.refresh()
+    assert cache.get()[0]["title"] == "Fixture Story One"
+
+    print("4. Background refresher recovers once the feed is back...")
+    FeedHandler.down = False
+    cache.start()
+    time.sleep(0.5)
+    cache.stop()
+    assert FeedHandler.hits["304"] >= 2, FeedHandler.hits
+
+    reads = 100_000
+    start = time.perf_counter()
+    for _ in range(reads):
+        cache.get()
+    per_read = (time.perf_counter() - start) / reads
+    print(f"   in-memory read: {per_read * 1e6:.2f} us per call")
+
+
+def check_multi_feed():
+    print("5. Twenty slow feeds fetched concurrently, plus one that hangs...")
+    feeds = [Feed(f"Slow {i}", f"{BASE_URL}/slow/{i}", timeout=SLOW_FEED_DELAY * 3) for i in range(19)]
+    feeds.append(Feed("Atom", f"{BASE_URL}/slow/atom", timeout=SLOW_FEED_DELAY * 3))
+    feeds.append(Feed("Hanging", f"{BASE_URL}/hang", timeout=SLOW_FEED_DELAY * 2))
+    cache = NewsFeedCache(feeds, ttl=60)
+
+    start = time.perf_counter()
+    assert cache.refresh()
+    elapsed = time.perf_counter() - start
+    print(f"   refreshed {len(feeds)} feeds in {elapsed:.2f}s (each slow feed takes {SLOW_FEED_DELAY:.1f}s)")
+    # Bounded by the slowest single feed (the hanging one's timeout), not the sum
+    assert elapsed < SLOW_FEED_DELAY * 2 + 1.0, elapsed
+
+    live = [item for item in cache.get() if item["category"] == "Tech"]
+    urls = [item["url"] for item in live]
+    assert len(urls) == len(set(urls)), urls
+    assert urls[0] == "https://example.com/atom", urls  # newest first across feeds
+    assert set(urls) == {"https://example.com/atom", "https://example.com/one", "https://example.com/two"}, urls
+    print(f"   {len(urls)} unique live items after de-duplication")
+
+
+def check_incomplete_items():
+    print("6. Items without a title or link are skipped; a missing date is empty...")
+    items = parse_feed(INCOMPLETE_FEED, limit=4) + parse_feed(INCOMPLETE_ATOM, limit=4)
+    assert [item["url"] for item in items] == ["https://example.com/undated", "https://example.com/undated-atom"], items
+    # NewsItem (the /news response model) requires these to be strings
+    assert all(isinstance(item[key], str) for item in items for key in ("title", "url", "publishedAt")), items
+    assert [item["publishedAt"] for item in items] == ["", ""]
+
+
+def verify():
+    server = ThreadingHTTPServer(("127.0.0.1", FEED_PORT), FeedHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        check_single_feed()
+        check_multi_feed()
+        check_incomplete_items()
+    finally:
+        server.shutdown()
+    print("SUCCESS: news cache behaves as expected")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+# Checks that `import main` stays within a startup budget: heavy, optional
+# dependencies (the model stack, HTTP client, password hashing) are only
+# imported when first used, and a fresh interpreter imports the app quickly.
+
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1.5"))
+RUNS = 5
+DEFERRED_MODULES = ["sklearn", "joblib", "pandas", "numpy", "httpx", "passlib"]
+
+IMPORT_MAIN = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, "-W", "ignore", *args],
+        capture_output=True, text=True, check=True,
+        env={**os.environ, "MODEL_WARMUP": "0"},
+    )
+
+
+def importtime_breakdown(top=10):
+    """Top-level packages by cumulative import time, from `python -X importtime`."""
+    stderr = run_python("-X", "importtime", "-c", "import main").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is shown by indentation; keep direct imports of main only
+        if name.startswith("   ") and not name.startswith("    "):
+            rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def verify():
+    print("Heaviest imports pulled in by main:")
+    for seconds, name in importtime_breakdown():
+        print(f"  {name:<24} {seconds * 1000:8.1f} ms")
+
+    timings = sorted(float(run_python("-c", IMPORT_MAIN).stdout.strip().splitlines()[-1]) for _ in range(RUNS))
+    median = timings[len(timings) // 2]
+    print(f"\nCold `import main` (median of {RUNS}): {median * 1000:.1f} ms (budget {STARTUP_BUDGET_SECONDS * 1000:.0f} ms)")
+    assert median <= STARTUP_BUDGET_SECONDS, f"import took {median:.2f}s, budget is {STARTUP_BUDGET_SECONDS:.2f}s"
+
+    check = f"import sys, main; print('loaded:' + ','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    last_line = run_python("-c", check).stdout.strip().splitlines()[-1]
+    loaded = [m for m in last_line[len("loaded:"):].split(",") if m]
+    print(f"Deferred modules loaded at import: {loaded or 'none'}")
+    assert not loaded, f"imported eagerly: {loaded}"
+
+    check = ("import main, numpy as np; m = main.get_model(); X = np.zeros((2, len(main.FEATURE_NAMES))); "
+             "X[:, 0] = [0.2, 0.9]; print(type(m).__name__, main._predict_drift_probabilities(X).round(3).tolist())")
+    print(f"First get_model() call: {run_python('-c', check).stdout.strip().splitlines()[-1]}")
+    print("SUCCESS: startup stays within budget")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
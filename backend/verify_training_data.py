@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import tracemalloc
+from urllib.parse import quote
+
+import pandas as pd
+
+# Checks the out-of-core training data paths: career-partitioned Parquet, CSV
+# read in chunks and the activity table read through a server-side cursor all
+# produce the same features as in-memory extraction, and streaming peak
+# memory tracks the chunk size rather than the number of activity rows.
+
+tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'training.db')}"
+
+import generate_dataset
+import models  # noqa: F401  (registers the tables for create_db_and_tables)
+from database import create_db_and_tables
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml"))
+import train
+
+STUDENTS = 20_000
+CHUNK_ROWS = 25_000
+# Same students, 4x the activities each: the peak should barely move
+MEMORY_SIZES = [(50_000, 1), (50_000, 4)]
+
+
+def check_file_formats():
+    expected = train.extract_features(generate_dataset.generate(STUDENTS))
+    csv_path = os.path.join(tmp.name, "career_data.csv")
+    parquet_path = os.path.join(tmp.name, "career_data")
+    rows = generate_dataset.write_csv(csv_path, STUDENTS)
+    generate_dataset.write_parquet(parquet_path, STUDENTS)
+
+    partitions = sorted(os.listdir(parquet_path))
+    # Partition values are URL-encoded ("AI/ML Engineer" -> "AI%2FML%20Engineer")
+    assert partitions == sorted(f"target_career={quote(c, safe='')}" for c in generate_dataset.CAREERS), partitions
+
+    for label, path in [("csv", csv_path), ("parquet", parquet_path)]:
+        actual = train.load_and_process_data(path, chunk_rows=CHUNK_ROWS)
+        pd.testing.assert_frame_equal(actual, expected)
+        print(f"  {label:<8} {rows:,} rows in {CHUNK_ROWS:,}-row chunks: features match in-memory extraction")
+
+
+def check_activity_table():
+    create_db_and_tables()
+    # No label table yet: the stored drift scores must not stand in for labels
+    try:
+        next(train.iter_activity_table_chunks())
+        raise AssertionError("trained on the activity table without a label table")
+    except RuntimeError as e:
+        assert "drift_label" in str(e), e
+
+    # The activity table always has a type and a timestamp
+    df = generate_dataset.generate(2_000, missing_rate={})
+    labels = df.groupby("student_id", observed=True).agg(
+        target=("target_career", "first"), status=("status", "first"), last_visited_at=("last_visited_at", "first")
+    )
+    conn = sqlite3.connect(os.environ["DATABASE_URL"][len("sqlite:///"):])
+    # Stored scores disagree with every label: they must not leak into training
+    conn.executemany(
+        "INSERT INTO student (id, name, email, hashed_password, target_career, current_drift_score, "
+        "last_visited_at, relevant_count, conflicting_count, irrelevant_count, drift_suggestions) "
+        "VALUES (?, '', ?, '', ?, ?, ?, 0, 0, 0, '[]')",
+        ((int(sid), f"s{sid}@example.com", row.target, 0.1 if row.status == "Drifting" else 0.9,
+          row.last_visited_at.isoformat(" ")) for sid, row in labels.iterrows()),
+    )
+    conn.execute("CREATE TABLE drift_label (student_id INTEGER PRIMARY KEY, status TEXT NOT NULL)")
+    conn.executemany("INSERT INTO drift_label (student_id, status) VALUES (?, ?)",
+                     ((int(sid), row.status) for sid, row in labels.iterrows()))
+    # A student without a target has no label to learn from
+    conn.execute("INSERT INTO student (id, name, email, hashed_password, target_career, current_drift_score, "
+                 "relevant_count, conflicting_count, irrelevant_count, drift_suggestions) "
+                 "VALUES (999999, '', 'none@example.com', '', '', 0, 0, 0, 0, '[]')")
+    conn.execute("INSERT INTO drift_label (student_id, status) VALUES (999999, 'Drifting')")
+    # Nor does one with a target but no recorded outcome
+    conn.execute("INSERT INTO student (id, name, email, hashed_password, target_career, current_drift_score, "
+                 "relevant_count, conflicting_count, irrelevant_count, drift_suggestions) "
+                 "VALUES (999998, '', 'unlabeled@example.com', '', 'Backend Developer', 0.9, 0, 0, 0, '[]')")
+    conn.executemany(
+        "INSERT INTO activity (student_id, name, category, type, timestamp) VALUES (?, ?, ?, ?, ?)",
+        zip(df["student_id"].tolist(), df["activity_name"].astype(str), df["category"].astype(str),
+            df["type"].astype(str), df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")),
+    )
+    conn.executemany("INSERT INTO activity (student_id, name, category, type, timestamp) "
+                     "VALUES (?, 'Python', 'x', 'Learning', '2024-01-01 00:00:00')", [(999999,), (999998,)])
+    conn.commit()
+    conn.close()
+
+    chunks = list(train.iter_activity_table_chunks(chunk_rows=1_000))
+    assert all(len(chunk) <= 1_000 for chunk in chunks) and len(chunks) > 1, [len(c) for c in chunks]
+    actual = train.extract_features_streaming(chunks)
+    pd.testing.assert_frame_equal(actual, train.extract_features(df))
+    print(f"  activity table: {len(df):,} rows in {len(chunks)} cursor batches match in-memory extraction")
+
+
+def peak_mib(path, chunk_rows):
+    tracemalloc.start()
+    train.load_and_process_data(path, chunk_rows=chunk_rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def check_bounded_memory():
+    for students, repeat in MEMORY_SIZES:
+        df = generate_dataset.generate(students)
+        df = pd.concat([df] * repeat, ignore_index=True)
+        path = os.path.join(tmp.name, f"memory_{repeat}.csv")
+        df.to_csv(path, index=False)
+        rows = len(df)
+        del df
+        streaming, whole = peak_mib(path, CHUNK_ROWS), peak_mib(path, rows)
+        print(f"  {rows:>9,} rows: streaming peak {streaming:6.1f} MiB, single chunk peak {whole:6.1f} MiB")
+        if repeat == 1:
+            baseline = streaming
+    assert streaming < baseline * 1.5, f"streaming peak grew from {baseline:.1f} to {streaming:.1f} MiB"
+
+
+def verify():
+    print("File formats:")
+    check_file_formats()
+    print("Database source:")
+    check_activity_table()
+    print("Memory:")
+    check_bounded_memory()
+    print("SUCCESS: chunked training data paths agree and stay within bounded memory")
+
+
+if __name__ == "__main__":
+    try:
+        verify()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
@@ -123,7 +123,7 @@ function Dashboard() {
         })
         .catch(err => console.error("Error fetching student:", err));
 
-      // Fetch existing activities
+      // Fetch the most recent activities (newest first)
       fetch(`${import.meta.env.VITE_API_URL}/students/${studentId}/activities/`)
         .then(res => res.json())
         .then(data => setActivities(data))
@@ -144,7 +144,8 @@ function Dashboard() {
         },
         body: JSON.stringify({
           target_career: target,
-          recent_activities: activities
+          recent_activities: activities,
+          student_id: localStorage.getItem('studentId')
         }),
       });
       const data = await response.json();
@@ -175,7 +176,7 @@ function Dashboard() {
 
       if (response.ok) {
         const savedActivity = await response.json();
-        setActivities([...activities, savedActivity]);
+        setActivities([savedActivity, ...activities]); // list is newest first
         setNewActivityName("");
       } else {
         alert("Failed to save activity");